@@ -0,0 +1,121 @@
+import asyncio
+import json
+import multiprocessing
+import platform
+import resource
+import subprocess
+import time
+from typing import List, Callable, Awaitable
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * p / 100.0
+    lower = int(k)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (k - lower)
+
+
+def peak_rss_kb() -> int:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+class BenchResult:
+    def __init__(self, scenario: str, concurrency: int, operations: int, requests: int, wall: float, cpu: float,
+                 latencies: List[float]):
+        latencies = sorted(latencies)
+        self.scenario = scenario
+        self.concurrency = concurrency
+        self.operations = operations
+        self.requests = requests
+        self.wall_seconds = wall
+        self.requests_per_second = requests / wall if wall else 0.0
+        self.operations_per_second = operations / wall if wall else 0.0
+        self.p50_ms = percentile(latencies, 50) * 1000
+        self.p95_ms = percentile(latencies, 95) * 1000
+        self.p99_ms = percentile(latencies, 99) * 1000
+        self.cpu_ms_per_request = cpu * 1000 / requests if requests else 0.0
+        self.peak_rss_kb = peak_rss_kb()
+
+    def as_dict(self):
+        return dict(self.__dict__)
+
+    def __str__(self):
+        return f"{self.scenario:<10} c={self.concurrency:<4} {self.requests_per_second:9.1f} req/s " \
+               f"p50={self.p50_ms:7.2f}ms p95={self.p95_ms:7.2f}ms p99={self.p99_ms:7.2f}ms " \
+               f"cpu/req={self.cpu_ms_per_request:6.3f}ms rss={self.peak_rss_kb}kB"
+
+
+async def measure(scenario: str, concurrency: int, inputs: list, operation: Callable[[object], Awaitable],
+                  requests_per_operation: int = 1) -> BenchResult:
+    """
+    Runs operation once for every input with at most concurrency operations in flight, timing each of them
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def timed(item):
+        async with semaphore:
+            started = time.perf_counter()
+            await operation(item)
+            latencies.append(time.perf_counter() - started)
+
+    cpu_before = time.process_time()
+    wall_before = time.perf_counter()
+    await asyncio.gather(*[timed(x) for x in inputs])
+    wall = time.perf_counter() - wall_before
+    cpu = time.process_time() - cpu_before
+    return BenchResult(scenario, concurrency, len(inputs), len(inputs) * requests_per_operation, wall, cpu,
+                       latencies)
+
+
+def _serve_standin(latency, ready: multiprocessing.Queue, stop: multiprocessing.Event):
+    from mdbclient.mdb_standin import MdbStandin
+
+    async def serve():
+        async with MdbStandin(latency=latency) as standin:
+            ready.put(standin.api_base)
+            while not stop.is_set():
+                await asyncio.sleep(0.1)
+
+    asyncio.run(serve())
+
+
+class StandinProcess:
+    """
+    Runs an MdbStandin in a separate process, so cpu time measured in the benchmark process is the client's own
+    """
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self._stop = multiprocessing.Event()
+        self._process = None
+        self.api_base = None
+
+    def __enter__(self):
+        ready = multiprocessing.Queue()
+        self._process = multiprocessing.Process(target=_serve_standin, args=(self.latency, ready, self._stop),
+                                                daemon=True)
+        self._process.start()
+        self.api_base = ready.get(timeout=30)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._stop.set()
+        self._process.join(timeout=10)
+
+
+def environment() -> dict:
+    try:
+        revision = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        revision = None
+    return {"python": platform.python_version(), "platform": platform.platform(), "git_revision": revision or None,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z")}
+
+
+def write_results(path: str, benchmark: str, parameters: dict, results: list):
+    with open(path, "w") as f:
+        json.dump({"benchmark": benchmark, "environment": environment(), "parameters": parameters,
+                   "results": results}, f, indent=2)
@@ -0,0 +1,117 @@
+"""
+End-to-end throughput of a single MdbClient against a stand-in server with injected latency.
+
+    python -m benchmarks.client_throughput --latency 0.005 --concurrency 1,8,32,128 --output throughput.json
+
+With --record the traffic is written to a cassette, and --replay runs the same traffic from the cassette
+without a server, so different client versions can be compared on identical requests.
+"""
+import argparse
+import asyncio
+
+import aiohttp
+
+from benchmarks.bench_util import measure, StandinProcess, write_results
+from mdbclient.cassette import RecordingSession, ReplaySession, TIMING_ORIGINAL, TIMING_FAST
+from mdbclient.mdbclient import MdbClient
+
+SCENARIOS = ["resolve", "open", "hydrate", "create", "update"]
+
+MEDIA_OBJECTS_PER_MEO = 3
+PUBLICATIONS_PER_MEO = 2
+
+
+async def seed(client: MdbClient, count: int) -> list:
+    async def create_one(idx):
+        meo = await client.create_master_eo({"title": f"bench-{idx}"})
+        for x in range(MEDIA_OBJECTS_PER_MEO):
+            await client.create_media_object(meo, {"name": f"bench-{idx}-{x}"})
+        for x in range(PUBLICATIONS_PER_MEO):
+            await client.create_publication_event(meo, {"title": f"bench-{idx}-pe-{x}"})
+        return await client.open(meo)
+
+    semaphore = asyncio.Semaphore(32)
+
+    async def bounded(idx):
+        async with semaphore:
+            return await create_one(idx)
+
+    return await asyncio.gather(*[bounded(x) for x in range(count)])
+
+
+async def hydrate(client: MdbClient, meo):
+    opened = await client.open(meo)
+    children = list(opened.media_objects().children) + list(opened.publications().children)
+    await asyncio.gather(*[client.open(x) for x in children])
+
+
+async def run_scenario(client: MdbClient, scenario: str, concurrency: int, meos: list, operations: int):
+    inputs = [meos[x % len(meos)] for x in range(operations)]
+    if scenario == "resolve":
+        return await measure(scenario, concurrency, inputs, lambda meo: client.resolve(meo["resId"]))
+    if scenario == "open":
+        return await measure(scenario, concurrency, inputs, lambda meo: client.open(meo))
+    if scenario == "hydrate":
+        fan_out = 1 + MEDIA_OBJECTS_PER_MEO + PUBLICATIONS_PER_MEO
+        return await measure(scenario, concurrency, inputs, lambda meo: hydrate(client, meo), fan_out)
+    if scenario == "create":
+        # create is a post followed by a get of the Location
+        return await measure(scenario, concurrency, list(range(operations)),
+                             lambda idx: client.create_master_eo({"title": f"created-{idx}"}), 2)
+    if scenario == "update":
+        return await measure(scenario, concurrency, inputs,
+                             lambda meo: client.update(meo, {"description": "updated"}), 2)
+    raise ValueError(f"Unknown scenario {scenario}")
+
+
+async def run_all(session, api_base, concurrency_levels: list, operations: int, scenarios: list, seed_count: int):
+    results = []
+    client = MdbClient(session, api_base, "benchmark", "benchmark")
+    meos = await seed(client, seed_count)
+    for scenario in scenarios:
+        for concurrency in concurrency_levels:
+            result = await run_scenario(client, scenario, concurrency, meos, operations)
+            print(result)
+            results.append(result.as_dict())
+    return results
+
+
+async def run(latency: float, concurrency_levels: list, operations: int, scenarios: list, seed_count: int,
+              record: str = None, replay: str = None):
+    if replay:
+        replay_session = ReplaySession(replay, timing=TIMING_ORIGINAL if latency else TIMING_FAST)
+        results = await run_all(replay_session, "http://replay", concurrency_levels, operations, scenarios,
+                                seed_count)
+        print(replay_session.report())
+        return results
+    with StandinProcess(latency) as standin:
+        connector = aiohttp.TCPConnector(limit=max(concurrency_levels) * 2)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            if record:
+                async with RecordingSession(session, record) as recorder:
+                    return await run_all(recorder, standin.api_base, concurrency_levels, operations, scenarios,
+                                         seed_count)
+            return await run_all(session, standin.api_base, concurrency_levels, operations, scenarios, seed_count)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.005, help="server latency in seconds per request")
+    parser.add_argument("--concurrency", default="1,8,32", help="comma separated concurrency levels")
+    parser.add_argument("--operations", type=int, default=500, help="operations per scenario and level")
+    parser.add_argument("--seed", type=int, default=50, help="number of master EOs to seed")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--output", default="throughput.json", help="machine readable results")
+    parser.add_argument("--record", help="record the traffic to this cassette")
+    parser.add_argument("--replay", help="replay traffic from this cassette instead of using a server; "
+                                         "--latency 0 replays as fast as possible")
+    args = parser.parse_args()
+    concurrency_levels = [int(x) for x in args.concurrency.split(",")]
+    scenarios = args.scenarios.split(",")
+    results = asyncio.run(run(args.latency, concurrency_levels, args.operations, scenarios, args.seed, args.record,
+                              args.replay))
+    write_results(args.output, "client_throughput", vars(args), results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Differ on large editorial objects with and without copy_on_write: time per diff, and peak traced memory of
+the diff results. Both modes must give the same diff.
+
+    python -m benchmarks.diff_copy --contributors 500 --repeat 10 --output diff_copy.json
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+
+from benchmarks.bench_util import percentile, write_results
+from mdbclient.tools.diff_calculator import Differ
+
+REST_CLIENT = "http://id.nrk.no/2016/mdb/contributor/rest-client/object/"
+
+
+def contributor(index: int, character: str) -> dict:
+    return {"resId": f"{REST_CLIENT}{index}",
+            "contact": {"title": f"contact {index}", "characterName": character, "comment": "comment " * 20,
+                        "capacity": "capacity"},
+            "role": {"resId": f"http://authority.nrk.no/role/{'N58' if index % 10 == 0 else 'V34'}"},
+            "links": [{"rel": "self", "href": f"http://mdb/contributor/{index}"}]}
+
+
+def editorial_objects(size: int) -> (dict, dict):
+    """
+    A pair where a third of the contributors and subjects changed, a third were added and a third removed
+    """
+    existing = {"title": "title", "description": "old",
+                "contributors": [contributor(x, "a") for x in range(size)],
+                "subjects": [{"title": f"subject {x}", "links": []} for x in range(size)]}
+    modified = {"title": "title", "description": "new",
+                "contributors": [contributor(x, "a" if x % 3 else "b") for x in range(size // 3, size + size // 3)],
+                "subjects": [{"title": f"subject {x}", "links": []} for x in range(size // 3, size + size // 3)]}
+    return existing, modified
+
+
+def diff(existing: dict, modified: dict, copy_on_write: bool):
+    changes = Differ(existing, modified, copy_on_write).calculate()
+    changes.remove_autogenerated_resids_in_add_and_modify()
+    changes.eliminate_changed_n58()
+    return changes
+
+
+def measure(copy_on_write: bool, existing: dict, modified: dict, repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        diff(existing, modified, copy_on_write)
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    tracemalloc.start()
+    changes = diff(existing, modified, copy_on_write)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del changes
+    return {"copy_on_write": copy_on_write, "repeat": repeat, "p50_ms": round(percentile(timings, 50) * 1000, 2),
+            "min_ms": round(timings[0] * 1000, 2), "peak_kb": peak // 1024}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--contributors", type=int, default=500, help="contributors and subjects per object")
+    parser.add_argument("--repeat", type=int, default=10, help="diffs per mode")
+    parser.add_argument("--output", default="diff_copy.json", help="machine readable results")
+    args = parser.parse_args()
+    existing, modified = editorial_objects(args.contributors)
+    copied, shared = diff(existing, modified, False), diff(existing, modified, True)
+    for name in ("Added", "Removed", "Modified"):
+        if dict(getattr(copied, name)) != dict(getattr(shared, name)):
+            sys.exit(f"copy_on_write changes the {name} diff")
+    results = []
+    for copy_on_write in (False, True):
+        result = measure(copy_on_write, existing, modified, args.repeat)
+        print(f"copy_on_write={str(copy_on_write):5}  p50 {result['p50_ms']:8.2f} ms  "
+              f"min {result['min_ms']:8.2f} ms  peak {result['peak_kb']:8} kB")
+        results.append(result)
+    write_results(args.output, "diff_copy", vars(args), results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Throughput of diff_many over the number of processes, against a plain Differ loop on one core. Speedup close to
+the process count means the pool scales; the results must equal the plain loop.
+
+    python -m benchmarks.diff_many --pairs 2000 --contributors 60 --processes 1,2,4,8 --output diff_many.json
+"""
+import argparse
+import sys
+import time
+
+from benchmarks.bench_util import write_results
+from benchmarks.diff_copy import editorial_objects
+from mdbclient.tools.diff_calculator import Differ, DifferConfig, diff_many
+
+
+def pairs(count: int, contributors: int):
+    existing, modified = editorial_objects(contributors)
+    for _ in range(count):
+        yield existing, modified
+
+
+def measure(label: str, processes: int, results, count: int, baseline: float = None) -> dict:
+    started = time.perf_counter()
+    done = sum(1 for _ in results)
+    wall = time.perf_counter() - started
+    result = {"mode": label, "processes": processes, "pairs": done, "wall_seconds": round(wall, 3),
+              "pairs_per_second": round(count / wall, 1) if wall else 0.0,
+              "speedup": round(baseline / wall, 2) if baseline and wall else 1.0}
+    print(f"{label:10} processes={processes:<3} {result['pairs_per_second']:9.1f} pairs/s "
+          f"speedup {result['speedup']:5.2f}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pairs", type=int, default=2000, help="EO pairs per run")
+    parser.add_argument("--contributors", type=int, default=60, help="contributors and subjects per object")
+    parser.add_argument("--processes", default="1,2,4,8", help="comma separated process counts")
+    parser.add_argument("--chunksize", type=int, default=16, help="pairs per pool task")
+    parser.add_argument("--output", default="diff_many.json", help="machine readable results")
+    args = parser.parse_args()
+    config = DifferConfig()
+    expected = [dict(config.calculate(*x).Modified) for x in pairs(3, args.contributors)]
+    if [x.modified for x in diff_many(pairs(3, args.contributors), config, processes=2)] != expected:
+        sys.exit("diff_many differs from Differ")
+
+    plain = measure("loop", 1, (Differ(*x).calculate() for x in pairs(args.pairs, args.contributors)),
+                    args.pairs)
+    results = [plain]
+    for processes in [int(x) for x in args.processes.split(",")]:
+        results.append(measure("diff_many", processes,
+                               diff_many(pairs(args.pairs, args.contributors), config, processes, args.chunksize),
+                               args.pairs, plain["wall_seconds"]))
+    write_results(args.output, "diff_many", vars(args), results)
+
+
+if __name__ == "__main__":
+    main()
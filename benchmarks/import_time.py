@@ -0,0 +1,65 @@
+"""
+Import time of the public modules, each measured in a fresh interpreter so nothing is cached between runs.
+The pure data modules must import without the http stack; the benchmark fails when one of them pulls in
+aiohttp or backoff.
+
+    python -m benchmarks.import_time --repeat 10 --output import_time.json
+"""
+import argparse
+import subprocess
+import sys
+
+from benchmarks.bench_util import percentile, write_results
+
+LIGHT_MODULES = ["mdbclient", "mdbclient.model", "mdbclient.mdb_ids", "mdbclient.relations",
+                 "mdbclient.tools.diff_calculator", "mdbclient.tools.diff_functions", "mdbclient.tools.eo_fixup",
+                 "mdbclient.tools.fingerprint", "mdbclient.reference_stubs",
+                 "mdbclient.aggregate_graph"]
+HEAVY_MODULES = ["mdbclient.mdbclient"]
+HTTP_MODULES = ["aiohttp", "backoff"]
+
+_PROBE = """
+import sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(elapsed, ",".join(x for x in {http_modules!r} if x in sys.modules))
+"""
+
+
+def import_once(module: str) -> (float, list):
+    output = subprocess.run([sys.executable, "-c", _PROBE.format(module=module, http_modules=HTTP_MODULES)],
+                            capture_output=True, text=True, check=True).stdout.split()
+    return float(output[0]), output[1].split(",") if len(output) > 1 else []
+
+
+def measure_module(module: str, repeat: int) -> dict:
+    timings = []
+    loaded = []
+    for _ in range(repeat):
+        elapsed, loaded = import_once(module)
+        timings.append(elapsed)
+    timings.sort()
+    return {"module": module, "repeat": repeat, "p50_ms": round(percentile(timings, 50) * 1000, 2),
+            "min_ms": round(timings[0] * 1000, 2), "http_modules": loaded}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=10, help="fresh interpreters per module")
+    parser.add_argument("--output", default="import_time.json", help="machine readable results")
+    args = parser.parse_args()
+    results = []
+    for module in LIGHT_MODULES + HEAVY_MODULES:
+        result = measure_module(module, args.repeat)
+        print(f"{module:40} p50 {result['p50_ms']:8.2f} ms  min {result['min_ms']:8.2f} ms  "
+              f"{','.join(result['http_modules'])}")
+        results.append(result)
+    write_results(args.output, "import_time", vars(args), results)
+    heavy = [x["module"] for x in results if x["module"] in LIGHT_MODULES and x["http_modules"]]
+    if heavy:
+        sys.exit(f"Pure modules import the http stack: {', '.join(heavy)}")
+
+
+if __name__ == "__main__":
+    main()
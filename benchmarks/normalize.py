@@ -0,0 +1,78 @@
+"""
+EoNormalizer against the separate passes it replaces (remove_duplicates, Diff.remove_autogenerated_resids and
+stabilize_order) on large publication events with duplicates and client generated resIds.
+
+    python -m benchmarks.normalize --elements 2000 --repeat 20 --output normalize.json
+"""
+import argparse
+import copy
+import time
+
+from benchmarks.bench_util import percentile, write_results
+from mdbclient.model import stabilize_order
+from mdbclient.tools.diff_calculator import Diff
+from mdbclient.tools.eo_fixup import remove_duplicates
+from mdbclient.tools.eo_normalizer import EoNormalizer
+
+REST_CLIENT = "http://id.nrk.no/2016/mdb/publicationEvent/rest-client/object/"
+
+
+def publication_event(elements: int) -> dict:
+    """
+    A publication event where every element of its collections appears twice
+    """
+    def twice(make):
+        return [make(x % (elements // 2)) for x in range(elements)]
+
+    return {
+        "title": "publication event",
+        "links": [{"rel": "self", "href": "http://mdb/publicationEvent/1"}],
+        "contributors": twice(lambda x: {"resId": f"{REST_CLIENT}c{x}", "links": [],
+                                         "contact": {"resId": f"{REST_CLIENT}k{x}", "title": f"contact {x}"},
+                                         "role": {"resId": "http://authority.nrk.no/role/V34", "title": "role"},
+                                         "characterName": "", "comment": "", "capacity": ""}),
+        "spatials": twice(lambda x: {"resId": f"{REST_CLIENT}s{x}", "name": f"place {x}", "latitude": 59.1,
+                                     "longitude": float(x)}),
+        "subjects": twice(lambda x: {"resId": f"{REST_CLIENT}t{x}", "title": f"subject {x}"}),
+        "references": twice(lambda x: {"type": "http://id.nrk.no/2016/mdb/reference/PSAPI", "reference": str(x)}),
+    }
+
+
+def separate_passes(eo: dict):
+    remove_duplicates(eo)
+    Diff({}, {}).remove_autogenerated_resids(eo)
+    stabilize_order(eo)
+
+
+def single_pass(eo: dict):
+    EoNormalizer().normalize(eo)
+
+
+def measure(label: str, normalize, eo: dict, repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        work = copy.deepcopy(eo)
+        started = time.perf_counter()
+        normalize(work)
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    result = {"mode": label, "repeat": repeat, "p50_ms": round(percentile(timings, 50) * 1000, 2),
+              "min_ms": round(timings[0] * 1000, 2)}
+    print(f"{label:16} p50 {result['p50_ms']:8.2f} ms  min {result['min_ms']:8.2f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--elements", type=int, default=2000, help="elements per collection, half of them duplicates")
+    parser.add_argument("--repeat", type=int, default=20, help="runs per mode")
+    parser.add_argument("--output", default="normalize.json", help="machine readable results")
+    args = parser.parse_args()
+    eo = publication_event(args.elements)
+    results = [measure("separate passes", separate_passes, eo, args.repeat),
+               measure("eo normalizer", single_pass, eo, args.repeat)]
+    write_results(args.output, "normalize", vars(args), results)
+
+
+if __name__ == "__main__":
+    main()
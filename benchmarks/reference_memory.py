@@ -0,0 +1,86 @@
+"""
+Memory per reference of ResourceReference dicts against ReferenceStub objects and a ReferenceTable, for
+references like the ones a catalogue crawler holds on to.
+
+    python -m benchmarks.reference_memory --count 200000 --output reference_memory.json
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+import uuid
+
+from benchmarks.bench_util import write_results
+from mdbclient.model import ResourceReference
+from mdbclient.reference_stubs import ReferenceStub, ReferenceTable
+
+API = "http://mdb.example.com/api/"
+KINDS = [("mediaObject", "MediaObject", "video"), ("publicationEvent", "PublicationEvent", "linear"),
+         ("masterEO", "MasterEO", "episode")]
+
+
+def references(count: int):
+    """
+    Reference dicts as parsed from MDB json, so nothing is shared between them
+    """
+    for x in range(count):
+        kind, type_, sub_type = KINDS[x % len(KINDS)]
+        guid = uuid.uuid4()
+        yield {"resId": f"http://id.nrk.no/2016/mdb/{kind}/{guid}",
+               "type": "http://id.nrk.no/2016/mdb/types/" + type_, "subType": sub_type,
+               "links": [{"rel": "self", "href": f"{API}{kind}/{guid}"}]}
+
+
+def as_dicts(count: int):
+    return [ResourceReference(x) for x in references(count)]
+
+
+def as_stubs(count: int):
+    return [ReferenceStub.of(x) for x in references(count)]
+
+
+def as_table(count: int):
+    table = ReferenceTable()
+    table.extend(references(count))
+    return table
+
+
+def as_indexed_table(count: int):
+    table = ReferenceTable(indexed=True)
+    table.extend(references(count))
+    return table
+
+
+def measure(label: str, build, count: int) -> dict:
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    held = build(count)
+    elapsed = time.perf_counter() - started
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del held
+    result = {"mode": label, "count": count, "bytes_per_reference": round(size / count, 1),
+              "build_s": round(elapsed, 3)}
+    print(f"{label:16} {result['bytes_per_reference']:8.1f} bytes/reference  build {result['build_s']:.3f} s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=200000, help="references to hold")
+    parser.add_argument("--output", default="reference_memory.json", help="machine readable results")
+    args = parser.parse_args()
+    results = [measure("dicts", as_dicts, args.count),
+               measure("stubs", as_stubs, args.count),
+               measure("table", as_table, args.count),
+               measure("indexed table", as_indexed_table, args.count)]
+    baseline = results[0]["bytes_per_reference"]
+    for result in results:
+        result["ratio"] = round(baseline / result["bytes_per_reference"], 1)
+        print(f"{result['mode']:16} {result['ratio']:6.1f}x smaller than dicts")
+    write_results(args.output, "reference_memory", vars(args), results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+import importlib
+
+# Attributes are imported on first use, so "import mdbclient" and the pure data modules (model, mdb_ids,
+# relations, tools) load without aiohttp and backoff
+_LAZY_ATTRIBUTES = {
+    "MdbClient": "mdbclient.mdbclient",
+    "MdbJsonApi": "mdbclient.mdbclient",
+    "MdbEnv": "mdbclient.mdbclient",
+    "Http404": "mdbclient.mdbclient",
+    "HttpReqException": "mdbclient.mdbclient",
+    "BlockingMdbClient": "mdbclient.blocking_client",
+    "create_response": "mdbclient.model",
+    "MasterEO": "mdbclient.model",
+    "MediaObject": "mdbclient.model",
+    "MediaResource": "mdbclient.model",
+    "Essence": "mdbclient.model",
+    "PublicationEvent": "mdbclient.model",
+    "PublicationMediaObject": "mdbclient.model",
+    "VersionGroup": "mdbclient.model",
+    "Timeline": "mdbclient.model",
+}
+
+
+def __getattr__(name):
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_ATTRIBUTES))
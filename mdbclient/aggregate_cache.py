@@ -0,0 +1,165 @@
+import collections
+import json
+import sqlite3
+import time
+from typing import Optional
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS aggregates (self_link TEXT PRIMARY KEY, res_id TEXT, body TEXT NOT NULL, "
+    "etag TEXT, last_updated TEXT, fetched_at REAL NOT NULL, size INTEGER NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS aggregates_res_id ON aggregates (res_id)",
+    "CREATE INDEX IF NOT EXISTS aggregates_fetched_at ON aggregates (fetched_at)",
+]
+
+
+def self_link_of(body: dict) -> Optional[str]:
+    for link in body.get("links", []) if isinstance(body, dict) else []:
+        if link.get("rel") == "self":
+            return link.get("href")
+
+
+class CachedAggregate:
+    def __init__(self, self_link, res_id, body: str, etag, last_updated, fetched_at):
+        self.self_link = self_link
+        self.res_id = res_id
+        self.body = body
+        self.etag = etag
+        self.last_updated = last_updated
+        self.fetched_at = fetched_at
+
+    def json(self) -> dict:
+        return json.loads(self.body)
+
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+
+class PersistentAggregateCache:
+    """
+    An on-disk cache of aggregate json that survives process restarts, stored in sqlite at path.
+
+    Entries are keyed on self link and resId and hold the raw json with lastUpdated, the etag (if the server
+    sent one) and the fetch time. Entries younger than ttl seconds are used as they are, older ones are
+    revalidated with a conditional get when they have an etag and fetched again otherwise.
+
+    The total size of the json is kept below max_bytes by dropping the oldest fetched entries. The database
+    runs in WAL mode, so several processes can read it while one of them writes.
+
+    A read that overlaps a write can return the state from before the write after the write has invalidated
+    the entry. Readers take a generation() before fetching and pass it to put, which drops the data when the
+    aggregate was invalidated in between. Generations are per process.
+
+        client.aggregate_cache = PersistentAggregateCache("/var/cache/mdb/aggregates.sqlite")
+    """
+
+    def __init__(self, path: str, ttl: float = 24 * 3600, max_bytes: int = 1024 * 1024 * 1024,
+                 evict_interval: int = 1000, max_invalidations: int = 100000):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.evict_interval = evict_interval
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self._puts = 0
+        self._generation = 0
+        # generation of the last invalidation per resId and self link, for the most recent max_invalidations
+        self._invalidated_at = collections.OrderedDict()
+        self._forgotten_before = 0
+        self.max_invalidations = max_invalidations
+        self._db = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        for statement in SCHEMA:
+            self._db.execute(statement)
+
+    def _select(self, where: str, key: str) -> Optional[CachedAggregate]:
+        row = self._db.execute("SELECT self_link, res_id, body, etag, last_updated, fetched_at FROM aggregates "
+                               f"WHERE {where} = ? ORDER BY fetched_at DESC LIMIT 1", (key,)).fetchone()
+        return CachedAggregate(*row) if row else None
+
+    def by_link(self, self_link: str) -> Optional[CachedAggregate]:
+        return self._select("self_link", self_link)
+
+    def by_res_id(self, res_id: str) -> Optional[CachedAggregate]:
+        return self._select("res_id", res_id)
+
+    def is_fresh(self, entry: CachedAggregate) -> bool:
+        return entry.age() < self.ttl
+
+    def generation(self) -> int:
+        """
+        Token for data fetched from now on, see put
+        """
+        return self._generation
+
+    def _invalidated_since(self, generation: int, *keys) -> bool:
+        if generation < self._forgotten_before:
+            return True
+        return any(self._invalidated_at.get(key, 0) > generation for key in keys if key)
+
+    def put(self, body: dict, self_link: str = None, etag: str = None, generation: int = None):
+        """
+        Stores body, unless generation is given and the aggregate was invalidated after it was taken
+        """
+        self_link = self_link_of(body) or self_link
+        if not self_link:
+            return
+        if generation is not None and self._invalidated_since(generation, self_link, body.get("resId")):
+            return
+        text = json.dumps(body)
+        self._db.execute("INSERT OR REPLACE INTO aggregates VALUES (?, ?, ?, ?, ?, ?, ?)",
+                         (self_link, body.get("resId"), text, etag, body.get("lastUpdated"), time.time(), len(text)))
+        self._puts += 1
+        if self._puts % self.evict_interval == 0:
+            self.evict()
+
+    def touch(self, entry: CachedAggregate):
+        """
+        Marks a revalidated entry as freshly fetched
+        """
+        entry.fetched_at = time.time()
+        self._db.execute("UPDATE aggregates SET fetched_at = ? WHERE self_link = ?", (entry.fetched_at,
+                                                                                       entry.self_link))
+
+    def invalidate(self, res_id: str = None, self_link: str = None):
+        self._generation += 1
+        for key in (res_id, self_link):
+            if key:
+                self._invalidated_at[key] = self._generation
+                self._invalidated_at.move_to_end(key)
+        while len(self._invalidated_at) > self.max_invalidations:
+            _, generation = self._invalidated_at.popitem(last=False)
+            self._forgotten_before = generation
+        if res_id:
+            self._db.execute("DELETE FROM aggregates WHERE res_id = ?", (res_id,))
+        if self_link:
+            self._db.execute("DELETE FROM aggregates WHERE self_link = ?", (self_link,))
+
+    def size(self) -> int:
+        return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM aggregates").fetchone()[0]
+
+    def __len__(self):
+        return self._db.execute("SELECT COUNT(*) FROM aggregates").fetchone()[0]
+
+    def evict(self):
+        """
+        Drops the oldest fetched entries until the cache is below 90% of max_bytes
+        """
+        if self.size() <= self.max_bytes:
+            return
+        kept = 0
+        cutoff = None
+        for fetched_at, size in self._db.execute("SELECT fetched_at, size FROM aggregates ORDER BY fetched_at DESC"):
+            kept += size
+            if kept > self.max_bytes * 0.9:
+                cutoff = fetched_at
+                break
+        if cutoff is not None:
+            self._db.execute("DELETE FROM aggregates WHERE fetched_at <= ?", (cutoff,))
+
+    def close(self):
+        self._db.close()
+
+    def __str__(self):
+        return f"hits={self.hits} misses={self.misses} revalidated={self.revalidated}"
@@ -0,0 +1,194 @@
+import collections
+import copy
+from typing import Dict, List, Optional, Set
+
+from mdbclient.model import create_response
+
+# Reference fields that link aggregates to each other, per field the kind of aggregate they point to
+EDGE_FIELDS = {
+    "mediaObjects": "MediaObject",
+    "publications": "PublicationEvent",
+    "timelines": "Timeline",
+    "versionGroup": "VersionGroup",
+    "metadataMeo": "MasterEditorialObject",
+    "masterEO": "MasterEditorialObject",
+    "resources": "MediaResource",
+    "publishedVersions": "PublicationMediaObject",
+    "publishedVersionOf": "MediaObject",
+    "playouts": "Essence",
+    "essences": "Essence",
+    "mediaObject": "MediaObject",
+    "composedOf": "MediaResource",
+    "playoutOf": "PublicationMediaObject",
+    "pmos": "PublicationMediaObject",
+}
+
+# Fields pointing from an aggregate to the one it belongs to
+PARENT_FIELDS = ("masterEO", "mediaObject", "publishedVersionOf", "composedOf", "playoutOf")
+
+# Fields listing the aggregates that belong to an aggregate
+CHILD_FIELDS = ("mediaObjects", "timelines", "resources", "publishedVersions", "playouts", "essences")
+
+
+def _targets(value) -> List[str]:
+    values = value if isinstance(value, list) else [value]
+    return [x["resId"] for x in values if isinstance(x, dict) and x.get("resId")]
+
+
+def _kind(type_: Optional[str]) -> Optional[str]:
+    return type_.rsplit("/", 1)[-1] if type_ else None
+
+
+class AggregateGraph:
+    """
+    Keeps fetched aggregates by resId together with the references between them, so relations can be followed
+    in both directions without going back to MDB.
+
+        graph = AggregateGraph()
+        graph.add(await client.open_resource(essence_ref))
+        ...
+        meo = graph.owner(essence_res_id, "MasterEditorialObject")
+        pmos = graph.targets(media_object_res_id, "publishedVersions")
+
+    Forward edges come from the reference fields in EDGE_FIELDS of every added aggregate, and a reverse index
+    answers which aggregates refer to a resId. Edges are known as soon as one end is added: a MasterEO that
+    lists a media object is enough to find the owner of that media object. Adding a newer version of an
+    aggregate replaces its edges.
+
+    At most max_objects aggregates are kept, least recently used are evicted first together with the edges
+    they contributed. Aggregates are copied on the way in and out.
+    """
+
+    def __init__(self, max_objects: int = 100000):
+        self.max_objects = max_objects
+        self._objects = collections.OrderedDict()
+        self._forward: Dict[str, Dict[str, List[str]]] = {}
+        self._reverse: Dict[str, Dict[str, Set[str]]] = {}
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._objects)
+
+    def __contains__(self, res_id) -> bool:
+        return res_id in self._objects
+
+    def add(self, aggregate: dict) -> str:
+        """
+        Adds or replaces aggregate, and returns its resId
+        """
+        res_id = aggregate.get("resId") if isinstance(aggregate, dict) else None
+        if not res_id:
+            raise ValueError(f"Can only add aggregates with a resId, not {aggregate!r:.200}")
+        self.remove(res_id)
+        self._objects[res_id] = copy.deepcopy(dict(aggregate))
+        edges = {}
+        for field in EDGE_FIELDS:
+            targets = _targets(aggregate.get(field))
+            if targets:
+                edges[field] = targets
+                for target in targets:
+                    self._reverse.setdefault(target, {}).setdefault(field, set()).add(res_id)
+        if edges:
+            self._forward[res_id] = edges
+        while len(self._objects) > self.max_objects:
+            self.remove(next(iter(self._objects)))
+            self.evictions += 1
+        return res_id
+
+    def add_all(self, aggregates):
+        for aggregate in aggregates:
+            self.add(aggregate)
+
+    def remove(self, res_id: str):
+        """
+        Drops the aggregate with res_id and the edges it contributed; edges to it from other aggregates are kept
+        """
+        if self._objects.pop(res_id, None) is None:
+            return
+        for field, targets in self._forward.pop(res_id, {}).items():
+            for target in targets:
+                by_field = self._reverse.get(target)
+                if by_field is None or field not in by_field:
+                    continue
+                by_field[field].discard(res_id)
+                if not by_field[field]:
+                    del by_field[field]
+                if not by_field:
+                    del self._reverse[target]
+
+    def get(self, res_id: str):
+        """
+        A copy of the typed aggregate with res_id, or None when it is not held
+        """
+        aggregate = self._objects.get(res_id)
+        if aggregate is None:
+            return None
+        self._objects.move_to_end(res_id)
+        return create_response(copy.deepcopy(aggregate))
+
+    def targets(self, res_id: str, field: str = None) -> List[str]:
+        """
+        resIds the aggregate with res_id refers to, in field or in any of the EDGE_FIELDS
+        """
+        edges = self._forward.get(res_id, {})
+        if field is not None:
+            return list(edges.get(field, []))
+        return [x for targets in edges.values() for x in targets]
+
+    def sources(self, res_id: str, field: str = None) -> List[str]:
+        """
+        resIds of the aggregates referring to res_id, in field or in any of the EDGE_FIELDS
+        """
+        by_field = self._reverse.get(res_id, {})
+        if field is not None:
+            return sorted(by_field.get(field, ()))
+        return sorted({x for sources in by_field.values() for x in sources})
+
+    def parents(self, res_id: str) -> List[str]:
+        """
+        resIds of the aggregates res_id belongs to, from its own parent references and from the child
+        collections of others
+        """
+        found = [x for field in PARENT_FIELDS for x in self.targets(res_id, field)]
+        found += [x for field in CHILD_FIELDS for x in self.sources(res_id, field)]
+        return list(dict.fromkeys(found))
+
+    def kind_of(self, res_id: str) -> Optional[str]:
+        """
+        The last segment of the type of res_id, from the aggregate itself or from a field referring to it
+        """
+        aggregate = self._objects.get(res_id)
+        if aggregate is not None and aggregate.get("type"):
+            return _kind(aggregate["type"])
+        for field in self._reverse.get(res_id, {}):
+            return EDGE_FIELDS[field]
+        return None
+
+    def owner(self, res_id: str, kind: str) -> Optional[str]:
+        """
+        resId of the nearest aggregate of the given kind (e.g. "MasterEditorialObject" or "MediaObject") that
+        res_id belongs to, walking up parent references, or None when the known edges do not lead there
+        """
+        visited = {res_id}
+        frontier = [res_id]
+        while frontier:
+            upward = []
+            for current in frontier:
+                for parent in self.parents(current):
+                    if parent in visited:
+                        continue
+                    if self.kind_of(parent) == kind:
+                        return parent
+                    visited.add(parent)
+                    upward.append(parent)
+            frontier = upward
+        return None
+
+    def clear(self):
+        self._objects.clear()
+        self._forward.clear()
+        self._reverse.clear()
+
+    def __str__(self):
+        edges = sum(len(x) for by_field in self._forward.values() for x in by_field.values())
+        return f"objects={len(self._objects)} edges={edges} evictions={self.evictions}"
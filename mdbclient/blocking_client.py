@@ -0,0 +1,94 @@
+import asyncio
+import concurrent.futures
+import inspect
+import threading
+from typing import Union
+
+import aiohttp
+
+from mdbclient.mdbclient import MdbClient, MdbEnv
+
+
+class BlockingMdbClient:
+    """
+    A thread safe, blocking facade over MdbClient for synchronous code. One event loop, ClientSession and
+    MdbClient live in a background thread for the lifetime of the facade, so every thread calling it shares
+    the same connection pool.
+
+    Coroutine methods of MdbClient are available with the same arguments and block until the result is
+    available or timeout seconds have passed, which raises TimeoutError and cancels the call:
+
+        with BlockingMdbClient(MdbEnv.STAGE, "my-user", "my-correlation") as mdb:
+            meo = mdb.resolve(res_id)
+            mdb.call("update", meo, {"title": "new"}, timeout=5)
+    """
+
+    def __init__(self, api_base: Union[MdbEnv, str], user_id: str, correlation_id: str, source_system: str = None,
+                 batch_id: str = "default-batch-id", force_host: bool = None, force_scheme: bool = None,
+                 timeout: float = 120, connection_limit: int = 100):
+        self.timeout = timeout
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="mdbclient-loop", daemon=True)
+        self._thread.start()
+        self.session, self.client = self._submit(
+            self.__open(api_base, user_id, correlation_id, source_system, batch_id, force_host, force_scheme,
+                        connection_limit)).result()
+        self._closed = False
+
+    @staticmethod
+    async def __open(api_base, user_id, correlation_id, source_system, batch_id, force_host, force_scheme,
+                     connection_limit):
+        session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=connection_limit))
+        return session, MdbClient(session, api_base, user_id, correlation_id, source_system, batch_id, force_host,
+                                  force_scheme)
+
+    def _submit(self, coroutine) -> concurrent.futures.Future:
+        if threading.current_thread() is self._thread:
+            coroutine.close()
+            raise RuntimeError("BlockingMdbClient can not be called from its own event loop")
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+
+    def run(self, coroutine, timeout: float = None):
+        """
+        Runs any coroutine on the background loop, for instance one using self.client, and returns its result
+        """
+        if self._closed:
+            coroutine.close()
+            raise RuntimeError("BlockingMdbClient is closed")
+        future = self._submit(coroutine)
+        try:
+            return future.result(timeout if timeout is not None else self.timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            # only the same class as the builtin from python 3.11
+            raise TimeoutError(f"No result within {timeout if timeout is not None else self.timeout}s") from None
+
+    def call(self, method_name: str, *args, timeout: float = None, **kwargs):
+        return self.run(getattr(self.client, method_name)(*args, **kwargs), timeout)
+
+    def __getattr__(self, name):
+        attribute = getattr(self.__dict__.get("client"), name)
+        if not inspect.iscoroutinefunction(attribute):
+            return attribute
+
+        def blocking(*args, **kwargs):
+            return self.run(attribute(*args, **kwargs))
+
+        blocking.__name__ = name
+        blocking.__doc__ = attribute.__doc__
+        return blocking
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._submit(self.session.close()).result(self.timeout)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
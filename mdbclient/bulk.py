@@ -0,0 +1,89 @@
+import asyncio
+import time
+from typing import Union, Iterable, AsyncIterable, Callable, Awaitable, Optional
+
+
+class BulkStats:
+    """
+    Counters and throughput for a bulk job. total is the number of items expected, when known, and is used
+    for the eta.
+    """
+
+    def __init__(self, total: int = None):
+        self.total = total
+        self.done = 0
+        self.skipped = 0
+        self.missing = 0
+        self.failed = 0
+        self.bytes = 0
+        self.started = time.monotonic()
+        self.finished: Optional[float] = None
+
+    def finish(self):
+        self.finished = time.monotonic()
+
+    def processed(self):
+        return self.done + self.skipped + self.missing + self.failed
+
+    def elapsed(self) -> float:
+        return (self.finished or time.monotonic()) - self.started
+
+    def rate(self) -> float:
+        elapsed = self.elapsed()
+        return (self.done + self.missing + self.failed) / elapsed if elapsed else 0.0
+
+    def eta(self) -> Optional[float]:
+        """
+        Seconds until all items are processed at the current rate, or None if unknown
+        """
+        rate = self.rate()
+        if self.total is None or not rate:
+            return None
+        return max(self.total - self.processed(), 0) / rate
+
+    def __str__(self):
+        res = f"done={self.done} skipped={self.skipped} missing={self.missing} failed={self.failed} " \
+              f"rate={self.rate():.1f}/s"
+        if self.bytes:
+            res += f" {self.bytes / self.elapsed() / 1024:.1f}kB/s"
+        eta = self.eta()
+        if eta is not None:
+            res += f" eta={eta:.0f}s"
+        return res
+
+
+def known_length(items) -> Optional[int]:
+    return len(items) if hasattr(items, "__len__") else None
+
+
+async def run_bounded(items: Union[Iterable, AsyncIterable], concurrency: int, func: Callable[[object], Awaitable]):
+    """
+    Calls func for every item with at most concurrency calls in flight. Items are pulled from the iterable
+    as workers become free, so large (or endless) inputs are never materialised.
+    """
+    if hasattr(items, "__aiter__"):
+        iterator = items.__aiter__()
+
+        async def next_item():
+            return await iterator.__anext__()
+    else:
+        sync_iterator = iter(items)
+
+        async def next_item():
+            try:
+                return next(sync_iterator)
+            except StopIteration:
+                raise StopAsyncIteration
+
+    lock = asyncio.Lock()
+
+    async def worker():
+        while True:
+            async with lock:
+                try:
+                    item = await next_item()
+                except StopAsyncIteration:
+                    return
+            await func(item)
+
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
@@ -0,0 +1,155 @@
+import asyncio
+import gzip
+import os
+import tempfile
+from typing import Union, Iterable, AsyncIterable, Callable, Optional
+
+from mdbclient.bulk import BulkStats, run_bounded, known_length
+from mdbclient.checkpoint import Checkpoint
+from mdbclient.mdb_ids import lenient_parse_res_id
+from mdbclient.mdbclient import MdbClient, Http404
+
+EXPORT_MASTER_EO = "masterEOs"
+EXPORT_PUBLICATION_EVENT = "publicationEvents"
+
+# Spooled exports larger than this go to a temporary file instead of memory
+SPOOL_MAX_MEMORY = 1024 * 1024
+
+
+def _single_line(chunk: bytes) -> bytes:
+    # Raw newlines can only be insignificant whitespace in valid json, strings have them escaped
+    return chunk.replace(b"\r", b" ").replace(b"\n", b" ")
+
+
+class NdjsonGzipSink:
+    """
+    Writes every aggregate as one line of gzip compressed ndjson. Each run writes a new numbered part file
+    (prefix.0000.ndjson.gz, prefix.0001.ndjson.gz, ...), so a crashed run never leaves earlier parts truncated.
+
+    Concurrent exports are spooled (in memory up to SPOOL_MAX_MEMORY, then on disk) and appended to the part
+    one at a time, so lines never interleave.
+    """
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self.path = self.__next_part_path()
+        self._file = gzip.open(self.path, "wb")
+        self._lock = asyncio.Lock()
+
+    def __next_part_path(self):
+        part = 0
+        while os.path.exists(f"{self.prefix}.{part:04d}.ndjson.gz"):
+            part += 1
+        return f"{self.prefix}.{part:04d}.ndjson.gz"
+
+    async def write(self, aggregate_id: str, chunks: AsyncIterable[bytes]) -> int:
+        size = 0
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY) as spool:
+            async for chunk in chunks:
+                spool.write(_single_line(chunk))
+                size += len(chunk)
+            spool.seek(0)
+            async with self._lock:
+                while block := spool.read(64 * 1024):
+                    self._file.write(block)
+                self._file.write(b"\n")
+                self._file.flush()
+        return size
+
+    def close(self):
+        self._file.close()
+
+
+class PerAggregateSink:
+    """
+    Writes each aggregate to its own gzip compressed file, directory/<id>.json.gz. Files are written under a
+    temporary name and renamed when complete.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    async def write(self, aggregate_id: str, chunks: AsyncIterable[bytes]) -> int:
+        path = os.path.join(self.directory, f"{aggregate_id}.json.gz")
+        partial = path + ".partial"
+        size = 0
+        try:
+            with gzip.open(partial, "wb") as f:
+                async for chunk in chunks:
+                    f.write(chunk)
+                    size += len(chunk)
+        except BaseException:
+            os.remove(partial)
+            raise
+        os.replace(partial, path)
+        return size
+
+    def close(self):
+        pass
+
+
+class BulkExporter:
+    """
+    Exports many MasterEOs or PublicationEvents, streaming each export body straight into a sink.
+
+    Ids may be guids or resIds. With a checkpoint, completed ids are recorded and skipped when the export is
+    run again, so a crashed run can be resumed. Missing aggregates are counted but not checkpointed.
+
+        exporter = BulkExporter(client, NdjsonGzipSink("/data/meos"), Checkpoint("/data/meos.done"))
+        stats = await exporter.run(ids)
+    """
+
+    def __init__(self, client: MdbClient, sink, checkpoint: Checkpoint = None, kind: str = EXPORT_MASTER_EO,
+                 concurrency: int = 8, chunk_size: int = 64 * 1024,
+                 progress: Callable[[BulkStats], None] = None, progress_interval: int = 1000):
+        if kind not in (EXPORT_MASTER_EO, EXPORT_PUBLICATION_EVENT):
+            raise ValueError(f"Unknown export kind {kind}")
+        self.client = client
+        self.sink = sink
+        self.checkpoint = checkpoint
+        self.kind = kind
+        self.concurrency = concurrency
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.progress_interval = progress_interval
+        self.failures = {}
+
+    def _stream(self, aggregate_id):
+        if self.kind == EXPORT_MASTER_EO:
+            return self.client.stream_export_master_eo(aggregate_id, chunk_size=self.chunk_size)
+        return self.client.stream_export_publication_event(aggregate_id, chunk_size=self.chunk_size)
+
+    @staticmethod
+    def aggregate_id(id_or_res_id: str) -> str:
+        return lenient_parse_res_id(id_or_res_id).id() if "/" in id_or_res_id else id_or_res_id
+
+    async def _export_one(self, stats: BulkStats, id_or_res_id: str):
+        aggregate_id = id_or_res_id
+        try:
+            aggregate_id = self.aggregate_id(id_or_res_id)
+            if self.checkpoint is not None and self.checkpoint.is_done(aggregate_id):
+                stats.skipped += 1
+                return
+            stats.bytes += await self.sink.write(aggregate_id, self._stream(aggregate_id))
+            stats.done += 1
+            if self.checkpoint is not None:
+                self.checkpoint.mark_done(aggregate_id)
+        except Http404:
+            stats.missing += 1
+        except Exception as e:
+            stats.failed += 1
+            self.failures[aggregate_id] = e
+        if self.progress and stats.processed() % self.progress_interval == 0:
+            self.progress(stats)
+
+    async def run(self, ids: Union[Iterable[str], AsyncIterable[str]], total: Optional[int] = None) -> BulkStats:
+        stats = BulkStats(total if total is not None else known_length(ids))
+        try:
+            await run_bounded(ids, self.concurrency, lambda x: self._export_one(stats, x))
+        finally:
+            stats.finish()
+            self.sink.close()
+            if self.checkpoint is not None:
+                self.checkpoint.close()
+        return stats
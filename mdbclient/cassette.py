@@ -0,0 +1,271 @@
+import asyncio
+import base64
+import collections
+import gzip
+import hashlib
+import json
+import time
+import urllib.parse
+from abc import ABC, abstractmethod
+from typing import Optional, List
+
+from multidict import CIMultiDict, CIMultiDictProxy
+
+REQUEST_HEADERS = ("content-type", "accept", "if-none-match", "if-modified-since")
+RESPONSE_HEADERS = ("content-type", "location", "etag", "last-modified")
+
+TIMING_FAST = "fast"
+TIMING_ORIGINAL = "original"
+
+
+class UnmatchedRequest(Exception):
+    def __init__(self, method, uri, key):
+        self.method = method
+        self.uri = uri
+        self.key = key
+        self.message = f"No recorded exchange for {method} {uri}"
+
+    def __str__(self):
+        return self.message
+
+
+def _encode_body(body: bytes) -> dict:
+    try:
+        return {"text": body.decode("utf-8")}
+    except UnicodeDecodeError:
+        return {"base64": base64.b64encode(body).decode("ascii")}
+
+
+def _decode_body(node: dict) -> bytes:
+    if "base64" in node:
+        return base64.b64decode(node["base64"])
+    return node.get("text", "").encode("utf-8")
+
+
+def _request_body(json_payload=None, data=None) -> Optional[str]:
+    if json_payload is not None:
+        return json.dumps(json_payload, sort_keys=True)
+    if data is not None:
+        return json.dumps(dict(data), sort_keys=True) if isinstance(data, dict) else str(data)
+    return None
+
+
+def request_key(method: str, uri: str, params: dict = None, body: str = None, match_host: bool = False,
+                match_body: bool = True) -> str:
+    """
+    Normalised key for a request: method, path (and host if match_host), sorted query parameters
+    and a hash of the canonical body.
+    """
+    parsed = urllib.parse.urlsplit(uri)
+    query = urllib.parse.parse_qsl(parsed.query, keep_blank_values=True)
+    if params:
+        query.extend((str(k), str(v)) for k, v in params.items())
+    location = (parsed.netloc.lower() if match_host else "") + parsed.path
+    key = f"{method.upper()} {location}?{urllib.parse.urlencode(sorted(query))}"
+    if match_body and body:
+        key += " #" + hashlib.sha1(body.encode("utf-8")).hexdigest()
+    return key
+
+
+class _CassetteStream:
+    def __init__(self, body: bytes):
+        self._body = body
+
+    async def read(self, n=-1) -> bytes:
+        return self._body if n < 0 else self._body[:n]
+
+    async def iter_chunked(self, n: int):
+        for idx in range(0, len(self._body), n):
+            yield self._body[idx:idx + n]
+
+    def __str__(self):
+        return self._body[:200].decode("utf-8", "replace")
+
+
+class CassetteResponse:
+    """
+    Stands in for aiohttp's ClientResponse with the parts RestApiUtil uses
+    """
+
+    def __init__(self, url: str, status: int, headers: dict, body: bytes):
+        self.url = url
+        self.status = status
+        self.headers = CIMultiDictProxy(CIMultiDict(headers))
+        self._body = body
+        self.content = _CassetteStream(body)
+
+    @property
+    def content_type(self):
+        return self.headers.get("content-type", "application/octet-stream").split(";")[0].strip()
+
+    @property
+    def content_length(self):
+        return len(self._body)
+
+    async def read(self) -> bytes:
+        return self._body
+
+    async def text(self, encoding="utf-8") -> str:
+        return self._body.decode(encoding)
+
+    async def json(self, **kwargs):
+        return json.loads(self._body) if self._body else None
+
+    def release(self):
+        pass
+
+
+class _RequestContext:
+    def __init__(self, coro):
+        self._coro = coro
+        self._response = None
+
+    async def __aenter__(self):
+        self._response = await self._coro
+        return self._response
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+class _SessionMethods(ABC):
+    def get(self, uri, params=None, headers=None, allow_redirects=True):
+        return _RequestContext(self._request("GET", uri, params, headers, None, None, allow_redirects))
+
+    def post(self, uri, json=None, data=None, params=None, headers=None):
+        return _RequestContext(self._request("POST", uri, params, headers, json, data))
+
+    def put(self, uri, json=None, data=None, params=None, headers=None):
+        return _RequestContext(self._request("PUT", uri, params, headers, json, data))
+
+    def delete(self, uri, params=None, headers=None):
+        return _RequestContext(self._request("DELETE", uri, params, headers, None, None))
+
+    @abstractmethod
+    async def _request(self, method, uri, params, headers, json_payload, data, allow_redirects=True):
+        pass
+
+
+class RecordingSession(_SessionMethods):
+    """
+    Wraps a ClientSession, recording every exchange. Pass it to MdbClient in place of the session, and call
+    save() (or use it as an async context manager) to write the gzip compressed cassette.
+    """
+
+    def __init__(self, session, path: str, request_headers=REQUEST_HEADERS, response_headers=RESPONSE_HEADERS):
+        self.session = session
+        self.path = path
+        self.request_headers = [x.lower() for x in request_headers]
+        self.response_headers = [x.lower() for x in response_headers]
+        self.exchanges = []
+        self._started = time.monotonic()
+
+    async def _request(self, method, uri, params, headers, json_payload, data, allow_redirects=True):
+        started = time.monotonic()
+        kwargs = {"params": params, "headers": headers}
+        if json_payload is not None:
+            kwargs["json"] = json_payload
+        if data is not None:
+            kwargs["data"] = data
+        if method == "GET":
+            kwargs["allow_redirects"] = allow_redirects
+        async with self.session.request(method, uri, **kwargs) as response:
+            body = await response.read()
+            status = response.status
+            response_headers = {k: v for k, v in response.headers.items() if k.lower() in self.response_headers}
+        self.exchanges.append({
+            "offset": started - self._started,
+            "duration": time.monotonic() - started,
+            "method": method,
+            "uri": uri,
+            "params": {str(k): str(v) for k, v in params.items()} if params else None,
+            "headers": {k: v for k, v in (headers or {}).items() if k.lower() in self.request_headers},
+            "body": _request_body(json_payload, data),
+            "status": status,
+            "response_headers": response_headers,
+            "response_body": _encode_body(body),
+        })
+        return CassetteResponse(uri, status, response_headers, body)
+
+    def save(self):
+        with gzip.open(self.path, "wt", encoding="utf-8") as f:
+            for exchange in self.exchanges:
+                f.write(json.dumps(exchange) + "\n")
+
+    async def close(self):
+        self.save()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.save()
+
+
+def load_cassette(path: str) -> List[dict]:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class ReplaySession(_SessionMethods):
+    """
+    Answers requests from a cassette instead of the network. Requests are matched on request_key;
+    identical requests are answered in recorded order, and the last answer is repeated when the recording
+    runs out. Requests without any recording raise UnmatchedRequest and are listed in report().
+
+    With timing=TIMING_ORIGINAL each answer is delayed by the recorded duration (scaled by speed),
+    with TIMING_FAST answers are immediate.
+    """
+
+    def __init__(self, path: str, timing: str = TIMING_FAST, speed: float = 1.0, match_host: bool = False,
+                 match_body: bool = True):
+        if timing not in (TIMING_FAST, TIMING_ORIGINAL):
+            raise ValueError(f"Unknown timing {timing}")
+        self.timing = timing
+        self.speed = speed
+        self.match_host = match_host
+        self.match_body = match_body
+        self.exchanges = load_cassette(path)
+        self._by_key = collections.defaultdict(collections.deque)
+        self._last = {}
+        for exchange in self.exchanges:
+            key = request_key(exchange["method"], exchange["uri"], exchange.get("params"), exchange.get("body"),
+                              match_host, match_body)
+            self._by_key[key].append(exchange)
+        self.matched = 0
+        self.repeated = 0
+        self.unmatched = []
+
+    async def _request(self, method, uri, params, headers, json_payload, data, allow_redirects=True):
+        key = request_key(method, uri, params, _request_body(json_payload, data), self.match_host, self.match_body)
+        pending = self._by_key.get(key)
+        if pending:
+            exchange = pending.popleft()
+            self._last[key] = exchange
+            self.matched += 1
+        elif key in self._last:
+            exchange = self._last[key]
+            self.repeated += 1
+        else:
+            self.unmatched.append(f"{method} {uri}")
+            raise UnmatchedRequest(method, uri, key)
+        if self.timing == TIMING_ORIGINAL and exchange.get("duration"):
+            await asyncio.sleep(exchange["duration"] / self.speed)
+        return CassetteResponse(uri, exchange["status"], exchange["response_headers"],
+                                _decode_body(exchange["response_body"]))
+
+    def unused(self) -> int:
+        return sum(len(x) for x in self._by_key.values())
+
+    def report(self) -> dict:
+        return {"matched": self.matched, "repeated": self.repeated, "unmatched": list(self.unmatched),
+                "unused": self.unused()}
+
+    async def close(self):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        pass
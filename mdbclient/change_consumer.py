@@ -0,0 +1,286 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Optional, Callable, Awaitable, List, Dict
+
+from mdbclient.mdb_ids import from_aggregate_type
+from mdbclient.mdbclient import MdbClient, AggregateGoneException
+
+
+_log = logging.getLogger(__name__)
+
+
+class ChangeMessage:
+    """
+    A single message from the mdb change exchange. The body is the decoded json payload,
+    the delivery tag is whatever the source needs to ack/nack the message.
+    """
+
+    def __init__(self, body: dict, delivery_tag, routing_key: str = None):
+        self.body = body
+        self.delivery_tag = delivery_tag
+        self.routing_key = routing_key
+
+    @property
+    def res_id(self) -> Optional[str]:
+        res_id = self.body.get("resId")
+        if res_id:
+            return res_id
+        parsed = from_aggregate_type(self.body.get("type"), self.body.get("aggregateIdentifier"))
+        return str(parsed) if parsed else None
+
+    def dedup_key(self) -> str:
+        return self.res_id or self.body.get("aggregateIdentifier") or str(self.delivery_tag)
+
+    @staticmethod
+    def decode(body: bytes, delivery_tag, routing_key: str = None) -> "ChangeMessage":
+        return ChangeMessage(json.loads(body), delivery_tag, routing_key)
+
+
+class InMemoryChangeSource:
+    """
+    A stand-in for the rabbitmq broker, used for offline testing. Honours prefetch_count by not delivering
+    more than prefetch_count unacked messages at a time.
+    """
+
+    def __init__(self):
+        self._pending: asyncio.Queue = None
+        self._next_tag = 1
+        self._unacked = 0
+        self._window: asyncio.Condition = None
+        self._deliverer: Optional[asyncio.Task] = None
+        self.acked = []
+        self.nacked = []
+        self._backlog = []
+
+    def publish(self, body: dict, routing_key: str = ""):
+        message = ChangeMessage(body, self._next_tag, routing_key)
+        self._next_tag += 1
+        if self._pending is None:
+            self._backlog.append(message)
+        else:
+            self._pending.put_nowait(message)
+
+    async def start(self, on_message: Callable[[ChangeMessage], Awaitable], prefetch_count: int):
+        self._pending = asyncio.Queue()
+        self._window = asyncio.Condition()
+        for message in self._backlog:
+            self._pending.put_nowait(message)
+        self._backlog = []
+
+        async def deliver():
+            while True:
+                message = await self._pending.get()
+                async with self._window:
+                    await self._window.wait_for(lambda: self._unacked < prefetch_count)
+                    self._unacked += 1
+                await on_message(message)
+
+        self._deliverer = asyncio.ensure_future(deliver())
+
+    async def _release(self):
+        async with self._window:
+            self._unacked -= 1
+            self._window.notify_all()
+
+    async def ack(self, delivery_tag):
+        self.acked.append(delivery_tag)
+        await self._release()
+
+    async def nack(self, delivery_tag, requeue=True):
+        self.nacked.append(delivery_tag)
+        await self._release()
+
+    def is_drained(self):
+        return self._pending is not None and self._pending.empty() and self._unacked == 0
+
+    async def close(self):
+        if self._deliverer:
+            self._deliverer.cancel()
+            try:
+                await self._deliverer
+            except asyncio.CancelledError:
+                pass
+
+
+class AmqpChangeSource:
+    """
+    Subscribes to the mdb change exchange using aioamqp. A server named queue is bound to the exchange unless
+    queue_name is given, in which case a durable queue is used.
+    """
+
+    def __init__(self, host: str, exchange: str, queue_name: str = "", routing_key: str = "#",
+                 port: int = None, login: str = "guest", password: str = "guest", virtualhost: str = "/"):
+        self.host = host
+        self.port = port
+        self.login = login
+        self.password = password
+        self.virtualhost = virtualhost
+        self.exchange = exchange
+        self.queue_name = queue_name
+        self.routing_key = routing_key
+        self._transport = None
+        self._protocol = None
+        self._channel = None
+
+    async def start(self, on_message: Callable[[ChangeMessage], Awaitable], prefetch_count: int):
+        import aioamqp
+
+        self._transport, self._protocol = await aioamqp.connect(self.host, self.port, self.login, self.password,
+                                                                self.virtualhost)
+        self._channel = await self._protocol.channel()
+        durable = bool(self.queue_name)
+        declared = await self._channel.queue_declare(self.queue_name, durable=durable, exclusive=not durable)
+        queue_name = declared["queue"]
+        await self._channel.queue_bind(queue_name, self.exchange, self.routing_key)
+        await self._channel.basic_qos(prefetch_count=prefetch_count, prefetch_size=0, connection_global=False)
+
+        async def callback(channel, body, envelope, properties):
+            await on_message(ChangeMessage.decode(body, envelope.delivery_tag, envelope.routing_key))
+
+        await self._channel.basic_consume(callback, queue_name=queue_name)
+
+    async def ack(self, delivery_tag):
+        await self._channel.basic_client_ack(delivery_tag)
+
+    async def nack(self, delivery_tag, requeue=True):
+        await self._channel.basic_reject(delivery_tag, requeue=requeue)
+
+    async def close(self):
+        if self._protocol:
+            await self._protocol.close()
+        if self._transport:
+            self._transport.close()
+
+
+class ConsumerStats:
+    def __init__(self):
+        self.received = 0
+        self.batches = 0
+        self.deduplicated = 0
+        self.handled = 0
+        self.failed = 0
+        self.batch_failures = 0
+
+    def __str__(self):
+        return f"received={self.received} batches={self.batches} deduplicated={self.deduplicated} " \
+               f"handled={self.handled} failed={self.failed} batch_failures={self.batch_failures}"
+
+
+class MdbChangeConsumer:
+    """
+    Consumes the mdb change feed in batches. A batch is closed when batch_size messages have arrived or
+    batch_timeout seconds have passed since the first message of the batch.
+
+    Within a batch, messages are deduplicated on resId (or aggregate identifier), and the final state of each
+    aggregate is resolved once and passed to the handler as handler(resolved, messages). resolved is None
+    if the aggregate is deleted or gone. All messages for an aggregate are acked when the handler completes,
+    or nacked (with requeue) if it fails.
+
+    A batch that fails as a whole, for instance because an ack fails on a dropped channel, is logged and counted
+    in stats.batch_failures, last_error holds the exception, and the consumer goes on with the next batch.
+    """
+
+    def __init__(self, client: MdbClient, source, handler: Callable[[Optional[dict], List[ChangeMessage]], Awaitable],
+                 batch_size: int = 100, batch_timeout: float = 1.0, concurrency: int = 10,
+                 prefetch_count: int = None):
+        self.client = client
+        self.source = source
+        self.handler = handler
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout
+        self.concurrency = concurrency
+        self.prefetch_count = prefetch_count if prefetch_count else batch_size * 2
+        self.stats = ConsumerStats()
+        self._incoming: asyncio.Queue = None
+        self._runner: Optional[asyncio.Task] = None
+        self.last_error: Optional[Exception] = None
+
+    async def _on_message(self, message: ChangeMessage):
+        self.stats.received += 1
+        await self._incoming.put(message)
+
+    async def start(self):
+        self._incoming = asyncio.Queue()
+        await self.source.start(self._on_message, self.prefetch_count)
+        self._runner = asyncio.ensure_future(self.__run())
+
+    async def stop(self):
+        if self._runner:
+            self._runner.cancel()
+            try:
+                await self._runner
+            except asyncio.CancelledError:
+                pass
+        await self.source.close()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop()
+
+    async def __next_batch(self) -> List[ChangeMessage]:
+        batch = [await self._incoming.get()]
+        deadline = time.monotonic() + self.batch_timeout
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._incoming.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def __run(self):
+        while True:
+            batch = await self.__next_batch()
+            try:
+                await self.process_batch(batch)
+            except Exception as e:
+                self.stats.batch_failures += 1
+                self.last_error = e
+                _log.exception("Failed to process a batch of %d changes", len(batch))
+
+    @staticmethod
+    def _group(batch: List[ChangeMessage]) -> Dict[str, List[ChangeMessage]]:
+        grouped = {}
+        for message in batch:
+            grouped.setdefault(message.dedup_key(), []).append(message)
+        return grouped
+
+    async def _resolve(self, res_id):
+        if not res_id:
+            return None
+        try:
+            resolved = await self.client.resolve(res_id, fail_on_missing=False)
+        except AggregateGoneException:
+            return None
+        if resolved is not None and resolved.get("deleted"):
+            return None
+        return resolved
+
+    async def process_batch(self, batch: List[ChangeMessage]):
+        self.stats.batches += 1
+        grouped = self._group(batch)
+        self.stats.deduplicated += len(batch) - len(grouped)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def handle(messages: List[ChangeMessage]):
+            async with semaphore:
+                try:
+                    resolved = await self._resolve(messages[-1].res_id)
+                    await self.handler(resolved, messages)
+                except Exception:
+                    self.stats.failed += 1
+                    for message in messages:
+                        await self.source.nack(message.delivery_tag, requeue=True)
+                    return
+                self.stats.handled += 1
+                for message in messages:
+                    await self.source.ack(message.delivery_tag)
+
+        await asyncio.gather(*[handle(messages) for messages in grouped.values()])
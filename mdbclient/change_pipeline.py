@@ -0,0 +1,213 @@
+import asyncio
+import collections
+import json
+import os
+import time
+from typing import List, Callable, Awaitable, Optional
+
+from mdbclient.mdbclient import MdbChangeListener, Change
+
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+
+
+class RingBufferSink:
+    """
+    Keeps the last capacity changes in memory
+    """
+
+    def __init__(self, capacity: int = 10000):
+        self.changes = collections.deque(maxlen=capacity)
+
+    async def write(self, changes: List[Change]):
+        self.changes.extend(changes)
+
+    def pop_changes(self) -> List[Change]:
+        res = list(self.changes)
+        self.changes.clear()
+        return res
+
+
+class NdjsonFileSink:
+    """
+    Appends changes as newline delimited json to path. When the file exceeds max_bytes it is rotated
+    to path.1, path.1 to path.2 and so on, keeping backup_count old files.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 100 * 1024 * 1024, backup_count: int = 5):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+
+    @staticmethod
+    def to_json(change: Change) -> str:
+        return json.dumps({"resId": change.resId, "type": change.type, "topic": change.topic,
+                           "payload": change.payload}, default=str)
+
+    def _rotate(self):
+        for idx in range(self.backup_count - 1, 0, -1):
+            src = f"{self.path}.{idx}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{idx + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+    def _write_lines(self, lines: List[str]):
+        if os.path.exists(self.path) and os.path.getsize(self.path) >= self.max_bytes:
+            self._rotate()
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(lines))
+
+    async def write(self, changes: List[Change]):
+        lines = [self.to_json(x) + "\n" for x in changes]
+        await asyncio.get_event_loop().run_in_executor(None, self._write_lines, lines)
+
+
+class CoroutineSink:
+    def __init__(self, func: Callable[[List[Change]], Awaitable]):
+        self.func = func
+
+    async def write(self, changes: List[Change]):
+        await self.func(changes)
+
+
+class PipelineStats:
+    def __init__(self):
+        self.enqueued = 0
+        self.dropped = 0
+        self.delivered = 0
+        self.batches = 0
+        self.sink_errors = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+
+    def __str__(self):
+        return f"enqueued={self.enqueued} dropped={self.dropped} delivered={self.delivered} batches={self.batches} " \
+               f"sink_errors={self.sink_errors} last_lag={self.last_lag:.3f}s max_lag={self.max_lag:.3f}s"
+
+
+class AsyncChangePipeline(MdbChangeListener):
+    """
+    A change listener that moves change delivery off the request path. The on_* hooks only enqueue the change;
+    a background task delivers changes in batches of up to batch_size (or whatever has arrived within
+    flush_interval) to all sinks concurrently.
+
+    The queue holds at most max_queue changes. The synchronous hooks cannot wait, so when the queue is full
+    they drop according to overflow (DROP_OLDEST or DROP_NEWEST). Async producers can use put(), which waits
+    for room instead of dropping.
+    """
+
+    def __init__(self, sinks: list, max_queue: int = 10000, batch_size: int = 100, flush_interval: float = 0.5,
+                 overflow: str = DROP_OLDEST):
+        if overflow not in (DROP_OLDEST, DROP_NEWEST):
+            raise ValueError(f"Unknown overflow policy {overflow}")
+        self.sinks = sinks
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.stats = PipelineStats()
+        self._queue = collections.deque()
+        self._has_items: Optional[asyncio.Event] = None
+        self._has_room: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._stop_requested: Optional[asyncio.Event] = None
+
+    def queue_depth(self):
+        return len(self._queue)
+
+    def _offer(self, change: Change):
+        if len(self._queue) >= self.max_queue:
+            self.stats.dropped += 1
+            if self.overflow == DROP_NEWEST:
+                return
+            self._queue.popleft()
+        self._queue.append((time.monotonic(), change))
+        self.stats.enqueued += 1
+        if self._has_items:
+            self._has_items.set()
+
+    async def put(self, change: Change):
+        while len(self._queue) >= self.max_queue and self._has_room:
+            self._has_room.clear()
+            await self._has_room.wait()
+        self._offer(change)
+
+    def on_change(self, resId, topic, changes):
+        self._offer(Change(resId, "CHANGE", topic, changes))
+
+    def on_add(self, resId, topic, add):
+        self._offer(Change(resId, "ADD", topic, add))
+
+    def on_create(self, resId, topic, add):
+        self._offer(Change(resId, "CREATE", topic, add))
+
+    def on_delete(self, resId):
+        self._offer(Change(resId, "DELETE", None, None))
+
+    def _take_batch(self) -> List[Change]:
+        batch = []
+        now = time.monotonic()
+        while self._queue and len(batch) < self.batch_size:
+            enqueued_at, change = self._queue.popleft()
+            self.stats.last_lag = now - enqueued_at
+            self.stats.max_lag = max(self.stats.max_lag, self.stats.last_lag)
+            batch.append(change)
+        if self._has_room:
+            self._has_room.set()
+        return batch
+
+    async def _deliver(self, batch: List[Change]):
+        results = await asyncio.gather(*[sink.write(batch) for sink in self.sinks], return_exceptions=True)
+        self.stats.sink_errors += len([x for x in results if isinstance(x, Exception)])
+        self.stats.delivered += len(batch)
+        self.stats.batches += 1
+
+    async def __run(self):
+        while not self._stopping:
+            if not self._queue:
+                self._has_items.clear()
+                await self._has_items.wait()
+                continue
+            if len(self._queue) < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._stop_requested.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            await self._deliver(self._take_batch())
+        await self.flush()
+
+    async def flush(self):
+        while self._queue:
+            await self._deliver(self._take_batch())
+
+    async def start(self):
+        self._stopping = False
+        self._stop_requested = asyncio.Event()
+        self._has_items = asyncio.Event()
+        self._has_room = asyncio.Event()
+        if self._queue:
+            self._has_items.set()
+        self._worker = asyncio.ensure_future(self.__run())
+
+    async def stop(self):
+        """
+        Stops the pipeline after delivering everything that has been enqueued
+        """
+        if self._worker:
+            self._stopping = True
+            self._stop_requested.set()
+            self._has_items.set()
+            await self._worker
+            self._worker = None
+        await self.flush()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop()
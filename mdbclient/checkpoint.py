@@ -0,0 +1,111 @@
+import os
+from typing import Optional
+
+
+class Checkpoint:
+    """
+    Append-only record of completed keys, one per line, so a bulk job that crashes can resume where it left off.
+    Keys are flushed as they are marked done; a torn last line from a crash is ignored on load.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._done = set()
+        if os.path.exists(path):
+            complete_bytes = 0
+            with open(path, "rb") as f:
+                for line in f:
+                    if line.endswith(b"\n"):
+                        self._done.add(line[:-1].decode("utf-8"))
+                        complete_bytes += len(line)
+            if complete_bytes != os.path.getsize(path):
+                os.truncate(path, complete_bytes)
+        self._file = None
+
+    def __contains__(self, key) -> bool:
+        return key in self._done
+
+    def __len__(self):
+        return len(self._done)
+
+    def is_done(self, key: str) -> bool:
+        return key in self._done
+
+    def mark_done(self, key: str):
+        if key in self._done:
+            return
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._done.add(key)
+        self._file.write(key + "\n")
+        self._file.flush()
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+class KeyValueLog:
+    """
+    The last value per key, in an append-only file of key<TAB>value lines where the last line for a key wins.
+    Keys can not contain tabs or newlines, values can not contain newlines. Like Checkpoint, every put is
+    flushed and a torn last line from a crash is ignored on load.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._values = {}
+        if os.path.exists(path):
+            complete_bytes = 0
+            with open(path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    key, _, value = line[:-1].decode("utf-8").partition("\t")
+                    self._values[key] = value
+                    complete_bytes += len(line)
+            if complete_bytes != os.path.getsize(path):
+                os.truncate(path, complete_bytes)
+        self._file = None
+
+    def __len__(self):
+        return len(self._values)
+
+    def __contains__(self, key) -> bool:
+        return key in self._values
+
+    def get(self, key: str) -> Optional[str]:
+        return self._values.get(key)
+
+    def items(self):
+        return self._values.items()
+
+    def put(self, key: str, value: str):
+        if self._values.get(key) == value:
+            return
+        if "\t" in key or "\n" in key:
+            raise ValueError(f"Key can not contain tabs or newlines: {key!r}")
+        if "\n" in value:
+            raise ValueError(f"Value can not contain newlines: {value!r}")
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._values[key] = value
+        self._file.write(f"{key}\t{value}\n")
+        self._file.flush()
+
+    def compact(self):
+        """
+        Rewrites the file with one line per key
+        """
+        self.close()
+        temporary = self.path + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            for key, value in self._values.items():
+                f.write(f"{key}\t{value}\n")
+        os.replace(temporary, self.path)
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
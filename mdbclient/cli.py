@@ -0,0 +1,215 @@
+"""
+Bulk operations against MDB from the command line. Ids (or urls, reference values) are read one per line from
+the given files or stdin, and results are written as one json object per line to --output or stdout.
+Progress and rate go to stderr.
+
+    mdbclient --env STAGE resolve ids.txt > resolved.ndjson
+    cat ids.txt | mdbclient --env PROD --concurrency 64 reindex --rate 50 --checkpoint reindex.done
+"""
+import argparse
+import asyncio
+import fileinput
+import json
+import sys
+from typing import Callable, Awaitable, Iterator
+
+import aiohttp
+
+from mdbclient.bulk import BulkStats, run_bounded
+from mdbclient.bulk_export import BulkExporter, NdjsonGzipSink, PerAggregateSink, EXPORT_MASTER_EO, \
+    EXPORT_PUBLICATION_EVENT
+from mdbclient.checkpoint import Checkpoint
+from mdbclient.mdbclient import MdbClient, MdbEnv, Http404
+from mdbclient.reindex import ReindexOrchestrator
+from mdbclient.tools.diff_calculator import Differ
+
+
+def read_lines(files) -> Iterator[str]:
+    """
+    Non empty lines of the files (stdin for none or -), skipping # comments
+    """
+    with fileinput.input(files or ("-",)) as lines:
+        for line in lines:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield line
+
+
+class NdjsonOutput:
+    def __init__(self, path: str = None):
+        self._file = open(path, "w", encoding="utf-8") if path and path != "-" else sys.stdout
+
+    def write(self, record: dict):
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def close(self):
+        self._file.flush()
+        if self._file is not sys.stdout:
+            self._file.close()
+
+
+def _error(e: Exception) -> str:
+    return str(e) or type(e).__name__
+
+
+class Command:
+    def __init__(self, args, client: MdbClient, output: NdjsonOutput):
+        self.args = args
+        self.client = client
+        self.output = output
+        self.stats = BulkStats()
+
+    def report_progress(self, stats: BulkStats):
+        if not self.args.quiet:
+            print(stats, file=sys.stderr, flush=True)
+
+    async def for_each(self, items, operation: Callable[[str], Awaitable[dict]]):
+        """
+        Runs operation on every item and writes the records it returns, or a record with the error
+        """
+        stats = self.stats
+
+        async def one(item):
+            try:
+                record = await operation(item)
+                stats.done += 1
+            except Http404:
+                record = {"input": item, "missing": True}
+                stats.missing += 1
+            except Exception as e:
+                record = {"input": item, "error": _error(e)}
+                stats.failed += 1
+            self.output.write(record)
+            if stats.processed() % self.args.progress_interval == 0:
+                self.report_progress(stats)
+
+        await run_bounded(items, self.args.concurrency, one)
+        stats.finish()
+
+
+async def resolve(command: Command, items):
+    await command.for_each(items, command.client.resolve)
+
+
+async def open_urls(command: Command, items):
+    await command.for_each(items, command.client.open_url)
+
+
+async def references(command: Command, items):
+    async def one(value):
+        found = await command.client.reference(command.args.type, value)
+        return {"input": value, "resIds": [x.get("resId") for x in found]}
+
+    await command.for_each(items, one)
+
+
+async def broadcast(command: Command, items):
+    async def one(res_id):
+        result = (await command.client.broadcast_changes(command.args.destination, [res_id], concurrency=1))[0]
+        if result.error is not None:
+            raise result.error
+        return {"input": res_id, "type": result.type}
+
+    await command.for_each(items, one)
+
+
+async def diff(command: Command, items):
+    async def one(line):
+        existing_id, modified_id = line.split()
+        existing, modified = await asyncio.gather(command.client.resolve(existing_id),
+                                                  command.client.resolve(modified_id))
+        calculated = Differ(existing, modified).calculate()
+        return {"input": line, "added": dict(calculated.Added), "modified": dict(calculated.Modified),
+                "removed": dict(calculated.Removed)}
+
+    await command.for_each(items, one)
+
+
+def _failures(command: Command, failures: dict):
+    for key, error in failures.items():
+        command.output.write({"input": key, "error": _error(error)})
+
+
+async def export(command: Command, items):
+    args = command.args
+    sink = PerAggregateSink(args.directory) if args.directory else NdjsonGzipSink(args.prefix)
+    exporter = BulkExporter(command.client, sink, Checkpoint(args.checkpoint) if args.checkpoint else None,
+                            args.kind, args.concurrency, progress=command.report_progress,
+                            progress_interval=args.progress_interval)
+    command.stats = await exporter.run(items)
+    _failures(command, exporter.failures)
+
+
+async def reindex(command: Command, items):
+    args = command.args
+    orchestrator = ReindexOrchestrator(command.client, Checkpoint(args.checkpoint) if args.checkpoint else None,
+                                       args.rate, args.latency_target, args.concurrency, args.full,
+                                       progress=command.report_progress, progress_interval=args.progress_interval)
+    command.stats = await orchestrator.run(items)
+    _failures(command, orchestrator.failures)
+
+
+def parser() -> argparse.ArgumentParser:
+    main_parser = argparse.ArgumentParser(prog="mdbclient", description=__doc__,
+                                          formatter_class=argparse.RawDescriptionHelpFormatter)
+    main_parser.add_argument("--env", choices=[x.name for x in MdbEnv], default=MdbEnv.STAGE.name)
+    main_parser.add_argument("--api-base", help="server address, overrides --env")
+    main_parser.add_argument("--user", default="mdbclient-cli", help="user id sent to mdb")
+    main_parser.add_argument("--correlation-id", default="mdbclient-cli")
+    main_parser.add_argument("--concurrency", type=int, default=16, help="requests in flight")
+    main_parser.add_argument("--output", help="ndjson output file, default stdout")
+    main_parser.add_argument("--progress-interval", type=int, default=1000, help="items between progress lines")
+    main_parser.add_argument("--quiet", action="store_true", help="no progress on stderr")
+    commands = main_parser.add_subparsers(dest="command", required=True)
+
+    def command(name, func, help_):
+        sub = commands.add_parser(name, help=help_)
+        sub.add_argument("files", nargs="*", help="input files, default stdin")
+        sub.set_defaults(func=func)
+        return sub
+
+    command("resolve", resolve, "resolve resIds")
+    command("open", open_urls, "open urls")
+    command("references", references, "find objects by reference value").add_argument(
+        "--type", required=True, help="reference type")
+    command("broadcast", broadcast, "broadcast changes for resIds").add_argument(
+        "--destination", required=True)
+    command("diff", diff, "diff pairs of resIds, two per line")
+    export_parser = command("export", export, "export master EOs or publication events by id")
+    export_parser.add_argument("--kind", choices=[EXPORT_MASTER_EO, EXPORT_PUBLICATION_EVENT],
+                               default=EXPORT_MASTER_EO)
+    export_target = export_parser.add_mutually_exclusive_group(required=True)
+    export_target.add_argument("--prefix", help="write prefix.NNNN.ndjson.gz")
+    export_target.add_argument("--directory", help="write one gzip file per aggregate")
+    export_parser.add_argument("--checkpoint", help="record completed ids here and skip them on rerun")
+    reindex_parser = command("reindex", reindex, "reindex resIds")
+    reindex_parser.add_argument("--rate", type=float, default=10.0, help="maximum reindex requests per second")
+    reindex_parser.add_argument("--latency-target", type=float, default=2.0,
+                                help="slow down when responses take longer than this")
+    reindex_parser.add_argument("--full", action="store_true", help="use full reindex for all types")
+    reindex_parser.add_argument("--checkpoint", help="record completed ids here and skip them on rerun")
+    return main_parser
+
+
+async def run(args) -> BulkStats:
+    connector = aiohttp.TCPConnector(limit=args.concurrency * 2)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        client = MdbClient(session, args.api_base or MdbEnv[args.env], args.user, args.correlation_id)
+        output = NdjsonOutput(args.output)
+        command = Command(args, client, output)
+        try:
+            await args.func(command, read_lines(args.files))
+        finally:
+            output.close()
+        command.report_progress(command.stats)
+        return command.stats
+
+
+def main(argv=None) -> int:
+    args = parser().parse_args(argv)
+    stats = asyncio.run(run(args))
+    return 1 if stats.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
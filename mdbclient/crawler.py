@@ -0,0 +1,246 @@
+import asyncio
+import os
+import tempfile
+from collections import deque
+from typing import AsyncIterator, Iterable, Optional, Tuple
+
+from mdbclient.bulk import BulkStats
+from mdbclient.checkpoint import Checkpoint
+from mdbclient.mdb_ids import try_parse_res_id
+from mdbclient.mdbclient import MdbClient, Http404
+
+# Reference fields followed by default, from series down to the media of their episodes
+DEFAULT_FIELDS = ("seasons", "episodes", "masterEO", "mediaObjects", "publications", "resources",
+                  "publishedVersions", "pmos", "essences", "playouts")
+
+# (depth, resId, self href or None)
+Entry = Tuple[int, str, Optional[str]]
+
+
+def _self_href(reference: dict) -> Optional[str]:
+    for link in reference.get("links") or []:
+        if link.get("rel") == "self":
+            return link.get("href")
+
+
+def _references(value) -> list:
+    values = value if isinstance(value, list) else [value]
+    return [x for x in values if isinstance(x, dict) and x.get("resId")]
+
+
+def _visit_key(res_id: str):
+    # parsed where the kind is known, so differently written guids of the same aggregate are one key
+    return try_parse_res_id(res_id) or res_id
+
+
+def _line(entry: Entry) -> str:
+    depth, res_id, href = entry
+    return f"{depth}\t{res_id}\t{href or ''}\n"
+
+
+def _entry(line: str) -> Entry:
+    depth, res_id, href = line[:-1].split("\t")
+    return int(depth), res_id, href or None
+
+
+class CrawledNode:
+    """
+    An aggregate reached by the crawl. aggregate is None when it was missing, error is set when fetching failed.
+    """
+
+    def __init__(self, res_id: str, depth: int, aggregate=None, error: Exception = None):
+        self.res_id = res_id
+        self.depth = depth
+        self.aggregate = aggregate
+        self.error = error
+
+    def is_successful(self) -> bool:
+        return self.error is None and self.aggregate is not None
+
+    def __str__(self):
+        state = "OK" if self.is_successful() else self.error or "missing"
+        return f"{self.res_id} depth={self.depth} {state}"
+
+
+class _Frontier:
+    """
+    First in, first out queue of entries holding at most max_in_memory of them in memory. Once it is full, new
+    entries wait in a file at path, in order, until the ones in memory are taken.
+    """
+
+    def __init__(self, path: str, max_in_memory: int):
+        self.path = path
+        self.max_in_memory = max_in_memory
+        self._memory = deque()
+        self._spilled = 0
+        self._writer = None
+        self._reader = None
+        self.spilled_total = 0
+
+    def __len__(self):
+        return len(self._memory) + self._spilled
+
+    def push(self, entry: Entry):
+        if not self._spilled and len(self._memory) < self.max_in_memory:
+            self._memory.append(entry)
+            return
+        if self._writer is None:
+            self._writer = open(self.path, "w", encoding="utf-8")
+        self._writer.write(_line(entry))
+        self._spilled += 1
+        self.spilled_total += 1
+
+    def pop(self) -> Entry:
+        if not self._memory and self._spilled:
+            self._refill()
+        return self._memory.popleft()
+
+    def _refill(self):
+        self._writer.flush()
+        if self._reader is None:
+            self._reader = open(self.path, encoding="utf-8")
+        while self._spilled and len(self._memory) < self.max_in_memory:
+            self._memory.append(_entry(self._reader.readline()))
+            self._spilled -= 1
+        if not self._spilled:
+            # everything on disk is in memory now, the next spill starts a new file
+            self.close()
+            os.remove(self.path)
+
+    def close(self):
+        for f in (self._writer, self._reader):
+            if f:
+                f.close()
+        self._writer = self._reader = None
+
+
+class Crawler:
+    """
+    Walks the aggregates reachable from a set of seed resIds breadth first, following the reference fields in
+    fields, with at most concurrency fetches in flight. Nodes are yielded as their fetch completes:
+
+        crawler = Crawler(client, fields=("seasons", "episodes", "masterEO"))
+        async for node in crawler.crawl([serie_res_id]):
+            if node.is_successful():
+                ...
+
+    Every aggregate is visited once; visited resIds are kept parsed, so differently written resIds of the same
+    aggregate are recognised. At most max_frontier discovered aggregates wait in memory, the rest are spilled
+    to disk. References deeper than max_depth (seeds are at depth 0) are not followed.
+
+    With state_dir, discovered aggregates and the ones yielded are recorded there, and a crawl started again
+    with the same state_dir continues where the last one stopped. A node counts as done once the consumer asks
+    for the next one, so nodes can be yielded again after a crash, but never lost. Failed fetches are not
+    recorded as done and are retried on resume.
+    """
+
+    def __init__(self, client: MdbClient, fields: Iterable[str] = DEFAULT_FIELDS, concurrency: int = 8,
+                 max_depth: int = None, max_frontier: int = 100000, state_dir: str = None):
+        self.client = client
+        self.fields = tuple(fields)
+        self.concurrency = concurrency
+        self.max_depth = max_depth
+        self.max_frontier = max_frontier
+        self.state_dir = state_dir
+        self.stats = BulkStats()
+        self._visited = set()
+        self._done: Optional[Checkpoint] = None
+        self._discovered = None
+
+    async def crawl(self, seeds: Iterable[str]) -> AsyncIterator[CrawledNode]:
+        with tempfile.TemporaryDirectory() as scratch:
+            frontier = _Frontier(os.path.join(self.state_dir or scratch, "frontier.spill"), self.max_frontier)
+            in_flight = {}
+            try:
+                if self.state_dir:
+                    self.__restore(frontier)
+                for seed in seeds:
+                    self.__discover(frontier, (0, seed, None))
+                self.__flush()
+                while frontier or in_flight:
+                    while frontier and len(in_flight) < self.concurrency:
+                        entry = frontier.pop()
+                        in_flight[asyncio.ensure_future(self.__fetch(entry))] = entry
+                    completed, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    for task in completed:
+                        del in_flight[task]
+                        node = task.result()
+                        self.__expand(frontier, node)
+                        yield node
+                        if node.error is None and self._done is not None:
+                            self._done.mark_done(node.res_id)
+            finally:
+                for task in in_flight:
+                    task.cancel()
+                await asyncio.gather(*in_flight, return_exceptions=True)
+                frontier.close()
+                self.__close()
+                self.stats.finish()
+
+    async def __fetch(self, entry: Entry) -> CrawledNode:
+        depth, res_id, href = entry
+        try:
+            if href:
+                aggregate = await self.client.open({"resId": res_id, "links": [{"rel": "self", "href": href}]})
+            else:
+                aggregate = await self.client.resolve(res_id, fail_on_missing=False)
+        except Http404:
+            aggregate = None
+        except Exception as e:
+            self.stats.failed += 1
+            return CrawledNode(res_id, depth, error=e)
+        if aggregate is None:
+            self.stats.missing += 1
+        else:
+            self.stats.done += 1
+        return CrawledNode(res_id, depth, aggregate)
+
+    def __expand(self, frontier: _Frontier, node: CrawledNode):
+        if node.aggregate is None or (self.max_depth is not None and node.depth >= self.max_depth):
+            return
+        for field in self.fields:
+            for reference in _references(node.aggregate.get(field)):
+                self.__discover(frontier, (node.depth + 1, reference["resId"], _self_href(reference)))
+        # children are recorded before their parent is marked done
+        self.__flush()
+
+    def __discover(self, frontier: _Frontier, entry: Entry):
+        key = _visit_key(entry[1])
+        if key in self._visited:
+            return
+        self._visited.add(key)
+        if self._discovered is not None:
+            self._discovered.write(_line(entry))
+        frontier.push(entry)
+
+    def __flush(self):
+        if self._discovered is not None:
+            self._discovered.flush()
+
+    def __restore(self, frontier: _Frontier):
+        os.makedirs(self.state_dir, exist_ok=True)
+        self._done = Checkpoint(os.path.join(self.state_dir, "done"))
+        path = os.path.join(self.state_dir, "discovered.tsv")
+        if os.path.exists(path):
+            complete_bytes = 0
+            with open(path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    complete_bytes += len(line)
+                    entry = _entry(line.decode("utf-8"))
+                    self._visited.add(_visit_key(entry[1]))
+                    if entry[1] in self._done:
+                        self.stats.skipped += 1
+                    else:
+                        frontier.push(entry)
+            if complete_bytes != os.path.getsize(path):
+                os.truncate(path, complete_bytes)
+        self._discovered = open(path, "a", encoding="utf-8")
+
+    def __close(self):
+        if self._discovered is not None:
+            self._discovered.close()
+            self._discovered = None
+        if self._done is not None:
+            self._done.close()
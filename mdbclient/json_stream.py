@@ -0,0 +1,88 @@
+import codecs
+import json
+from typing import List
+
+_WHITESPACE = " \t\n\r"
+# A value ending in one of these can not continue in the next chunk, unlike a number
+_CLOSED_ENDINGS = '}]"el'
+# Characters a number can continue with
+_NUMBER_CONTINUATIONS = ".eE+-0123456789"
+
+
+class JsonArrayDecoder:
+    """
+    Decodes a json array incrementally from chunks of bytes. feed() returns the elements completed by the
+    chunk, so only the unfinished element is ever held in memory.
+
+        decoder = JsonArrayDecoder()
+        async for chunk in stream:
+            for element in decoder.feed(chunk):
+                ...
+        decoder.close()
+    """
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._started = False
+        self._expect_element = True
+        self._after_comma = False
+        self._finished = False
+
+    def feed(self, chunk: bytes) -> List:
+        self._buffer += self._text.decode(chunk)
+        return self._elements(final=False)
+
+    def close(self) -> List:
+        """
+        Returns the last elements and raises ValueError if the array is incomplete
+        """
+        self._buffer += self._text.decode(b"", final=True)
+        elements = self._elements(final=True)
+        if not self._finished:
+            raise ValueError("Truncated json array")
+        return elements
+
+    def _elements(self, final: bool) -> List:
+        elements = []
+        buffer = self._buffer
+        pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            if pos == len(buffer) or self._finished:
+                break
+            if not self._started:
+                if buffer[pos] != "[":
+                    raise ValueError(f"Expected a json array, got {buffer[pos:pos + 20]!r}")
+                self._started = True
+                pos += 1
+            elif buffer[pos] == "]":
+                if self._after_comma:
+                    raise ValueError("Trailing comma in json array")
+                self._finished = True
+                pos += 1
+            elif not self._expect_element:
+                if buffer[pos] != ",":
+                    raise ValueError(f"Expected , or ] in json array, got {buffer[pos:pos + 20]!r}")
+                self._expect_element = True
+                self._after_comma = True
+                pos += 1
+            else:
+                try:
+                    element, end = self._decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if final:
+                        raise
+                    break
+                # a number at the end of the buffer, or cut short at a chunk boundary inside it, may go on
+                if not final and buffer[end - 1] not in _CLOSED_ENDINGS and \
+                        (end == len(buffer) or buffer[end] in _NUMBER_CONTINUATIONS):
+                    break
+                elements.append(element)
+                self._expect_element = False
+                self._after_comma = False
+                pos = end
+        self._buffer = buffer[pos:]
+        return elements
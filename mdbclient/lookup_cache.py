@@ -0,0 +1,108 @@
+import collections
+import copy
+import time
+from typing import Tuple, Any
+
+
+def reference_key(ref_type, value) -> tuple:
+    return "reference", ref_type, value
+
+
+def media_object_key(name) -> tuple:
+    return "mediaObject", name
+
+
+def serie_key(title, master_system) -> tuple:
+    return "serie", title, master_system
+
+
+def _res_ids(value) -> list:
+    values = value if isinstance(value, list) else [value]
+    return [x["resId"] for x in values if isinstance(x, dict) and x.get("resId")]
+
+
+class LookupCache:
+    """
+    Caches natural-key lookups (references, media objects by name, series by title and master system).
+
+    Hits are kept for ttl seconds, misses (empty results) for negative_ttl seconds. At most max_entries
+    are kept, least recently used are evicted first. Attach it to a client with client.lookup_cache = LookupCache();
+    the client invalidates the matching keys when it creates objects or adds references.
+
+    Values are copied on the way in and out, so callers may change what they get. Entries are also indexed on
+    the resIds of the objects they hold, and invalidate_res_id drops every lookup an updated or deleted object
+    is part of.
+    """
+
+    def __init__(self, ttl: float = 300.0, negative_ttl: float = 30.0, max_entries: int = 100000):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._entries = collections.OrderedDict()
+        self._keys_by_res_id = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: tuple) -> Tuple[bool, Any]:
+        """
+        Returns (True, value) for a live entry and (False, None) otherwise
+        """
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                self.invalidate(key)
+            self.misses += 1
+            return False, None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return True, copy.deepcopy(entry[1])
+
+    def put(self, key: tuple, value):
+        self.invalidate(key)
+        ttl = self.ttl if value else self.negative_ttl
+        self._entries[key] = (time.monotonic() + ttl, copy.deepcopy(value))
+        for res_id in _res_ids(value):
+            self._keys_by_res_id.setdefault(res_id, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self.invalidate(next(iter(self._entries)))
+
+    def invalidate(self, key: tuple):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for res_id in _res_ids(entry[1]):
+            keys = self._keys_by_res_id.get(res_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_res_id[res_id]
+
+    def invalidate_res_id(self, res_id: str):
+        """
+        Drops every entry holding the object with res_id
+        """
+        for key in list(self._keys_by_res_id.get(res_id, ())):
+            self.invalidate(key)
+
+    def invalidate_for_payload(self, payload: dict):
+        """
+        Drops every entry the given created or updated payload could match
+        """
+        if not payload:
+            return
+        for reference in payload.get("references", []) or []:
+            self.invalidate(reference_key(reference.get("type"), reference.get("reference")))
+        if "name" in payload:
+            self.invalidate(media_object_key(payload["name"]))
+        if "title" in payload:
+            self.invalidate(serie_key(payload["title"], payload.get("masterSystem")))
+
+    def clear(self):
+        self._entries.clear()
+        self._keys_by_res_id.clear()
+
+    def __str__(self):
+        return f"entries={len(self._entries)} hits={self.hits} misses={self.misses}"
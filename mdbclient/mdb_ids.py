@@ -1,5 +1,5 @@
 import os
-from typing import Union
+from typing import Union, Optional
 from uuid import UUID
 
 
@@ -50,6 +50,18 @@ class ResId:
     def id(self) -> str:
         return str(self.mdb_id)
 
+    def __eq__(self, other):
+        if isinstance(other, ResId):
+            return self.base == other.base and self.mdb_id == other.mdb_id
+        else:
+            return False
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash((self.base, self.mdb_id))
+
     @staticmethod
     def of_id(id_string) -> "ResId":
         return ResId("", MdbId(id_string))
@@ -394,6 +406,25 @@ typemappings = {
 }
 
 
+# The mdb type of aggregates whose type follows from the resId alone. Timelines are missing since their type
+# depends on the kind of timeline.
+type_uris = {
+    EssenceResId: "http://id.nrk.no/2016/mdb/types/Essence",
+    MasterEOResId: "http://id.nrk.no/2016/mdb/types/MasterEditorialObject",
+    MasterEOResourceResId: "http://id.nrk.no/2016/mdb/types/MasterEOResource",
+    MediaObjectResId: "http://id.nrk.no/2016/mdb/types/MediaObject",
+    MediaResourceResId: "http://id.nrk.no/2016/mdb/types/MediaResource",
+    PublicationEventResId: "http://id.nrk.no/2016/mdb/types/PublicationEvent",
+    PublicationMediaObjectResId: "http://id.nrk.no/2016/mdb/types/PublicationMediaObject",
+    VersionGroupResId: "http://id.nrk.no/2016/mdb/types/VersionGroup"
+}
+
+
+def type_uri_of(resid: str) -> Optional[str]:
+    parsed = try_parse_res_id(resid)
+    return type_uris.get(type(parsed)) if parsed else None
+
+
 def from_aggregate_type(aggregate_type, guid):
     type_ = typemappings.get(aggregate_type)
     return type_.of_id(guid) if type_ else None
@@ -0,0 +1,411 @@
+import asyncio
+import collections
+import copy
+import datetime
+import hashlib
+import json
+import random
+import uuid
+from typing import Union, Callable, Optional
+
+from aiohttp import web
+
+from mdbclient.relations import REL_ITEMS, REL_DOCUMENTS, REL_FORMATS, REL_REFERENCES, EO_SUBJECTS, EO_CATEGORIES, \
+    EO_LOCATIONS, EO_SPATIALS, EO_CONTRIBUTORS
+
+KIND_MASTER_EO = "masterEO"
+KIND_MEDIA_OBJECT = "mediaObject"
+KIND_MEDIA_RESOURCE = "mediaResource"
+KIND_ESSENCE = "essence"
+KIND_PUBLICATION_EVENT = "publicationEvent"
+KIND_PUBLICATION_MEDIA_OBJECT = "publicationMediaObject"
+KIND_TIMELINE = "timeline"
+KIND_VERSION_GROUP = "versionGroup"
+KIND_MASTER_EO_RESOURCE = "masterEOResource"
+KIND_SERIE = "serie"
+KIND_SEASON = "season"
+KIND_EPISODE = "episode"
+
+_RESID_BASES = {
+    KIND_MASTER_EO: "http://id.nrk.no/2016/mdb/masterEO",
+    KIND_MEDIA_OBJECT: "http://id.nrk.no/2016/mdb/mediaObject",
+    KIND_MEDIA_RESOURCE: "http://id.nrk.no/2016/mdb/mediaResource",
+    KIND_ESSENCE: "http://id.nrk.no/2016/mdb/essence",
+    KIND_PUBLICATION_EVENT: "http://id.nrk.no/2016/mdb/publicationEvent",
+    KIND_PUBLICATION_MEDIA_OBJECT: "http://id.nrk.no/2016/mdb/publicationMediaObject",
+    KIND_TIMELINE: "http://id.nrk.no/2017/mdb/timeline",
+    KIND_VERSION_GROUP: "http://id.nrk.no/2016/mdb/versionGroup",
+    KIND_MASTER_EO_RESOURCE: "http://id.nrk.no/2016/mdb/masterEOResource",
+    KIND_SERIE: "http://id.nrk.no/2016/mdb/serie",
+    KIND_SEASON: "http://id.nrk.no/2016/mdb/season",
+    KIND_EPISODE: "http://id.nrk.no/2016/mdb/episode",
+}
+
+# Series, seasons and episodes have no type, the client hands them back as plain dicts
+_TYPES = {
+    KIND_MASTER_EO: "http://id.nrk.no/2016/mdb/types/MasterEditorialObject",
+    KIND_MEDIA_OBJECT: "http://id.nrk.no/2016/mdb/types/MediaObject",
+    KIND_MEDIA_RESOURCE: "http://id.nrk.no/2016/mdb/types/MediaResource",
+    KIND_ESSENCE: "http://id.nrk.no/2016/mdb/types/Essence",
+    KIND_PUBLICATION_EVENT: "http://id.nrk.no/2016/mdb/types/PublicationEvent",
+    KIND_PUBLICATION_MEDIA_OBJECT: "http://id.nrk.no/2016/mdb/types/PublicationMediaObject",
+    KIND_VERSION_GROUP: "http://id.nrk.no/2016/mdb/types/VersionGroup",
+    KIND_MASTER_EO_RESOURCE: "http://id.nrk.no/2016/mdb/types/MasterEOResource",
+}
+
+_EO_RELS = {EO_SUBJECTS: "subjects", EO_CATEGORIES: "categories", EO_LOCATIONS: "locations",
+            EO_SPATIALS: "spatials", EO_CONTRIBUTORS: "contributors", REL_REFERENCES: "references"}
+
+_RELS = {
+    KIND_MASTER_EO: {**_EO_RELS, REL_DOCUMENTS: "documents"},
+    KIND_PUBLICATION_EVENT: _EO_RELS,
+    KIND_MASTER_EO_RESOURCE: _EO_RELS,
+    KIND_TIMELINE: {REL_ITEMS: "items"},
+    KIND_MEDIA_RESOURCE: {REL_FORMATS: "formats"},
+    KIND_VERSION_GROUP: {"temprel:migrateMetadata": "migrations"},
+}
+
+# (field on the created object, kind of the referenced owner, collection on the owner)
+_BACK_REFERENCES = {
+    KIND_MEDIA_OBJECT: [("masterEO", KIND_MASTER_EO, "mediaObjects")],
+    KIND_PUBLICATION_EVENT: [("publishes", KIND_MASTER_EO, "publications")],
+    KIND_TIMELINE: [("masterEO", KIND_MASTER_EO, "timelines")],
+    KIND_MEDIA_RESOURCE: [("mediaObject", KIND_MEDIA_OBJECT, "resources")],
+    KIND_PUBLICATION_MEDIA_OBJECT: [("publicationEvent", KIND_PUBLICATION_EVENT, "pmos"),
+                                    ("publishedVersionOf", KIND_MEDIA_OBJECT, "publishedVersions")],
+    KIND_ESSENCE: [("composedOf", KIND_MEDIA_RESOURCE, "essences"),
+                   ("playoutOf", KIND_PUBLICATION_MEDIA_OBJECT, "playouts")],
+    KIND_SEASON: [("serie", KIND_SERIE, "seasons")],
+    KIND_EPISODE: [("season", KIND_SEASON, "episodes")],
+}
+
+_TIMELINE_ITEM_TYPES = {
+    "http://id.nrk.no/2017/mdb/timelinetype/IndexPoints":
+        "http://id.nrk.no/2017/mdb/timelineitem/IndexpointTimelineItem",
+    "http://id.nrk.no/2017/mdb/timelinetype/Technical":
+        "http://id.nrk.no/2017/mdb/timelineitem/TechnicalTimelineItem",
+    "http://id.nrk.no/2017/mdb/timelinetype/Internal":
+        "http://id.nrk.no/2017/mdb/timelineitem/InternalTimelineItem",
+    "http://id.nrk.no/2017/mdb/timelinetype/Rights":
+        "http://id.nrk.no/2017/mdb/timelineitem/GeneralRightsTimelineItem",
+}
+
+_EXPORT_KINDS = {"masterEOs": KIND_MASTER_EO, "publicationEvents": KIND_PUBLICATION_EVENT}
+
+_INDEX_KINDS = {"masterEOs", "mediaObjects", "mediaResources", "publicationMediaObjects", "essences",
+                "versionGroups", "publicationEvents"}
+
+
+class MdbStandin:
+    """
+    An in-process stand-in for the mdb api, for offline tests and benchmarks. Implements the endpoints
+    MdbClient uses, keeps all data in memory and returns hyperlinked payloads with Location headers
+    like the real server.
+
+    latency is added to every request, either as a fixed number of seconds or as a callable returning one.
+    lock_error_rate is the probability that a write fails with LockAcquisitionFailedException;
+    inject_lock_errors(n) makes the next n writes fail deterministically.
+
+        async with MdbStandin(latency=0.005) as standin:
+            client = MdbClient(session, standin.api_base, "user", "correlation")
+    """
+
+    def __init__(self, latency: Union[float, Callable[[], float]] = 0.0, lock_error_rate: float = 0.0,
+                 seed: int = None):
+        self.latency = latency
+        self.lock_error_rate = lock_error_rate
+        self.objects = {}
+        self.broadcasts = []
+        self.reindexed = []
+        self.requests = collections.Counter()
+        self.base_url: Optional[str] = None
+        self._random = random.Random(seed)
+        self._forced_lock_errors = 0
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def api_base(self):
+        return self.base_url + "/api"
+
+    def inject_lock_errors(self, count: int):
+        self._forced_lock_errors += count
+
+    def request_count(self, method: str = None, name: str = None) -> int:
+        return sum(v for (m, n), v in self.requests.items() if (not method or m == method) and (not name or n == name))
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        app = web.Application(middlewares=[self.__middleware])
+        self.__add_routes(app)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_host, bound_port = self._runner.addresses[0][:2]
+        self.base_url = f"http://{bound_host}:{bound_port}"
+        return self.base_url
+
+    async def close(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    # Data layer
+
+    def _self_href(self, kind, guid):
+        return f"{self.api_base}/{kind}/{guid}"
+
+    def reference_to(self, obj) -> dict:
+        ref = {"resId": obj["resId"], "links": [{"rel": "self", "href": _self_link_of(obj)}]}
+        for key in ("type", "subType", "title", "name"):
+            if key in obj:
+                ref[key] = obj[key]
+        return ref
+
+    def _links(self, kind, self_href):
+        links = [{"rel": "self", "href": self_href}]
+        for rel, collection in _RELS.get(kind, {}).items():
+            links.append({"rel": rel, "href": f"{self_href}/rel/{collection}"})
+        return links
+
+    def _new_child(self, item, collection, item_type=None):
+        child = copy.deepcopy(item)
+        child.pop("links", None)
+        if "rest-client" in child.get("resId", "") or not child.get("resId"):
+            child["resId"] = f"http://id.nrk.no/2016/mdb/{collection}/{uuid.uuid4()}"
+        if item_type and "type" not in child:
+            child["type"] = item_type
+        return child
+
+    def lookup(self, res_id) -> Optional[dict]:
+        return self.objects.get(res_id)
+
+    def add(self, kind: str, payload: dict) -> dict:
+        """
+        Stores a new object of the given kind as if it had been posted to the api, returning the stored object
+        """
+        guid = str(uuid.uuid4())
+        obj = copy.deepcopy(payload)
+        obj["resId"] = f"{_RESID_BASES[kind]}/{guid}"
+        if kind in _TYPES:
+            obj["type"] = _TYPES[kind]
+        elif kind == KIND_TIMELINE:
+            obj["subType"] = obj.get("type")
+        obj["links"] = self._links(kind, self._self_href(kind, guid))
+        obj["created"] = obj["lastUpdated"] = _now()
+        if kind == KIND_TIMELINE:
+            item_type = _TIMELINE_ITEM_TYPES.get(obj.get("type"))
+            obj["items"] = [self._new_child(x, "timelineItem", item_type) for x in obj.get("items", [])]
+        self.objects[obj["resId"]] = obj
+
+        for field, owner_kind, collection in _BACK_REFERENCES.get(kind, []):
+            owner = self.lookup((obj.get(field) or {}).get("resId"))
+            if owner:
+                obj[field] = self.reference_to(owner)
+                owner.setdefault(collection, []).append(self.reference_to(obj))
+        if kind == KIND_MASTER_EO:
+            self.__attach_version_group(obj)
+        return obj
+
+    def __attach_version_group(self, meo):
+        version_group = self.lookup((meo.get("versionGroup") or {}).get("resId"))
+        if not version_group:
+            version_group = self.add(KIND_VERSION_GROUP, {})
+            version_group["metadataMeo"] = self.reference_to(meo)
+        metadata_meo_resid = version_group["metadataMeo"]["resId"]
+        meo["isMetadataMeo"] = metadata_meo_resid == meo["resId"]
+        meo["versionGroup"] = self.reference_to(version_group)
+        version_group.setdefault("versions", []).append(self.reference_to(meo))
+
+    def _find(self, kind, guid) -> Optional[dict]:
+        return self.lookup(f"{_RESID_BASES.get(kind)}/{guid}")
+
+    def _of_kind(self, kind):
+        base = _RESID_BASES[kind] + "/"
+        return [x for x in self.objects.values() if x["resId"].startswith(base)]
+
+    # Http layer
+
+    @web.middleware
+    async def __middleware(self, request: web.Request, handler):
+        route = request.match_info.route
+        self.requests[(request.method, route.name or request.path)] += 1
+        latency = self.latency() if callable(self.latency) else self.latency
+        if latency:
+            await asyncio.sleep(latency)
+        if request.method != "GET" and self.__should_fail_with_lock():
+            return web.json_response({"type": "LockAcquisitionFailedException",
+                                      "message": f"Could not acquire lock for {request.path}"}, status=500)
+        return await handler(request)
+
+    def __should_fail_with_lock(self):
+        if self._forced_lock_errors > 0:
+            self._forced_lock_errors -= 1
+            return True
+        return self.lock_error_rate and self._random.random() < self.lock_error_rate
+
+    def __add_routes(self, app):
+        creatable = "|".join([KIND_MASTER_EO, KIND_MEDIA_OBJECT, KIND_MEDIA_RESOURCE, KIND_ESSENCE,
+                              KIND_PUBLICATION_EVENT, KIND_PUBLICATION_MEDIA_OBJECT, KIND_TIMELINE,
+                              KIND_MASTER_EO_RESOURCE, KIND_SERIE, KIND_SEASON])
+        kinds = "|".join(_RESID_BASES.keys())
+        app.router.add_get("/api/resolve", self._resolve, name="resolve")
+        app.router.add_get("/api/references", self._references, name="references")
+        app.router.add_get("/api/mediaObject/by-name", self._media_object_by_name, name="mediaObject.by-name")
+        app.router.add_get("/api/serie/by_title", self._serie_by_title, name="serie.by_title")
+        app.router.add_get("/api/admin/events/likeQuery", self._like_query, name="likeQuery")
+        app.router.add_post("/api/changes/by-resid", self._broadcast, name="changes.by-resid")
+        app.router.add_get("/api/admin/mdbIndex/{index_kind}/{guid}", self._reindex, name="reindex")
+        app.router.add_post("/api/admin/mdbIndex/fullreindexsingle/{type}/{guid}", self._full_reindex,
+                            name="fullreindexsingle")
+        app.router.add_get("/api/admin/mdbExport/{export_kind}/{guid}", self._export, name="export")
+        app.router.add_post("/api/serie/{serie_id}/episode", self._create_episode, name="create-episode")
+        app.router.add_post(f"/api/{{kind:{creatable}}}", self._create, name="create")
+        app.router.add_get(f"/api/{{kind:{kinds}}}/{{guid}}", self._get, name="get")
+        app.router.add_post(f"/api/{{kind:{kinds}}}/{{guid}}", self._update, name="update")
+        app.router.add_put(f"/api/{{kind:{kinds}}}/{{guid}}", self._replace, name="replace")
+        app.router.add_delete(f"/api/{{kind:{kinds}}}/{{guid}}", self._delete, name="delete")
+        app.router.add_post(f"/api/{{kind:{kinds}}}/{{guid}}/rel/{{collection}}", self._add_on_rel, name="rel")
+
+    def _existing(self, request) -> dict:
+        obj = self._find(request.match_info["kind"], request.match_info["guid"])
+        if not obj:
+            raise web.HTTPNotFound()
+        return obj
+
+    @staticmethod
+    def _created(obj):
+        return web.json_response(obj, status=201, headers={"Location": _self_link_of(obj)})
+
+    async def _create(self, request: web.Request):
+        return self._created(self.add(request.match_info["kind"], await request.json()))
+
+    async def _create_episode(self, request: web.Request):
+        payload = await request.json()
+        payload.setdefault("season", {"resId": f"{_RESID_BASES[KIND_SEASON]}/{request.match_info['serie_id']}"})
+        return self._created(self.add(KIND_EPISODE, payload))
+
+    async def _get(self, request: web.Request):
+        obj = self._existing(request)
+        etag = '"' + hashlib.sha1(json.dumps(obj, sort_keys=True).encode("utf-8")).hexdigest() + '"'
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers={"ETag": etag})
+        return web.json_response(obj, headers={"ETag": etag})
+
+    async def _update(self, request: web.Request):
+        obj = self._existing(request)
+        updates = await request.json()
+        for key, value in updates.items():
+            if key not in ("resId", "links", "type"):
+                obj[key] = value
+        obj["lastUpdated"] = _now()
+        return web.json_response(obj, headers={"Location": _self_link_of(obj)})
+
+    async def _replace(self, request: web.Request):
+        obj = self._existing(request)
+        replacement = await request.json()
+        kind = request.match_info["kind"]
+        kept = {k: v for k, v in obj.items() if k in ("resId", "links", "type", "subType", "created")}
+        if kind == KIND_TIMELINE:
+            item_type = _TIMELINE_ITEM_TYPES.get(replacement.get("type", obj.get("type")))
+            replacement["items"] = [self._new_child(x, "timelineItem", item_type) for x in
+                                    replacement.get("items", [])]
+            kept.pop("type")
+        obj.clear()
+        obj.update(replacement)
+        obj.update(kept)
+        obj["lastUpdated"] = _now()
+        return web.json_response(obj)
+
+    async def _delete(self, request: web.Request):
+        obj = self._existing(request)
+        obj["deleted"] = True
+        obj["lastUpdated"] = _now()
+        return web.Response(status=204)
+
+    async def _add_on_rel(self, request: web.Request):
+        obj = self._existing(request)
+        collection = request.match_info["collection"]
+        if collection not in _RELS.get(request.match_info["kind"], {}).values():
+            raise web.HTTPNotFound()
+        item = await request.json()
+        item_type = _TIMELINE_ITEM_TYPES.get(obj.get("type")) if collection == "items" else None
+        child = self._new_child(item, collection, item_type)
+        obj.setdefault(collection, []).append(child)
+        obj["lastUpdated"] = _now()
+        return web.json_response(child, status=201)
+
+    async def _resolve(self, request: web.Request):
+        obj = self.lookup(request.query.get("resId"))
+        if not obj:
+            raise web.HTTPNotFound()
+        return web.json_response(obj)
+
+    async def _references(self, request: web.Request):
+        ref_type = request.query.get("type")
+        value = request.query.get("reference")
+        found = [x for x in self.objects.values() if
+                 [r for r in x.get("references", []) if r.get("type") == ref_type and r.get("reference") == value]]
+        return web.json_response(_page(request, found))
+
+    async def _media_object_by_name(self, request: web.Request):
+        name = request.query.get("name")
+        found = [x for x in self._of_kind(KIND_MEDIA_OBJECT) if x.get("name") == name]
+        if not found:
+            raise web.HTTPNotFound()
+        return web.json_response(found[0])
+
+    async def _serie_by_title(self, request: web.Request):
+        title = request.query.get("title")
+        master_system = request.query.get("masterSystem")
+        found = [x for x in self._of_kind(KIND_SERIE) if
+                 x.get("title") == title and x.get("masterSystem") == master_system]
+        return web.json_response({"serie": found})
+
+    async def _like_query(self, request: web.Request):
+        like = request.query.get("like", "").strip("%").lower()
+        found = [self.reference_to(x) for x in self.objects.values() if like in x.get("title", "").lower()]
+        return web.json_response(_page(request, found))
+
+    async def _broadcast(self, request: web.Request):
+        form = await request.post()
+        self.broadcasts.append(dict(form))
+        return web.Response(status=202)
+
+    async def _reindex(self, request: web.Request):
+        if request.match_info["index_kind"] not in _INDEX_KINDS:
+            raise web.HTTPNotFound()
+        self.reindexed.append((request.match_info["index_kind"], request.match_info["guid"]))
+        return web.Response(text="OK")
+
+    async def _full_reindex(self, request: web.Request):
+        self.reindexed.append((request.match_info["type"], request.match_info["guid"]))
+        return web.Response(status=202)
+
+    async def _export(self, request: web.Request):
+        kind = _EXPORT_KINDS.get(request.match_info["export_kind"])
+        obj = self._find(kind, request.match_info["guid"]) if kind else None
+        if not obj:
+            raise web.HTTPNotFound()
+        return web.Response(text=json.dumps(obj), content_type="application/json")
+
+
+def _self_link_of(obj):
+    return next(x["href"] for x in obj["links"] if x["rel"] == "self")
+
+
+def _page(request: web.Request, found: list) -> list:
+    if "limit" not in request.query:
+        return found
+    offset = int(request.query.get("offset", 0))
+    return found[offset:offset + int(request.query["limit"])]
+
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc).isoformat()
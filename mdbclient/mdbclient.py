@@ -1,14 +1,40 @@
-import copy
+import contextlib
 import datetime
 import urllib.parse
 from abc import abstractmethod
 from enum import Enum
-from typing import Optional, Union, List, TypeVar, Generic
+from typing import Optional, Union, List, TypeVar, AsyncIterator, Iterable
 
 import backoff
 from aiohttp import ClientSession, ClientResponse, ClientPayloadError, ServerDisconnectedError, ClientOSError
 
+from mdbclient.aggregate_cache import PersistentAggregateCache, CachedAggregate
+from mdbclient.bulk import run_bounded
+from mdbclient.json_stream import JsonArrayDecoder
+from mdbclient.lookup_cache import LookupCache, reference_key, media_object_key, serie_key
+from mdbclient.mdb_ids import type_uri_of
+# The object model lives in mdbclient.model, which imports without the http stack. It is re-exported here
+from mdbclient.model import _links_of_sub_type, _child_links_of_sub_type, _link, _self_link, MdbLink, MdbLinks, T, \
+    ResourceReference, X, ResourceReferenceCollection, clone_for_create, BasicMdbObject, Reference, _reference_values, \
+    Timeline, RightsTimeline, IndexpointTimeline, GenealogyTimeline, GenealogyRightsTimeline, TechnicalTimeline, \
+    InternalTimeline, Contributor, EditorialObject, VersionGroup, MasterEO, MasterEOResource, Essence, MediaResource, \
+    MediaObject, PublicationMediaObject, PublicationEvent, create_response
 from mdbclient.relations import REL_ITEMS, REL_DOCUMENTS, REL_FORMATS
+from mdbclient.write_serializer import AggregateWriteSerializer
+
+# Explicit, so the model names imported above for compatibility count as part of this module
+__all__ = [
+    "AggregateGoneException", "BadRequest", "HttpReqException", "Http404", "Conflict", "StandardResponse",
+    "create_response_from_std_response", "RestApiUtil", "MdbChangeListener", "VoidChangeListener", "Change",
+    "RecordingChangeListener", "BroadcastResult", "MdbJsonApi", "MdbEnv", "MdbJsonMethodApi", "MdbClient",
+    # re-exported from mdbclient.model
+    "_links_of_sub_type", "_child_links_of_sub_type", "_link", "_self_link", "MdbLink", "MdbLinks", "T",
+    "ResourceReference", "X", "ResourceReferenceCollection", "clone_for_create", "BasicMdbObject", "Reference",
+    "_reference_values", "Timeline", "RightsTimeline", "IndexpointTimeline", "GenealogyTimeline",
+    "GenealogyRightsTimeline", "TechnicalTimeline", "InternalTimeline", "Contributor", "EditorialObject",
+    "VersionGroup", "MasterEO", "MasterEOResource", "Essence", "MediaResource", "MediaObject",
+    "PublicationMediaObject", "PublicationEvent", "create_response",
+]
 
 
 class AggregateGoneException(Exception):
@@ -45,514 +71,12 @@ class Conflict(Exception):
         self.message = message
 
 
-def _links_of_sub_type(links_list, sub_type):
-    return [x for x in links_list if x.get("subType") == sub_type]
-
-
-def _child_links_of_sub_type(owner, child_name, sub_type):
-    links_list = owner.get(child_name, [])
-    return _links_of_sub_type(links_list, sub_type)
-
-
-def _link(owner, rel):
-    links = owner.get("links", [])
-    rel_ = [x for x in links if x["rel"] == rel]
-    rel_item = next(iter(rel_), None)
-    if not rel_item:
-        raise Exception(f"could not find {rel} in {owner}")
-    return rel_item["href"]
-
-
-def _self_link(owner):
-    return _link(owner, "self")
-
-
-class MdbLink:
-    def __init__(self, link_node):
-        self.link = link_node
-
-    def __getitem__(self, key):
-        return self.link[key]
-
-    def rel(self):
-        return self.link.get("rel")
-
-    def type(self):
-        return self.link.get("type")
-
-    def href(self):
-        return self.link.get("href")
-
-    @staticmethod
-    def create(link_node) -> 'MdbLink':
-        if link_node:
-            return MdbLink(link_node)
-
-
-class MdbLinks:
-    def __init__(self, links_node):
-        self.links_node = links_node
-
-    def __len__(self):
-        return len(self.links_node)
-
-    def select_single(self, rel):
-        matching = [x for x in self.links_node if x.get("rel") == rel]
-        if len(matching) > 1:
-            raise Exception(f"Multiple links match rel={rel}")
-        if len(matching) == 0:
-            raise Exception(f"No links match rel={rel}")
-        return MdbLink.create(matching[0])
-
-    def self_link(self):
-        return self.select_single(rel="self")
-
-    @staticmethod
-    def create(links_node) -> 'MdbLinks':
-        if links_node:
-            return MdbLinks(links_node)
-
-
-T = TypeVar('T')
-
-
-class ResourceReference(Generic[T]):
-    def __init__(self, resource_reference):
-        self.resource_reference = resource_reference
-
-    def __getitem__(self, key):
-        return self.resource_reference[key]
-
-    def get(self, key, default=None):
-        return self.resource_reference.get(key, default)
-
-    def links(self) -> MdbLinks:
-        return MdbLinks.create(self.resource_reference.get("links"))
-
-    def is_type(self, main_type):
-        return self.resource_reference.get("type") == main_type
-
-    def is_subtype(self, sub_type):
-        return self.resource_reference.get("subType") == sub_type
-
-    @staticmethod
-    def create(node) -> 'ResourceReference[T]':
-        if node:
-            return ResourceReference(node)
-
-
-X = TypeVar('X')
-
-
-class ResourceReferenceCollection(Generic[X]):
-    def __init__(self, children, owner, collection_name):
-        self.children = children
-        self.owner = owner
-        self.collection_name = collection_name
-
-    def of_type(self, main_type) -> 'ResourceReferenceCollection[X]':
-        return ResourceReferenceCollection([x for x in self.children if x.get("type") == main_type], self.owner,
-                                           self.collection_name)
-
-    def of_subtype(self, sub_type) -> 'ResourceReferenceCollection[X]':
-        return ResourceReferenceCollection([x for x in self.children if x.get("subType") == sub_type], self.owner,
-                                           self.collection_name)
-
-    def first(self) -> ResourceReference[X]:
-        return ResourceReference.create(self.children[0]) if self.children else None
-
-    def __getitem__(self, key) -> ResourceReference[X]:
-        return ResourceReference.create(self.children[key])
-
-    def single(self) -> ResourceReference[X]:
-        if len(self.children) > 1:
-            raise Exception(f"Requested single element of {self.collection_name} from {self.owner.self_link()} "
-                            f"which has multiple elements")
-        if len(self.children) == 0:
-            raise Exception(f"Requested single element of an empty linkcollection")
-        return self.children[0]
-
-    def single_or_none(self) -> Optional[ResourceReference[X]]:
-        if len(self.children) > 1:
-            raise Exception(f"Requested single element of {self.collection_name} from {self.owner.self_link()} "
-                            f"which has multiple elements")
-        return self.first()
-
-    def __len__(self):
-        return len(self.children)
-
-
-def clone_for_create(item):
-    copy_ = copy.copy(item)
-    if "resId" in copy_:
-        del copy_["resId"]
-    if "links" in copy_:
-        del copy_["links"]
-    return copy_
-
-
-class BasicMdbObject(dict):
-
-    def __init__(self, dict_=..., **kwargs) -> None:
-        super().__init__(dict_, **kwargs)
-        self.resid = self.get("resId")
-
-    def self_link(self):
-        return _self_link(self)
-
-    def link(self, rel):
-        return _link(self, rel)
-
-    def links(self) -> MdbLinks:
-        return MdbLinks.create(self.get("links"))
-
-    def type(self) -> str:
-        return self.get("type")
-
-    def sub_type(self) -> str:
-        return self.get("subType")
-
-
-class Reference(BasicMdbObject):
-
-    def __init__(self, dict_=..., **kwargs) -> None:
-        super().__init__(dict_, **kwargs)
-        self.type: str = self.get("type")
-        self.reference: str = self.get("reference")
-
-    def int_value(self) -> Optional[int]:
-        if self.reference:
-            return int(self.reference)
-
-
-def _reference_values(meo, ref_type) -> List[Reference]:
-    references = meo.get("references", [])
-    return [Reference(x) for x in references if x.get("type") == ref_type]
-
-
-class Timeline(BasicMdbObject):
-    TIMELINE_ITEMTYPE_EXTRACTEDVERSIONTIMELINEITEM = \
-        'http://id.nrk.no/2017/mdb/timelineitem/ExtractedVersionTimelineItem'
-    TIMELINE_ITEMTYPE_EXPLOITATIONISSUETIMELINEITEM = \
-        'http://id.nrk.no/2017/mdb/timelineitem/ExploitationIssueTimelineItem'
-    TIMELINE_ITEMTYPE_GENERALRIGHTS = 'http://id.nrk.no/2017/mdb/timelineitem/GeneralRightsTimelineItem'
-    TIMELINE_ITEMTYPE_INDEXPOINTTIMELINEITEM = 'http://id.nrk.no/2017/mdb/timelineitem/IndexpointTimelineItem'
-    TIMELINE_ITEMTYPE_INTERNALTIMELINEITEM = 'http://id.nrk.no/2017/mdb/timelineitem/InternalTimelineItem'
-    TIMELINE_ITEMTYPE_TECHNICALTIMELINEITEM = 'http://id.nrk.no/2017/mdb/timelineitem/TechnicalTimelineItem'
-
-    def __init__(self, dict_=..., **kwargs) -> None:
-        super().__init__(dict_, **kwargs)
-        self.timeline_items = self.get("items", [])
-
-    def self_link(self):
-        return _self_link(self)
-
-    def filter_items(self, predicate):
-        return [x for x in self.get("items", []) if predicate(x)]
-
-    def select_items(self, *keyvalue_tuples):
-        def matches_field_exps(item):
-            for exp in keyvalue_tuples:
-                if not item.get(exp[0]) == exp[1]:
-                    return False
-            return True
-
-        res = [x for x in self.get("items", []) if matches_field_exps(x)]
-        return res
-
-    def select_single_item(self, *keyvalue_tuples):
-        items = self.select_items(*keyvalue_tuples)
-        if len(items) == 1:
-            return items[0]
-        if len(items) > 1:
-            msg = ",".join([f"{x[0]}={x[1]}]" for x in keyvalue_tuples])
-            raise Exception(f"Multiple elements found for {msg} in {self.resid}")
-
-    def find_item(self, res_id):
-        return self.select_single_item(("resId", res_id))
-
-    def find_by_title(self, title):
-        return self.select_single_item(("title", title))
-
-    def find_by_description(self, description):
-        return self.select_single_item(("description", description))
-
-    def find_index_points_by_title_and_offset(self, title, offset):
-        return self.select_items(("title", title), ("offset", offset))
-
-    def find_index_point_by_title_and_offset(self, title, offset):
-        return self.select_single_item(("title", title), ("offset", offset))
-
-    def find_index_points_by_offset_and_duration(self, offset, duration):
-        return self.select_items(("offset", offset), ("duration", duration))
-
-    def find_index_point_by_offset_and_duration(self, offset, duration):
-        return self.select_single_item(("offset", offset), ("duration", duration))
-
-    def find_index_point_by_offset(self, offset):
-        return self.select_single_item(("offset", offset))
-
-    def stabilize_order(self):
-        """
-        Provides a guaranteed stable order of values
-        """
-
-        self.get("subjects", []).sort(key=lambda x: x["title"])
-        self.get("spatials", []).sort(key=lambda x: x["name"])
-        self.get("contributors", []).sort(key=lambda x: x["contact"]["title"] + x["role"]["resId"])
-
-    def master_eo(self) -> ResourceReference['MasterEO']:
-        return ResourceReference.create(self.get("masterEO"))
-
-
-class RightsTimeline(Timeline):
-    TYPE = "http://id.nrk.no/2017/mdb/timelinetype/Rights"
-
-    def __init__(self, dict_=..., **kwargs) -> None:
-        super().__init__(dict_, **kwargs)
-        self["type"] = self.TYPE
-
-    def fulltimeline_item(self, type_):
-        return self.select_single_item(("appliesToFullTimeline", True), ("type", type_))
-
-    @staticmethod
-    def create(items) -> 'RightsTimeline':
-        return RightsTimeline({"items": items})
-
-
-class IndexpointTimeline(Timeline):
-    TYPE = "http://id.nrk.no/2017/mdb/timelinetype/IndexPoints"
-
-    def __init__(self, dict_=..., **kwargs) -> None:
-        super().__init__(dict_, **kwargs)
-        self["type"] = self.TYPE
-
-
-class GenealogyTimeline(Timeline):
-    TYPE = "http://id.nrk.no/2017/mdb/timelinetype/Genealogy"
-
-    def __init__(self, dict_=..., **kwargs) -> None:
-        super().__init__(dict_, **kwargs)
-        self["type"] = self.TYPE
-
-
-class GenealogyRightsTimeline(Timeline):
-    TYPE = "http://id.nrk.no/2017/mdb/timelinetype/GenealogyRights"
-
-    def __init__(self, dict_=..., **kwargs) -> None:
-        super().__init__(dict_, **kwargs)
-        self["type"] = self.TYPE
-
-
-class TechnicalTimeline(Timeline):
-    TYPE = "http://id.nrk.no/2017/mdb/timelinetype/Technical"
-
-    def __init__(self, dict_=..., **kwargs) -> None:
-        super().__init__(dict_, **kwargs)
-        self["type"] = self.TYPE
-
-    def find_index_points_by_event(self, event_):
-        return self.select_items(("event", event_))
-
-    def find_index_points_by_event_and_offset(self, event_, offset):
-        return self.select_items(("event", event_), ("offset", offset))
-
-    def find_index_point_by_event_and_offset(self, event, offset):
-        matching = self.find_index_points_by_event_and_offset(event, offset)
-        if len(matching) > 1:
-            raise Exception(f"More than one index point found for event={event} offset={offset}")
-        if matching:
-            return matching[0]
-
-
-class InternalTimeline(Timeline):
-    TYPE = "http://id.nrk.no/2017/mdb/timelinetype/Internal"
-
-    def __init__(self, dict_=..., **kwargs) -> None:
-        super().__init__(dict_, **kwargs)
-        self["type"] = self.TYPE
-
-    def find_index_points_by_subtype_offset_duration(self, subtype, offset, duration):
-        return self.select_items(("subType", subtype), ("offset", offset), ("duration", duration))
-
-    def find_index_point_by_sybtype_offset_duration(self, subtype, offset, duration):
-        matching = self.find_index_points_by_subtype_offset_duration(subtype, offset, duration)
-        if len(matching) > 1:
-            raise Exception(
-                f"More than one index point found for subtype={subtype}, offset={offset} "
-                f"duration={duration} in {self.self_link()}")
-        if matching:
-            return matching[0]
-
-
-class Contributor(dict):
-    def __init__(self, dict_=..., **kwargs) -> None:
-        super().__init__(dict_, **kwargs)
-        self.resId = dict_.get("resId")
-        self.contact = dict_.get("contact", {})
-        self.role = dict_.get("role", {})
-        self.characterName = dict_.get("characterName")
-        self.capacity = dict_.get("capacity")
-        self.comment = dict_.get("comment")
-
-    def key(self):
-        return f"CT={self.contact.get('title')},T={self.role.get('title')},R={self.role.get('resId')},C={self.contact.get('resId')},CAP={self.capacity}"
-
-    @staticmethod
-    def unique(contributors: List['Contributor']) -> List['Contributor']:
-        res = []
-        seen = set()
-        for x in contributors:
-            if (key := x.key()) not in seen:
-                seen.add(key)
-                res.append(x)
-        return res
-
-
-class EditorialObject(BasicMdbObject):
-
-    def __init__(self, dict_=..., **kwargs) -> None:
-        super().__init__(dict_, **kwargs)
-        self.resid = self.get("resId")
-
-    def contributors(self) -> List[Contributor]:
-        contrs = self.get("contributors", [])
-        return [Contributor(x) for x in contrs]
-
-    def references(self, ref_type) -> List[Reference]:
-        return _reference_values(self, ref_type)
-
-    def reference(self, ref_type) -> Optional[Reference]:
-        found = self.references(ref_type)
-        if not found:
-            return
-        if len(found) > 1:
-            raise Exception(f"Multiple refs of type {ref_type} in {_self_link(self)}")
-        return found[0]
-
-    def reference_value(self, ref_type) -> Optional[str]:
-        found = self.reference(ref_type)
-        if not found:
-            return
-        return found.reference
-
-    def reference_int_value(self, ref_type) -> Optional[int]:
-        found = self.reference(ref_type)
-        if not found:
-            return
-        return int(found.reference)
-
-    def _reference_collection(self, collection_name) -> ResourceReferenceCollection:
-        result = self.get(collection_name, [])
-        return ResourceReferenceCollection(result, self, collection_name)
-
-
-class VersionGroup(BasicMdbObject):
-    def __init__(self, dict_=..., **kwargs) -> None:
-        super().__init__(dict_, **kwargs)
-
-    def metadata_meo(self) -> ResourceReference['MasterEO']:
-        return ResourceReference.create(self.get("metadataMeo"))
-
-
-class MasterEO(EditorialObject):
-    def __init__(self, dict_=..., **kwargs) -> None:
-        super().__init__(dict_, **kwargs)
-
-    def media_objects(self) -> ResourceReferenceCollection['MediaObject']:
-        return self._reference_collection("mediaObjects")
-
-    def publications(self) -> ResourceReferenceCollection['PublicationEvent']:
-        return self._reference_collection("publications")
-
-    def timelines(self) -> ResourceReferenceCollection[Timeline]:
-        return self._reference_collection("timelines")
-
-    def version_group(self) -> ResourceReference[VersionGroup]:
-        return ResourceReference.create(self.get("versionGroup"))
-
-    def has_subject_with_title(self, subject: str, case_sensitive=True):
-        if case_sensitive:
-            return [sub for sub in self.get("subjects", []) if sub.get("title") == subject]
-        else:
-            subject = subject.lower()
-            return [sub for sub in self.get("subjects", []) if sub.get("title", "").lower() == subject]
-
-
-class MasterEOResource(EditorialObject):
-    def __init__(self, dict_=..., **kwargs) -> None:
-        super().__init__(dict_, **kwargs)
-
-
-class Essence(BasicMdbObject):
-
-    def __init__(self, dict_=..., **kwargs) -> None:
-        super().__init__(dict_, **kwargs)
-
-    def composed_of(self) -> ResourceReference['MediaResource']:
-        return ResourceReference.create(self.get("composedOf"))
-
-    def playout_of(self) -> ResourceReference['PublicationMediaObject']:
-        return ResourceReference.create(self.get("playoutOf"))
-
-
-class MediaResource(BasicMdbObject):
-
-    def __init__(self, dict_=..., **kwargs) -> None:
-        super().__init__(dict_, **kwargs)
-
-    def media_object(self) -> ResourceReference['MediaObject']:
-        return ResourceReference.create(self.get("mediaObject"))
-
-    def essences(self) -> ResourceReferenceCollection[Essence]:
-        return self._reference_collection("essences")
-
-    def matching_locators(self, identifier, storageType):
-        return [x for x in self.get("locators") if
-                x.get("identifier") == identifier and x.get("storageType", {}).get("resId") == storageType]
-
-
-class MediaObject(BasicMdbObject):
-
-    def __init__(self, dict_=..., **kwargs) -> None:
-        super().__init__(dict_, **kwargs)
-
-    def media_resources(self) -> ResourceReferenceCollection[MediaResource]:
-        return self._reference_collection("resources")
-
-    def published_versions(self) -> ResourceReferenceCollection['PublicationMediaObject']:
-        return self._reference_collection("publishedVersions")
-
-    def master_eo(self) -> ResourceReference['MasterEO']:
-        return ResourceReference.create(self.get("masterEO"))
-
-
-class PublicationMediaObject(BasicMdbObject):
-
-    def __init__(self, dict_=..., **kwargs) -> None:
-        super().__init__(dict_, **kwargs)
-
-    def playouts(self) -> ResourceReferenceCollection[Essence]:
-        return self._reference_collection("playouts")
-
-    def published_version_of(self) -> ResourceReference[MediaObject]:
-        return ResourceReference.create(self.get("publishedVersionOf"))
-
-
-class PublicationEvent(EditorialObject):
-
-    def __init__(self, dict_=..., **kwargs) -> None:
-        super().__init__(dict_, **kwargs)
-
-    def pmos(self) -> ResourceReferenceCollection:
-        return self._reference_collection("pmos")
-
-
 class StandardResponse(object):
-    def __init__(self, requested_uri, response: dict, status, location=None):
+    def __init__(self, requested_uri, response: dict, status, location=None, etag=None):
         self.response = response
         self.status = status
         self.location = location
+        self.etag = etag
         self.requested_uri = requested_uri
 
     def __iter__(self):
@@ -573,46 +97,6 @@ def create_response_from_std_response(std_response: StandardResponse) -> Union[
     return create_response(std_response.response)
 
 
-def create_response(response) -> \
-        Union[
-            MasterEO, PublicationMediaObject, MediaObject, MediaResource, Essence, PublicationEvent, InternalTimeline,
-            GenealogyTimeline, IndexpointTimeline, TechnicalTimeline, RightsTimeline, GenealogyRightsTimeline,
-            VersionGroup,MasterEOResource]:
-    type_ = response.get("type")
-    if not type_:
-        return response
-
-    if type_ == "http://id.nrk.no/2016/mdb/types/MasterEditorialObject":
-        return MasterEO(response)
-    if type_ == "http://id.nrk.no/2016/mdb/types/MediaObject":
-        return MediaObject(response)
-    if type_ == "http://id.nrk.no/2016/mdb/types/PublicationMediaObject":
-        return PublicationMediaObject(response)
-    if type_ == "http://id.nrk.no/2016/mdb/types/MediaResource":
-        return MediaResource(response)
-    if type_ == "http://id.nrk.no/2016/mdb/types/Essence":
-        return Essence(response)
-    if type_ == "http://id.nrk.no/2016/mdb/types/PublicationEvent":
-        return PublicationEvent(response)
-    if type_ == "http://id.nrk.no/2016/mdb/types/VersionGroup":
-        return VersionGroup(response)
-    if type_ == "http://id.nrk.no/2016/mdb/types/MasterEOResource":
-        return MasterEOResource(response)
-    if type_ == InternalTimeline.TYPE:
-        return InternalTimeline(response)
-    if type_ == GenealogyTimeline.TYPE:
-        return GenealogyTimeline(response)
-    if type_ == IndexpointTimeline.TYPE:
-        return IndexpointTimeline(response)
-    if type_ == TechnicalTimeline.TYPE:
-        return TechnicalTimeline(response)
-    if type_ == RightsTimeline.TYPE:
-        return RightsTimeline(response)
-    if type_ == GenealogyRightsTimeline.TYPE:
-        return GenealogyRightsTimeline(response)
-    raise Exception(f"Dont know how to create response for {type_}")
-
-
 # server scope. Has no request specific state
 # Use https://pypi.org/project/backoff-async/ to handle retries
 class RestApiUtil(object):
@@ -662,20 +146,44 @@ class RestApiUtil(object):
         await RestApiUtil.__raise_errors(response, request_uri, request_payload, headers, uri_params)
         return StandardResponse(request_uri,
                                 await RestApiUtil.__unpack_response_content(request_uri, response, headers, uri_params),
-                                response.status)
+                                response.status, etag=response.headers.get("ETag"))
 
-    async def http_get(self, uri, headers=None, uri_params=None) -> StandardResponse:
+    async def http_get(self, uri, headers=None, uri_params=None, if_none_match=None) -> StandardResponse:
+        """
+        With if_none_match set this is a conditional get, an unchanged resource gives status 304 and no response
+        """
+        if if_none_match:
+            headers = {**headers, "If-None-Match": if_none_match} if headers else {"If-None-Match": if_none_match}
         async with self.session.get(uri, params=uri_params, headers=headers) as response:
+            if response.status == 304:
+                return StandardResponse(uri, None, 304, etag=if_none_match)
             return await RestApiUtil.__unpack_json_response(response, uri, headers, uri_params)
 
     async def raw_http_get(self, uri, headers=None, uri_params=None) -> str:
         async with self.session.get(uri, params=uri_params, headers=headers) as response:
             return await response.text()
 
+    async def checked_raw_http_get(self, uri, headers=None, uri_params=None) -> str:
+        """
+        Like raw_http_get, but raises on error statuses
+        """
+        async with self.session.get(uri, params=uri_params, headers=headers) as response:
+            await RestApiUtil.__raise_errors(response, uri, None, headers, uri_params)
+            return await response.text()
+
     async def http_get_text(self, uri, headers=None, uri_params=None) -> StandardResponse:
         async with self.session.get(uri, params=uri_params, headers=headers) as response:
             return await RestApiUtil.__unpack_json_response(response, uri, headers, uri_params)
 
+    async def http_get_stream(self, uri, headers=None, uri_params=None, chunk_size=65536) -> AsyncIterator[bytes]:
+        """
+        Yields the response body in chunks of at most chunk_size bytes, without holding the whole body in memory
+        """
+        async with self.session.get(uri, params=uri_params, headers=headers) as response:
+            await RestApiUtil.__raise_errors(response, uri, None, headers, uri_params)
+            async for chunk in response.content.iter_chunked(chunk_size):
+                yield chunk
+
     async def http_get_no_redirect(self, uri, headers=None, uri_params=None) -> ClientResponse:
         async with self.session.get(uri, params=uri_params, headers=headers, allow_redirects=False) as response:
             return response
@@ -718,6 +226,17 @@ def _res_id(mdb_object):
     return {"resId": mdb_object["resId"]}
 
 
+def _owner_key(owner) -> Optional[str]:
+    """
+    The key writes to owner are queued on. owner is an mdb object or a resId
+    """
+    if not owner:
+        return None
+    if isinstance(owner, str):
+        return owner
+    return owner.get("resId") or _self_link(owner)
+
+
 def _check_if_lock(exc: HttpReqException):
     if not hasattr(exc, "message"):
         return False
@@ -800,7 +319,22 @@ class RecordingChangeListener(MdbChangeListener):
         self.changes.append(Change(resId, "CREATE", topic, add))
 
     def on_delete(self, resId):
-        self.changes.append(Change(resId, "DELETE"))
+        self.changes.append(Change(resId, "DELETE", None, None))
+
+
+class BroadcastResult:
+    def __init__(self, res_id, type_=None, response=None, error: Exception = None, resolved=False):
+        self.res_id = res_id
+        self.type = type_
+        self.response = response
+        self.error = error
+        self.resolved = resolved
+
+    def is_successful(self):
+        return self.error is None
+
+    def __str__(self) -> str:
+        return f"{self.res_id} {self.type} {'OK' if self.is_successful() else self.error}"
 
 
 class MdbJsonApi(object):
@@ -842,6 +376,9 @@ class MdbJsonApi(object):
         self.force_host = force_host
         self.force_scheme = force_scheme
         self.change_listener = VoidChangeListener()
+        self.lookup_cache: Optional[LookupCache] = None
+        self.aggregate_cache: Optional[PersistentAggregateCache] = None
+        self.write_serializer: Optional[AggregateWriteSerializer] = None
         self.rest_api_util = RestApiUtil(session)
 
     @staticmethod
@@ -874,6 +411,56 @@ class MdbJsonApi(object):
         reloaded = await self.rest_api_util.http_get(link, self._merged_headers(headers))
         return reloaded.response
 
+    async def _get_aggregate(self, self_link, headers=None) -> {}:
+        """
+        Gets the aggregate at self_link, through the aggregate cache if there is one
+        """
+        if self.aggregate_cache is None:
+            return await self._do_get(self._rewritten_link(self_link), headers)
+        return await self._revalidated(self.aggregate_cache.by_link(self_link), self_link, headers)
+
+    async def _revalidated(self, entry: Optional[CachedAggregate], self_link, headers=None) -> {}:
+        cache = self.aggregate_cache
+        if entry is not None and cache.is_fresh(entry):
+            cache.hits += 1
+            return entry.json()
+        generation = cache.generation()
+        try:
+            response = await self.rest_api_util.http_get(self._rewritten_link(self_link), self._merged_headers(headers),
+                                                         if_none_match=entry.etag if entry else None)
+        except (Http404, AggregateGoneException):
+            cache.invalidate(self_link=self_link)
+            raise
+        if response.status == 304:
+            cache.revalidated += 1
+            cache.touch(entry)
+            return entry.json()
+        cache.misses += 1
+        cache.put(response.response, self_link, response.etag, generation)
+        return response.response
+
+    @contextlib.asynccontextmanager
+    async def _write_to(self, owner_key):
+        """
+        Queues the write behind other writes to the same aggregate when there is a write serializer
+        """
+        if self.write_serializer is None or not owner_key:
+            yield
+            return
+        async with self.write_serializer.serialize(owner_key):
+            try:
+                yield
+            except HttpReqException as e:
+                if _check_if_lock(e):
+                    self.write_serializer.stats.lock_failures += 1
+                raise
+
+    def _invalidate_cached(self, res_id):
+        if self.aggregate_cache is not None and res_id:
+            self.aggregate_cache.invalidate(res_id=res_id)
+        if self.lookup_cache is not None and res_id:
+            self.lookup_cache.invalidate_res_id(res_id)
+
     async def _do_post_follow(self, link, updates, headers=None) -> {}:
         updated = await self.rest_api_util.http_post_follow(link, updates, self._merged_headers(headers))
         return updated.response
@@ -946,17 +533,33 @@ class MdbJsonMethodApi(MdbJsonApi):
         real_method = self.__api_method(name)
         return await self.rest_api_util.raw_http_get(real_method, headers=headers, uri_params=parameters)
 
+    def _invoke_stream_get_method(self, name, parameters, headers=None, chunk_size=65536) -> AsyncIterator[bytes]:
+        real_method = self.__api_method(name)
+        return self.rest_api_util.http_get_stream(real_method, self._merged_headers(headers), parameters, chunk_size)
+
     async def _invoke_get_method_std_response(self, name, parameters, headers=None) -> StandardResponse:
         real_method = self.__api_method(name)
         return await self.rest_api_util.http_get(real_method, self._merged_headers(headers), parameters)
 
-    async def _invoke_create_method(self, method_name, payload, headers=None) -> {}:
+    async def _invoke_create_method(self, method_name, payload, headers=None, owner=None) -> {}:
+        """
+        owner is the object the new one is created under, with a write serializer the create is queued behind
+        other writes to it
+        """
         real_method = self.__api_method(method_name)
-        stdresponse = await self.rest_api_util.http_post_follow(real_method, payload, self._merged_headers(headers))
+        async with self._write_to(_owner_key(owner)):
+            stdresponse = await self.rest_api_util.http_post_follow(real_method, payload,
+                                                                    self._merged_headers(headers))
         response = stdresponse.response
         resId = response.get("resId") if response else None
         type = response.get("type") if response else None
         self.change_listener.on_create(resId, type if type else method_name, payload)
+        if self.lookup_cache is not None:
+            self.lookup_cache.invalidate_for_payload(payload)
+        # The owners of the new object get a back reference to it
+        for value in payload.values() if isinstance(payload, dict) else []:
+            if isinstance(value, dict):
+                self._invalidate_cached(value.get("resId"))
         return response
 
 
@@ -989,7 +592,9 @@ class MdbClient(MdbJsonMethodApi):
 
     async def __add_on_rel(self, owner, rel, payload, headers=None):
         link = self._rewritten_link(_link(owner, rel))
-        response = await self._do_post(link, payload, headers)
+        async with self._write_to(_owner_key(owner)):
+            response = await self._do_post(link, payload, headers)
+        self._invalidate_cached(owner.get("resId"))
         self.change_listener.on_add(owner.get("resId"), rel, payload)
         return response
 
@@ -1000,7 +605,13 @@ class MdbClient(MdbJsonMethodApi):
 
     async def __replace_content(self, owner, payload, headers=None) -> dict:
         link = self._rewritten_link(_self_link(owner))
-        return await self._do_put(link, payload, headers)
+        async with self._write_to(_owner_key(owner)):
+            response = await self._do_put(link, payload, headers)
+        # after the write; a read that fetched the old state meanwhile is refused by the cache generation
+        self._invalidate_cached(owner.get("resId"))
+        if self.lookup_cache is not None:
+            self.lookup_cache.invalidate_for_payload(payload)
+        return response
 
     @backoff.on_exception(backoff.expo, HttpReqException, max_time=60, giveup=_check_if_not_lock)
     async def create_master_eo(self, master_eo, headers=None) -> MasterEO:
@@ -1009,18 +620,18 @@ class MdbClient(MdbJsonMethodApi):
     @backoff.on_exception(backoff.expo, HttpReqException, max_time=60, giveup=_check_if_not_lock)
     async def create_media_object(self, master_eo, media_object, headers=None) -> MediaObject:
         media_object["masterEO"] = _res_id(master_eo)
-        return create_response(await self._invoke_create_method("mediaObject", media_object, headers))
+        return create_response(await self._invoke_create_method("mediaObject", media_object, headers, master_eo))
 
     @backoff.on_exception(backoff.expo, HttpReqException, max_time=60, giveup=_check_if_not_lock)
     async def create_media_resource(self, media_object, media_resource, headers=None) -> MediaResource:
         media_resource["mediaObject"] = _res_id(media_object)
-        return create_response(await self._invoke_create_method("mediaResource", media_resource, headers=headers))
+        return create_response(await self._invoke_create_method("mediaResource", media_resource, headers, media_object))
 
     @backoff.on_exception(backoff.expo, HttpReqException, max_time=60, giveup=_check_if_not_lock)
     async def create_essence(self, publication_media_object, media_resource, essence, headers=None) -> Essence:
         essence["composedOf"] = _res_id(media_resource)
         essence["playoutOf"] = _res_id(publication_media_object)
-        return create_response(await self._invoke_create_method("essence", essence, headers))
+        return create_response(await self._invoke_create_method("essence", essence, headers, media_resource))
 
     async def create_rights_timeline(self, master_eo, timeline, headers=None, shallow=False) -> RightsTimeline:
         if type := timeline.get("type"):
@@ -1039,7 +650,7 @@ class MdbClient(MdbJsonMethodApi):
             items = timeline.get("items")
             del timeline["items"]
         try:
-            return create_response(await self._invoke_create_method("timeline", timeline, headers))
+            return create_response(await self._invoke_create_method("timeline", timeline, headers, master_eo))
         finally:
             if shallow and items:
                 timeline["items"] = items
@@ -1055,6 +666,8 @@ class MdbClient(MdbJsonMethodApi):
 
     @backoff.on_exception(backoff.expo, HttpReqException, max_time=60, giveup=_check_if_not_lock)
     async def add_reference(self, owner, reference, headers=None):
+        if self.lookup_cache is not None:
+            self.lookup_cache.invalidate(reference_key(reference.get("type"), reference.get("reference")))
         return await self.__add_on_rel(owner, "http://id.nrk.no/2016/mdb/relation/references", reference, headers)
 
     @backoff.on_exception(backoff.expo, HttpReqException, max_time=60, giveup=_check_if_not_lock)
@@ -1074,18 +687,47 @@ class MdbClient(MdbJsonMethodApi):
         return await self.__add_on_rel(version_group, "temprel:migrateMetadata", {}, headers)
 
     @backoff.on_exception(backoff.expo, HttpReqException, max_time=60, giveup=_check_if_not_lock)
-    async def broadcast_change(self, destination, resid, headers=None):
-        resolved = await self.resolve(resid)
+    async def __post_change(self, destination, resid, type_, headers=None):
         payload = {
             "destination": destination,
             "resId": resid,
-            "type": resolved["type"]
+            "type": type_
         }
         real_method = self._api_method("changes/by-resid")
         headers = {**{"content-type": "application/x-www-form-urlencoded"}, **self._merged_headers(headers)}
         stdresponse = await self.rest_api_util.http_post_form(real_method, payload, headers)
         return stdresponse.response
 
+    async def broadcast_change(self, destination, resid, headers=None):
+        resolved = await self.resolve(resid)
+        return await self.__post_change(destination, resid, resolved["type"], headers)
+
+    async def broadcast_changes(self, destination, resids: Iterable[str], concurrency=8,
+                                headers=None) -> List[BroadcastResult]:
+        """
+        Broadcasts many aggregates. The type is taken from the resId where possible, only resIds that cannot be
+        classified locally are resolved. Returns one result per resId, in input order; failures are reported
+        in the result rather than raised.
+        """
+        indexed = list(enumerate(resids))
+        results: List[Optional[BroadcastResult]] = [None] * len(indexed)
+
+        async def broadcast(item):
+            idx, resid = item
+            result = BroadcastResult(resid)
+            try:
+                result.type = type_uri_of(resid)
+                if not result.type:
+                    result.resolved = True
+                    result.type = (await self.resolve(resid))["type"]
+                result.response = await self.__post_change(destination, resid, result.type, headers)
+            except Exception as e:
+                result.error = e
+            results[idx] = result
+
+        await run_bounded(indexed, concurrency, broadcast)
+        return results
+
     @backoff.on_exception(backoff.expo, HttpReqException, max_time=60, giveup=_check_if_not_lock)
     async def full_reindex_single(self, type_, guid, headers=None):
         real_method = self._api_method(f"admin/mdbIndex/fullreindexsingle/{type_}/{guid}")
@@ -1097,8 +739,7 @@ class MdbClient(MdbJsonMethodApi):
     async def __reindex_item(self, uri_part, guid, headers=None) -> str:
         real_method = self._api_method(f"admin/mdbIndex/{uri_part}/{guid}")
         headers = {**{"content-type": "application/x-www-form-urlencoded"}, **self._merged_headers(headers)}
-        stdresponse = await self.rest_api_util.raw_http_get(real_method, headers=headers)
-        return stdresponse
+        return await self.rest_api_util.checked_raw_http_get(real_method, headers=headers)
 
     async def reindex_meo(self, guid, headers=None):
         return await self.__reindex_item("masterEOs", guid, headers=headers)
@@ -1127,6 +768,41 @@ class MdbClient(MdbJsonMethodApi):
         stdresponse = await self.rest_api_util.http_get(real_method, headers, {"like": like})
         return stdresponse.response
 
+    async def iter_like_query(self, like, page_size: int = None, headers=None) -> AsyncIterator:
+        """
+        Like like_query, but decodes the result while it streams in and yields typed objects one at a time
+        """
+        async for element in self._iter_json_array("admin/events/likeQuery", {"like": like}, page_size, headers):
+            yield create_response(element)
+
+    async def _iter_json_array(self, method_name, parameters, page_size: int = None, headers=None) -> AsyncIterator:
+        """
+        Yields the elements of the json array returned by an api method, decoding the body incrementally.
+
+        With page_size the result is fetched in pages using offset and limit parameters. A server that does not
+        page is detected when it returns more than page_size elements, or repeats the first page.
+        """
+        offset = 0
+        first_element = None
+        while True:
+            page_parameters = {**parameters, "offset": offset, "limit": page_size} if page_size else parameters
+            decoder = JsonArrayDecoder()
+            count = 0
+            async for chunk in self._invoke_stream_get_method(method_name, page_parameters, headers):
+                for element in decoder.feed(chunk):
+                    if count == 0 and offset > 0 and element == first_element:
+                        return
+                    if count == 0 and offset == 0:
+                        first_element = element
+                    count += 1
+                    yield element
+            for element in decoder.close():
+                count += 1
+                yield element
+            if not page_size or count != page_size:
+                return
+            offset += count
+
     @backoff.on_exception(backoff.expo, HttpReqException, max_time=60, giveup=_check_if_not_lock)
     async def create_or_replace_timeline(self, master_eo, timeline, headers=None) -> Timeline:
         type_of_timeline = timeline["Type"]
@@ -1136,7 +812,7 @@ class MdbClient(MdbJsonMethodApi):
             return create_response(
                 await self.replace_timeline(master_eo, existing_timeline_of_same_type, timeline, headers))
         else:
-            return create_response(await self._invoke_create_method("timeline", timeline, headers))
+            return create_response(await self._invoke_create_method("timeline", timeline, headers, master_eo))
 
     @backoff.on_exception(backoff.expo, HttpReqException, max_time=60, giveup=_check_if_not_lock)
     async def add_timeline_item(self, timeline, item, headers=None):
@@ -1156,7 +832,8 @@ class MdbClient(MdbJsonMethodApi):
         if not publication_event:
             raise Exception("Cannot create an empty publication event")
         publication_event["publishes"] = _res_id(master_eo)
-        return create_response(await self._invoke_create_method("publicationEvent", publication_event, headers))
+        return create_response(await self._invoke_create_method("publicationEvent", publication_event, headers,
+                                                                  master_eo))
 
     @backoff.on_exception(backoff.expo, HttpReqException, max_time=60, giveup=_check_if_not_lock)
     async def create_publication_media_object(self, publication_event, media_object, publication_media_object,
@@ -1164,13 +841,16 @@ class MdbClient(MdbJsonMethodApi):
         publication_media_object["publicationEvent"] = _res_id(publication_event)
         publication_media_object["publishedVersionOf"] = _res_id(media_object)
         return create_response(
-            await self._invoke_create_method("publicationMediaObject", publication_media_object, headers))
+            await self._invoke_create_method("publicationMediaObject", publication_media_object, headers,
+                                             publication_event))
 
     @backoff.on_exception(backoff.expo, HttpReqException, max_time=60, giveup=_check_if_not_lock)
     async def open_url(self, url, headers=None) -> Optional[
         Union[MasterEO, PublicationMediaObject, MediaObject, MediaResource, Essence, PublicationEvent,
               InternalTimeline, GenealogyTimeline, IndexpointTimeline, TechnicalTimeline, RightsTimeline,
               GenealogyRightsTimeline, MasterEOResource]]:
+        if self.aggregate_cache is not None:
+            return create_response(await self._get_aggregate(url, headers))
         resp = await self._open_url(url)
         return create_response(resp.response)
 
@@ -1185,6 +865,8 @@ class MdbClient(MdbJsonMethodApi):
             return
         parameters = {'resId': res_id}
         try:
+            if self.aggregate_cache is not None:
+                return create_response(await self.__resolve_cached(res_id, headers))
             return create_response_from_std_response(
                 await self._invoke_get_method_std_response("resolve", parameters, headers))
         except Http404:
@@ -1192,6 +874,18 @@ class MdbClient(MdbJsonMethodApi):
                 return None
             raise
 
+    async def __resolve_cached(self, res_id: str, headers: dict = None) -> dict:
+        entry = self.aggregate_cache.by_res_id(res_id)
+        if entry is not None:
+            return await self._revalidated(entry, entry.self_link, headers)
+        generation = self.aggregate_cache.generation()
+        response = await self._invoke_get_method_std_response("resolve", {'resId': res_id}, headers)
+        if not response.is_successful() or isinstance(response.response, str):
+            raise Exception(f"Http {response.status} for {response.requested_uri}:\n{str(response.response)}")
+        self.aggregate_cache.misses += 1
+        self.aggregate_cache.put(response.response, etag=response.etag, generation=generation)
+        return response.response
+
     @backoff.on_exception(backoff.expo, ClientOSError, max_time=120)
     @backoff.on_exception(backoff.expo, HttpReqException, max_time=120, giveup=_check_if_not_lock)
     @backoff.on_exception(backoff.expo, ServerDisconnectedError, max_time=120)
@@ -1199,16 +893,25 @@ class MdbClient(MdbJsonMethodApi):
         meo = await self.resolve(res_id, headers=headers)
         if not isinstance(meo, MasterEO):
             raise Exception(f"{res_id} resolves to a {meo.type()}, which we dont know how to meo")
-        if not meo.get("isMetadataMeo"):
-            vg = await self.open(meo.version_group(), headers)
-            return await self.open(vg.metadata_meo(), headers)
+        if meo.get("isMetadataMeo"):
+            return meo
+        vg = await self.open(meo.version_group(), headers)
+        return await self.open(vg.metadata_meo(), headers)
 
     @backoff.on_exception(backoff.expo, HttpReqException, max_time=60, giveup=_check_if_not_lock)
     async def find_media_object(self, name, headers: dict = None) -> Optional[MediaObject]:
+        key = media_object_key(name)
+        if self.lookup_cache is not None:
+            hit, cached = self.lookup_cache.get(key)
+            if hit:
+                return create_response(cached) if cached else None
         try:
-            return create_response(await self._invoke_get_method("mediaObject/by-name", {"name": name}, headers))
+            response = await self._invoke_get_method("mediaObject/by-name", {"name": name}, headers)
         except Http404:
-            pass
+            response = None
+        if self.lookup_cache is not None:
+            self.lookup_cache.put(key, response)
+        return create_response(response) if response else None
 
     @backoff.on_exception(backoff.expo, HttpReqException, max_time=60, giveup=_check_if_not_lock)
     async def export_publication_event(self, aggregate_identifier, headers: dict = None) -> str:
@@ -1226,14 +929,29 @@ class MdbClient(MdbJsonMethodApi):
         except Http404:
             pass
 
+    def stream_export_publication_event(self, aggregate_identifier, headers: dict = None,
+                                        chunk_size=65536) -> AsyncIterator[bytes]:
+        """
+        Like export_publication_event, but yields the export in chunks. Raises Http404 for unknown aggregates
+        """
+        return self._invoke_stream_get_method("admin/mdbExport/publicationEvents/" + aggregate_identifier, {},
+                                              headers, chunk_size)
+
+    def stream_export_master_eo(self, aggregate_identifier, headers: dict = None,
+                                chunk_size=65536) -> AsyncIterator[bytes]:
+        """
+        Like export_master_eo, but yields the export in chunks. Raises Http404 for unknown aggregates
+        """
+        return self._invoke_stream_get_method("admin/mdbExport/masterEOs/" + aggregate_identifier, {}, headers,
+                                              chunk_size)
+
     @backoff.on_exception(backoff.expo, ClientOSError, max_time=120, giveup=_check_if_not_lock)
     @backoff.on_exception(backoff.expo, HttpReqException, max_time=60, giveup=_check_if_not_lock)
     async def reference(self, ref_type, value, headers=None) -> \
             List[Union[MasterEO, PublicationMediaObject, MediaObject, MediaResource, Essence, PublicationEvent,
                        InternalTimeline, GenealogyTimeline, IndexpointTimeline, TechnicalTimeline, RightsTimeline,
                        GenealogyRightsTimeline,MasterEOResource]]:
-        responses = await self._invoke_get_method("references", {'type': ref_type, 'reference': value}, headers)
-        return [create_response(x) for x in responses]
+        return [create_response(x) for x in await self.__references(ref_type, value, headers)]
 
     @backoff.on_exception(backoff.expo, ClientOSError, max_time=120, giveup=_check_if_not_lock)
     @backoff.on_exception(backoff.expo, HttpReqException, max_time=60, giveup=_check_if_not_lock)
@@ -1241,13 +959,49 @@ class MdbClient(MdbJsonMethodApi):
             Union[MasterEO, PublicationMediaObject, MediaObject, MediaResource, Essence, PublicationEvent,
                   InternalTimeline, GenealogyTimeline, IndexpointTimeline, TechnicalTimeline, RightsTimeline,
                   GenealogyRightsTimeline, None]:
-        resp = await self._invoke_get_method("references", {'type': ref_type, 'reference': value}, headers)
+        resp = await self.__references(ref_type, value, headers)
         if resp:
             if len(resp) > 1:
                 raise Exception(f"Multiple elements found when resolving {ref_type}={value}:{resp}")
-            return await self.open(resp[0], headers)
+            return create_response(resp[0])
         return None
 
+    async def __references(self, ref_type, value, headers=None) -> list:
+        key = reference_key(ref_type, value)
+        if self.lookup_cache is not None:
+            hit, cached = self.lookup_cache.get(key)
+            if hit:
+                return cached
+        responses = await self._invoke_get_method("references", {'type': ref_type, 'reference': value}, headers)
+        if self.lookup_cache is not None:
+            self.lookup_cache.put(key, responses)
+        return responses
+
+    async def iter_reference(self, ref_type, value, page_size: int = None, headers=None) -> AsyncIterator[
+            Union[MasterEO, PublicationMediaObject, MediaObject, MediaResource, Essence, PublicationEvent,
+                  InternalTimeline, GenealogyTimeline, IndexpointTimeline, TechnicalTimeline, RightsTimeline,
+                  GenealogyRightsTimeline, MasterEOResource]]:
+        """
+        Like reference, but decodes the result while it streams in and yields typed objects one at a time.
+        Bypasses the lookup cache.
+        """
+        async for element in self._iter_json_array("references", {'type': ref_type, 'reference': value}, page_size,
+                                                   headers):
+            yield create_response(element)
+
+    async def references_many(self, ref_type, values: Iterable[str], concurrency=8, headers=None) -> dict:
+        """
+        Looks up many references of the same type, each distinct value once. Returns a dict from value to the
+        list of objects that have the reference, like reference() does.
+        """
+        result = {}
+
+        async def lookup(value):
+            result[value] = await self.reference(ref_type, value, headers)
+
+        await run_bounded(list(dict.fromkeys(values)), concurrency, lookup)
+        return result
+
     @staticmethod
     def _timelines_of_subtype(master_eo, sub_type):
         item = (tl for tl in master_eo["timelines"] if tl["subType"] == sub_type)
@@ -1255,9 +1009,17 @@ class MdbClient(MdbJsonMethodApi):
 
     @backoff.on_exception(backoff.expo, HttpReqException, max_time=60, giveup=_check_if_not_lock)
     async def find_serie(self, title, master_system, headers=None):
+        key = serie_key(title, master_system)
+        if self.lookup_cache is not None:
+            hit, cached = self.lookup_cache.get(key)
+            if hit:
+                return cached
         response = await self._invoke_get_method("serie/by_title", {'title': title, 'masterSystem': master_system},
                                                  headers)
-        return response.get("serie")[0] if response.get("serie") else None
+        serie = response.get("serie")[0] if response.get("serie") else None
+        if self.lookup_cache is not None:
+            self.lookup_cache.put(key, serie)
+        return serie
 
     @backoff.on_exception(backoff.expo, HttpReqException, max_time=60, giveup=_check_if_not_lock)
     async def create_serie(self, title, master_system, headers=None):
@@ -1274,12 +1036,14 @@ class MdbClient(MdbJsonMethodApi):
 
     @backoff.on_exception(backoff.expo, HttpReqException, max_time=60, giveup=_check_if_not_lock)
     async def create_episode(self, season_id, episode, headers=None):
-        return await self._invoke_create_method(f"serie/{season_id}/episode", episode, headers)
+        return await self._invoke_create_method(f"serie/{season_id}/episode", episode, headers, season_id)
 
     @backoff.on_exception(backoff.expo, HttpReqException, max_time=60, giveup=_check_if_not_lock)
     async def delete(self, owner, headers=None):
         link = self._rewritten_link(_self_link(owner))
-        result = await self._do_delete(link, headers)
+        async with self._write_to(_owner_key(owner)):
+            result = await self._do_delete(link, headers)
+        self._invalidate_cached(owner.get("resId"))
         self.change_listener.on_delete(owner.get("resId"))
         return result
 
@@ -1288,8 +1052,7 @@ class MdbClient(MdbJsonMethodApi):
         if isinstance(owner, str):
             raise ValueError(f"Open does not expect a string, maybe you want resolve or open_url ?")
 
-        link = self._rewritten_link(_self_link(owner))
-        return create_response(await self._do_get(link, headers))
+        return create_response(await self._get_aggregate(_self_link(owner), headers))
 
     GT = TypeVar('GT')
 
@@ -1297,8 +1060,7 @@ class MdbClient(MdbJsonMethodApi):
     async def open_resource(self, owner: Optional[ResourceReference[GT]], headers=None) -> Optional[GT]:
         if not owner:
             return
-        link = self._rewritten_link(_self_link(owner))
-        return create_response(await self._do_get(link, headers))
+        return create_response(await self._get_aggregate(_self_link(owner), headers))
 
     @backoff.on_exception(backoff.expo, HttpReqException, max_time=60, giveup=_check_if_not_lock)
     async def open_resources(self, owner: ResourceReferenceCollection[GT], headers=None) -> List[GT]:
@@ -1308,4 +1070,9 @@ class MdbClient(MdbJsonMethodApi):
     async def update(self, owner, updates, headers=None):
         link = self._rewritten_link(_self_link(owner))
         self.change_listener.on_change(owner.get("resId"), None, updates)
-        return await self._do_post_follow(link, updates, headers)
+        async with self._write_to(_owner_key(owner)):
+            response = await self._do_post_follow(link, updates, headers)
+        self._invalidate_cached(owner.get("resId"))
+        if self.lookup_cache is not None:
+            self.lookup_cache.invalidate_for_payload(updates)
+        return response
@@ -0,0 +1,101 @@
+import asyncio
+import copy
+import time
+from typing import Optional, Iterable, Dict
+
+from mdbclient.bulk import run_bounded
+from mdbclient.mdbclient import MdbClient, MasterEO
+
+
+class MetadataMeoResolver:
+    """
+    Finds the metadata MEO of master EOs. Sibling versions share a version group, so the metadata MEO is
+    cached per version group for ttl seconds and concurrent lookups for the same version group share one fetch.
+
+        resolver = MetadataMeoResolver(client)
+        mmeo = await resolver.resolve_mmeo(res_id)
+        mmeos = await resolver.resolve_mmeo_many(res_ids)
+    """
+
+    def __init__(self, client: MdbClient, ttl: float = 300.0):
+        self.client = client
+        self.ttl = ttl
+        self._metadata_meos = {}
+        self._pending = {}
+
+    def invalidate(self, version_group_res_id: str):
+        self._metadata_meos.pop(version_group_res_id, None)
+
+    def clear(self):
+        self._metadata_meos.clear()
+
+    def _cached(self, version_group_res_id: str) -> Optional[MasterEO]:
+        entry = self._metadata_meos.get(version_group_res_id)
+        if entry and entry[0] >= time.monotonic():
+            return copy.deepcopy(entry[1])
+
+    def _store(self, version_group_res_id: str, mmeo: MasterEO):
+        self._metadata_meos[version_group_res_id] = (time.monotonic() + self.ttl, copy.deepcopy(mmeo))
+
+    async def _fetch_metadata_meo(self, meo: MasterEO, headers) -> MasterEO:
+        vg = await self.client.open(meo.version_group(), headers)
+        return await self.client.open(vg.metadata_meo(), headers)
+
+    async def metadata_meo_of(self, meo: MasterEO, headers: dict = None) -> MasterEO:
+        """
+        The metadata MEO of an already resolved master EO, which is the MEO itself when isMetadataMeo is set
+        """
+        version_group_res_id = meo.version_group().get("resId")
+        if meo.get("isMetadataMeo"):
+            self._store(version_group_res_id, meo)
+            return meo
+        cached = self._cached(version_group_res_id)
+        if cached is not None:
+            return cached
+        pending = self._pending.get(version_group_res_id)
+        if pending is None:
+            pending = asyncio.ensure_future(self._fetch_metadata_meo(meo, headers))
+            self._pending[version_group_res_id] = pending
+            pending.add_done_callback(lambda x: self.__fetched(version_group_res_id, x))
+        return copy.deepcopy(await asyncio.shield(pending))
+
+    def __fetched(self, version_group_res_id: str, future: asyncio.Future):
+        del self._pending[version_group_res_id]
+        if not future.cancelled() and future.exception() is None:
+            self._store(version_group_res_id, future.result())
+
+    async def resolve_mmeo(self, res_id: str, headers: dict = None) -> MasterEO:
+        meo = await self.client.resolve(res_id, headers=headers)
+        if not isinstance(meo, MasterEO):
+            raise Exception(f"{res_id} resolves to a {meo.type()}, which we dont know how to meo")
+        return await self.metadata_meo_of(meo, headers)
+
+    async def resolve_mmeo_many(self, res_ids: Iterable[str], concurrency: int = 8,
+                                headers: dict = None) -> Dict[str, MasterEO]:
+        """
+        Resolves the metadata MEO of many master EOs. The MEOs are resolved first and grouped by version group,
+        then each version group not already cached is fetched once. Returns a dict from res_id to metadata MEO.
+        """
+        res_ids = list(dict.fromkeys(res_ids))
+        meos = {}
+
+        async def resolve_one(res_id):
+            meo = await self.client.resolve(res_id, headers=headers)
+            if not isinstance(meo, MasterEO):
+                raise Exception(f"{res_id} resolves to a {meo.type()}, which we dont know how to meo")
+            meos[res_id] = meo
+
+        await run_bounded(res_ids, concurrency, resolve_one)
+
+        by_version_group = {}
+        for meo in meos.values():
+            version_group_res_id = meo.version_group().get("resId")
+            if meo.get("isMetadataMeo") or version_group_res_id not in by_version_group:
+                by_version_group[version_group_res_id] = meo
+        mmeos = {}
+
+        async def fetch_one(version_group_res_id):
+            mmeos[version_group_res_id] = await self.metadata_meo_of(by_version_group[version_group_res_id], headers)
+
+        await run_bounded(list(by_version_group), concurrency, fetch_one)
+        return {res_id: copy.deepcopy(mmeos[meos[res_id].version_group().get("resId")]) for res_id in res_ids}
@@ -0,0 +1,594 @@
+import copy
+import json
+from typing import Optional, Union, List, TypeVar, Generic
+
+
+def _links_of_sub_type(links_list, sub_type):
+    return [x for x in links_list if x.get("subType") == sub_type]
+
+
+def _child_links_of_sub_type(owner, child_name, sub_type):
+    links_list = owner.get(child_name, [])
+    return _links_of_sub_type(links_list, sub_type)
+
+
+def _link(owner, rel):
+    links = owner.get("links", [])
+    rel_ = [x for x in links if x["rel"] == rel]
+    rel_item = next(iter(rel_), None)
+    if not rel_item:
+        raise Exception(f"could not find {rel} in {owner}")
+    return rel_item["href"]
+
+
+def _self_link(owner):
+    return _link(owner, "self")
+
+
+class MdbLink:
+    def __init__(self, link_node):
+        self.link = link_node
+
+    def __getitem__(self, key):
+        return self.link[key]
+
+    def rel(self):
+        return self.link.get("rel")
+
+    def type(self):
+        return self.link.get("type")
+
+    def href(self):
+        return self.link.get("href")
+
+    @staticmethod
+    def create(link_node) -> 'MdbLink':
+        if link_node:
+            return MdbLink(link_node)
+
+
+class MdbLinks:
+    def __init__(self, links_node):
+        self.links_node = links_node
+
+    def __len__(self):
+        return len(self.links_node)
+
+    def select_single(self, rel):
+        matching = [x for x in self.links_node if x.get("rel") == rel]
+        if len(matching) > 1:
+            raise Exception(f"Multiple links match rel={rel}")
+        if len(matching) == 0:
+            raise Exception(f"No links match rel={rel}")
+        return MdbLink.create(matching[0])
+
+    def self_link(self):
+        return self.select_single(rel="self")
+
+    @staticmethod
+    def create(links_node) -> 'MdbLinks':
+        if links_node:
+            return MdbLinks(links_node)
+
+
+T = TypeVar('T')
+
+
+class ResourceReference(Generic[T]):
+    def __init__(self, resource_reference):
+        self.resource_reference = resource_reference
+
+    def __getitem__(self, key):
+        return self.resource_reference[key]
+
+    def get(self, key, default=None):
+        return self.resource_reference.get(key, default)
+
+    def links(self) -> MdbLinks:
+        return MdbLinks.create(self.resource_reference.get("links"))
+
+    def is_type(self, main_type):
+        return self.resource_reference.get("type") == main_type
+
+    def is_subtype(self, sub_type):
+        return self.resource_reference.get("subType") == sub_type
+
+    @staticmethod
+    def create(node) -> 'ResourceReference[T]':
+        if node:
+            return ResourceReference(node)
+
+
+X = TypeVar('X')
+
+
+class ResourceReferenceCollection(Generic[X]):
+    def __init__(self, children, owner, collection_name):
+        self.children = children
+        self.owner = owner
+        self.collection_name = collection_name
+
+    def of_type(self, main_type) -> 'ResourceReferenceCollection[X]':
+        return ResourceReferenceCollection([x for x in self.children if x.get("type") == main_type], self.owner,
+                                           self.collection_name)
+
+    def of_subtype(self, sub_type) -> 'ResourceReferenceCollection[X]':
+        return ResourceReferenceCollection([x for x in self.children if x.get("subType") == sub_type], self.owner,
+                                           self.collection_name)
+
+    def first(self) -> ResourceReference[X]:
+        return ResourceReference.create(self.children[0]) if self.children else None
+
+    def __getitem__(self, key) -> ResourceReference[X]:
+        return ResourceReference.create(self.children[key])
+
+    def single(self) -> ResourceReference[X]:
+        if len(self.children) > 1:
+            raise Exception(f"Requested single element of {self.collection_name} from {self.owner.self_link()} "
+                            f"which has multiple elements")
+        if len(self.children) == 0:
+            raise Exception(f"Requested single element of an empty linkcollection")
+        return self.children[0]
+
+    def single_or_none(self) -> Optional[ResourceReference[X]]:
+        if len(self.children) > 1:
+            raise Exception(f"Requested single element of {self.collection_name} from {self.owner.self_link()} "
+                            f"which has multiple elements")
+        return self.first()
+
+    def __len__(self):
+        return len(self.children)
+
+
+def clone_for_create(item):
+    copy_ = copy.copy(item)
+    if "resId" in copy_:
+        del copy_["resId"]
+    if "links" in copy_:
+        del copy_["links"]
+    return copy_
+
+
+def _field(item, *path) -> str:
+    for key in path:
+        item = item.get(key) if isinstance(item, dict) else None
+    return "" if item is None else str(item)
+
+
+# Collections whose order carries no meaning, with the fields they are ordered on. Ties are broken on the
+# whole element, so equal content always ends up in the same order.
+UNORDERED_COLLECTIONS = {
+    "subjects": lambda x: (_field(x, "title"),),
+    "spatials": lambda x: (_field(x, "name"),),
+    "contributors": lambda x: (_field(x, "contact", "title") + _field(x, "role", "resId"),),
+    "categories": lambda x: (_field(x, "resId"), _field(x, "title")),
+    "references": lambda x: (_field(x, "type"), _field(x, "reference")),
+}
+
+
+def _whole(item) -> str:
+    return json.dumps(item, sort_keys=True, default=str)
+
+
+def sort_stably(collection_name: str, collection: list):
+    """
+    Sorts the elements of an unordered collection in place in their stable order. Other collections are left as
+    they are.
+    """
+    key = UNORDERED_COLLECTIONS.get(collection_name)
+    if key is None or len(collection) < 2:
+        return
+    keyed = sorted(((key(x), x) for x in collection), key=lambda x: x[0])
+    start = 0
+    # ties are broken on the whole element, which is only serialized where there are ties
+    for end in range(1, len(keyed) + 1):
+        if end == len(keyed) or keyed[end][0] != keyed[start][0]:
+            if end - start > 1:
+                keyed[start:end] = sorted(keyed[start:end], key=lambda x: _whole(x[1]))
+            start = end
+    collection[:] = [x[1] for x in keyed]
+
+
+def stabilize_order(eo: dict) -> dict:
+    """
+    Sorts the unordered collections of any editorial object in place, and returns it
+    """
+    for name in UNORDERED_COLLECTIONS:
+        collection = eo.get(name)
+        if collection:
+            sort_stably(name, collection)
+    return eo
+
+
+class BasicMdbObject(dict):
+
+    def __init__(self, dict_=..., **kwargs) -> None:
+        super().__init__(dict_, **kwargs)
+        self.resid = self.get("resId")
+
+    def self_link(self):
+        return _self_link(self)
+
+    def link(self, rel):
+        return _link(self, rel)
+
+    def links(self) -> MdbLinks:
+        return MdbLinks.create(self.get("links"))
+
+    def type(self) -> str:
+        return self.get("type")
+
+    def sub_type(self) -> str:
+        return self.get("subType")
+
+    def _reference_collection(self, collection_name) -> ResourceReferenceCollection:
+        result = self.get(collection_name, [])
+        return ResourceReferenceCollection(result, self, collection_name)
+
+    def stabilize_order(self):
+        """
+        Provides a guaranteed stable order of values
+        """
+        stabilize_order(self)
+
+
+class Reference(BasicMdbObject):
+
+    def __init__(self, dict_=..., **kwargs) -> None:
+        super().__init__(dict_, **kwargs)
+        self.type: str = self.get("type")
+        self.reference: str = self.get("reference")
+
+    def int_value(self) -> Optional[int]:
+        if self.reference:
+            return int(self.reference)
+
+
+def _reference_values(meo, ref_type) -> List[Reference]:
+    references = meo.get("references", [])
+    return [Reference(x) for x in references if x.get("type") == ref_type]
+
+
+class Timeline(BasicMdbObject):
+    TIMELINE_ITEMTYPE_EXTRACTEDVERSIONTIMELINEITEM = \
+        'http://id.nrk.no/2017/mdb/timelineitem/ExtractedVersionTimelineItem'
+    TIMELINE_ITEMTYPE_EXPLOITATIONISSUETIMELINEITEM = \
+        'http://id.nrk.no/2017/mdb/timelineitem/ExploitationIssueTimelineItem'
+    TIMELINE_ITEMTYPE_GENERALRIGHTS = 'http://id.nrk.no/2017/mdb/timelineitem/GeneralRightsTimelineItem'
+    TIMELINE_ITEMTYPE_INDEXPOINTTIMELINEITEM = 'http://id.nrk.no/2017/mdb/timelineitem/IndexpointTimelineItem'
+    TIMELINE_ITEMTYPE_INTERNALTIMELINEITEM = 'http://id.nrk.no/2017/mdb/timelineitem/InternalTimelineItem'
+    TIMELINE_ITEMTYPE_TECHNICALTIMELINEITEM = 'http://id.nrk.no/2017/mdb/timelineitem/TechnicalTimelineItem'
+
+    def __init__(self, dict_=..., **kwargs) -> None:
+        super().__init__(dict_, **kwargs)
+        self.timeline_items = self.get("items", [])
+
+    def self_link(self):
+        return _self_link(self)
+
+    def filter_items(self, predicate):
+        return [x for x in self.get("items", []) if predicate(x)]
+
+    def select_items(self, *keyvalue_tuples):
+        def matches_field_exps(item):
+            for exp in keyvalue_tuples:
+                if not item.get(exp[0]) == exp[1]:
+                    return False
+            return True
+
+        res = [x for x in self.get("items", []) if matches_field_exps(x)]
+        return res
+
+    def select_single_item(self, *keyvalue_tuples):
+        items = self.select_items(*keyvalue_tuples)
+        if len(items) == 1:
+            return items[0]
+        if len(items) > 1:
+            msg = ",".join([f"{x[0]}={x[1]}]" for x in keyvalue_tuples])
+            raise Exception(f"Multiple elements found for {msg} in {self.resid}")
+
+    def find_item(self, res_id):
+        return self.select_single_item(("resId", res_id))
+
+    def find_by_title(self, title):
+        return self.select_single_item(("title", title))
+
+    def find_by_description(self, description):
+        return self.select_single_item(("description", description))
+
+    def find_index_points_by_title_and_offset(self, title, offset):
+        return self.select_items(("title", title), ("offset", offset))
+
+    def find_index_point_by_title_and_offset(self, title, offset):
+        return self.select_single_item(("title", title), ("offset", offset))
+
+    def find_index_points_by_offset_and_duration(self, offset, duration):
+        return self.select_items(("offset", offset), ("duration", duration))
+
+    def find_index_point_by_offset_and_duration(self, offset, duration):
+        return self.select_single_item(("offset", offset), ("duration", duration))
+
+    def find_index_point_by_offset(self, offset):
+        return self.select_single_item(("offset", offset))
+
+    def master_eo(self) -> ResourceReference['MasterEO']:
+        return ResourceReference.create(self.get("masterEO"))
+
+
+class RightsTimeline(Timeline):
+    TYPE = "http://id.nrk.no/2017/mdb/timelinetype/Rights"
+
+    def __init__(self, dict_=..., **kwargs) -> None:
+        super().__init__(dict_, **kwargs)
+        self["type"] = self.TYPE
+
+    def fulltimeline_item(self, type_):
+        return self.select_single_item(("appliesToFullTimeline", True), ("type", type_))
+
+    @staticmethod
+    def create(items) -> 'RightsTimeline':
+        return RightsTimeline({"items": items})
+
+
+class IndexpointTimeline(Timeline):
+    TYPE = "http://id.nrk.no/2017/mdb/timelinetype/IndexPoints"
+
+    def __init__(self, dict_=..., **kwargs) -> None:
+        super().__init__(dict_, **kwargs)
+        self["type"] = self.TYPE
+
+
+class GenealogyTimeline(Timeline):
+    TYPE = "http://id.nrk.no/2017/mdb/timelinetype/Genealogy"
+
+    def __init__(self, dict_=..., **kwargs) -> None:
+        super().__init__(dict_, **kwargs)
+        self["type"] = self.TYPE
+
+
+class GenealogyRightsTimeline(Timeline):
+    TYPE = "http://id.nrk.no/2017/mdb/timelinetype/GenealogyRights"
+
+    def __init__(self, dict_=..., **kwargs) -> None:
+        super().__init__(dict_, **kwargs)
+        self["type"] = self.TYPE
+
+
+class TechnicalTimeline(Timeline):
+    TYPE = "http://id.nrk.no/2017/mdb/timelinetype/Technical"
+
+    def __init__(self, dict_=..., **kwargs) -> None:
+        super().__init__(dict_, **kwargs)
+        self["type"] = self.TYPE
+
+    def find_index_points_by_event(self, event_):
+        return self.select_items(("event", event_))
+
+    def find_index_points_by_event_and_offset(self, event_, offset):
+        return self.select_items(("event", event_), ("offset", offset))
+
+    def find_index_point_by_event_and_offset(self, event, offset):
+        matching = self.find_index_points_by_event_and_offset(event, offset)
+        if len(matching) > 1:
+            raise Exception(f"More than one index point found for event={event} offset={offset}")
+        if matching:
+            return matching[0]
+
+
+class InternalTimeline(Timeline):
+    TYPE = "http://id.nrk.no/2017/mdb/timelinetype/Internal"
+
+    def __init__(self, dict_=..., **kwargs) -> None:
+        super().__init__(dict_, **kwargs)
+        self["type"] = self.TYPE
+
+    def find_index_points_by_subtype_offset_duration(self, subtype, offset, duration):
+        return self.select_items(("subType", subtype), ("offset", offset), ("duration", duration))
+
+    def find_index_point_by_sybtype_offset_duration(self, subtype, offset, duration):
+        matching = self.find_index_points_by_subtype_offset_duration(subtype, offset, duration)
+        if len(matching) > 1:
+            raise Exception(
+                f"More than one index point found for subtype={subtype}, offset={offset} "
+                f"duration={duration} in {self.self_link()}")
+        if matching:
+            return matching[0]
+
+
+class Contributor(dict):
+    def __init__(self, dict_=..., **kwargs) -> None:
+        super().__init__(dict_, **kwargs)
+        self.resId = dict_.get("resId")
+        self.contact = dict_.get("contact", {})
+        self.role = dict_.get("role", {})
+        self.characterName = dict_.get("characterName")
+        self.capacity = dict_.get("capacity")
+        self.comment = dict_.get("comment")
+
+    def key(self):
+        return f"CT={self.contact.get('title')},T={self.role.get('title')},R={self.role.get('resId')},C={self.contact.get('resId')},CAP={self.capacity}"
+
+    @staticmethod
+    def unique(contributors: List['Contributor']) -> List['Contributor']:
+        res = []
+        seen = set()
+        for x in contributors:
+            if (key := x.key()) not in seen:
+                seen.add(key)
+                res.append(x)
+        return res
+
+
+class EditorialObject(BasicMdbObject):
+
+    def __init__(self, dict_=..., **kwargs) -> None:
+        super().__init__(dict_, **kwargs)
+        self.resid = self.get("resId")
+
+    def contributors(self) -> List[Contributor]:
+        contrs = self.get("contributors", [])
+        return [Contributor(x) for x in contrs]
+
+    def references(self, ref_type) -> List[Reference]:
+        return _reference_values(self, ref_type)
+
+    def reference(self, ref_type) -> Optional[Reference]:
+        found = self.references(ref_type)
+        if not found:
+            return
+        if len(found) > 1:
+            raise Exception(f"Multiple refs of type {ref_type} in {_self_link(self)}")
+        return found[0]
+
+    def reference_value(self, ref_type) -> Optional[str]:
+        found = self.reference(ref_type)
+        if not found:
+            return
+        return found.reference
+
+    def reference_int_value(self, ref_type) -> Optional[int]:
+        found = self.reference(ref_type)
+        if not found:
+            return
+        return int(found.reference)
+
+
+class VersionGroup(BasicMdbObject):
+    def __init__(self, dict_=..., **kwargs) -> None:
+        super().__init__(dict_, **kwargs)
+
+    def metadata_meo(self) -> ResourceReference['MasterEO']:
+        return ResourceReference.create(self.get("metadataMeo"))
+
+
+class MasterEO(EditorialObject):
+    def __init__(self, dict_=..., **kwargs) -> None:
+        super().__init__(dict_, **kwargs)
+
+    def media_objects(self) -> ResourceReferenceCollection['MediaObject']:
+        return self._reference_collection("mediaObjects")
+
+    def publications(self) -> ResourceReferenceCollection['PublicationEvent']:
+        return self._reference_collection("publications")
+
+    def timelines(self) -> ResourceReferenceCollection[Timeline]:
+        return self._reference_collection("timelines")
+
+    def version_group(self) -> ResourceReference[VersionGroup]:
+        return ResourceReference.create(self.get("versionGroup"))
+
+    def has_subject_with_title(self, subject: str, case_sensitive=True):
+        if case_sensitive:
+            return [sub for sub in self.get("subjects", []) if sub.get("title") == subject]
+        else:
+            subject = subject.lower()
+            return [sub for sub in self.get("subjects", []) if sub.get("title", "").lower() == subject]
+
+
+class MasterEOResource(EditorialObject):
+    def __init__(self, dict_=..., **kwargs) -> None:
+        super().__init__(dict_, **kwargs)
+
+
+class Essence(BasicMdbObject):
+
+    def __init__(self, dict_=..., **kwargs) -> None:
+        super().__init__(dict_, **kwargs)
+
+    def composed_of(self) -> ResourceReference['MediaResource']:
+        return ResourceReference.create(self.get("composedOf"))
+
+    def playout_of(self) -> ResourceReference['PublicationMediaObject']:
+        return ResourceReference.create(self.get("playoutOf"))
+
+
+class MediaResource(BasicMdbObject):
+
+    def __init__(self, dict_=..., **kwargs) -> None:
+        super().__init__(dict_, **kwargs)
+
+    def media_object(self) -> ResourceReference['MediaObject']:
+        return ResourceReference.create(self.get("mediaObject"))
+
+    def essences(self) -> ResourceReferenceCollection[Essence]:
+        return self._reference_collection("essences")
+
+    def matching_locators(self, identifier, storageType):
+        return [x for x in self.get("locators") if
+                x.get("identifier") == identifier and x.get("storageType", {}).get("resId") == storageType]
+
+
+class MediaObject(BasicMdbObject):
+
+    def __init__(self, dict_=..., **kwargs) -> None:
+        super().__init__(dict_, **kwargs)
+
+    def media_resources(self) -> ResourceReferenceCollection[MediaResource]:
+        return self._reference_collection("resources")
+
+    def published_versions(self) -> ResourceReferenceCollection['PublicationMediaObject']:
+        return self._reference_collection("publishedVersions")
+
+    def master_eo(self) -> ResourceReference['MasterEO']:
+        return ResourceReference.create(self.get("masterEO"))
+
+
+class PublicationMediaObject(BasicMdbObject):
+
+    def __init__(self, dict_=..., **kwargs) -> None:
+        super().__init__(dict_, **kwargs)
+
+    def playouts(self) -> ResourceReferenceCollection[Essence]:
+        return self._reference_collection("playouts")
+
+    def published_version_of(self) -> ResourceReference[MediaObject]:
+        return ResourceReference.create(self.get("publishedVersionOf"))
+
+
+class PublicationEvent(EditorialObject):
+
+    def __init__(self, dict_=..., **kwargs) -> None:
+        super().__init__(dict_, **kwargs)
+
+    def pmos(self) -> ResourceReferenceCollection:
+        return self._reference_collection("pmos")
+
+
+def create_response(response) -> \
+        Union[
+            MasterEO, PublicationMediaObject, MediaObject, MediaResource, Essence, PublicationEvent, InternalTimeline,
+            GenealogyTimeline, IndexpointTimeline, TechnicalTimeline, RightsTimeline, GenealogyRightsTimeline,
+            VersionGroup,MasterEOResource]:
+    type_ = response.get("type")
+    if not type_:
+        return response
+
+    if type_ == "http://id.nrk.no/2016/mdb/types/MasterEditorialObject":
+        return MasterEO(response)
+    if type_ == "http://id.nrk.no/2016/mdb/types/MediaObject":
+        return MediaObject(response)
+    if type_ == "http://id.nrk.no/2016/mdb/types/PublicationMediaObject":
+        return PublicationMediaObject(response)
+    if type_ == "http://id.nrk.no/2016/mdb/types/MediaResource":
+        return MediaResource(response)
+    if type_ == "http://id.nrk.no/2016/mdb/types/Essence":
+        return Essence(response)
+    if type_ == "http://id.nrk.no/2016/mdb/types/PublicationEvent":
+        return PublicationEvent(response)
+    if type_ == "http://id.nrk.no/2016/mdb/types/VersionGroup":
+        return VersionGroup(response)
+    if type_ == "http://id.nrk.no/2016/mdb/types/MasterEOResource":
+        return MasterEOResource(response)
+    if type_ == InternalTimeline.TYPE:
+        return InternalTimeline(response)
+    if type_ == GenealogyTimeline.TYPE:
+        return GenealogyTimeline(response)
+    if type_ == IndexpointTimeline.TYPE:
+        return IndexpointTimeline(response)
+    if type_ == TechnicalTimeline.TYPE:
+        return TechnicalTimeline(response)
+    if type_ == RightsTimeline.TYPE:
+        return RightsTimeline(response)
+    if type_ == GenealogyRightsTimeline.TYPE:
+        return GenealogyRightsTimeline(response)
+    raise Exception(f"Dont know how to create response for {type_}")
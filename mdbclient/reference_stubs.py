@@ -0,0 +1,194 @@
+import sys
+import uuid
+from array import array
+from typing import Optional, Iterator, Union, List
+
+from mdbclient.model import ResourceReference
+
+
+def _self_href_of(node: dict) -> Optional[str]:
+    for link in node.get("links") or []:
+        if link.get("rel") == "self":
+            return link.get("href")
+
+
+def _split_res_id(res_id: str):
+    """
+    (base, guid) of a resId ending in /<uuid>, None otherwise
+    """
+    base, _, guid = res_id.rpartition("/")
+    if not base or len(guid) != 36:
+        return None
+    try:
+        parsed = uuid.UUID(guid)
+    except ValueError:
+        return None
+    # only where the resId is rebuilt exactly from the uuid
+    return (base, parsed) if str(parsed) == guid else None
+
+
+def _href_prefix(res_id: str, href: Optional[str]) -> Optional[str]:
+    """
+    The part of href before the <kind>/<guid> the resId ends with, when href is built that way
+    """
+    if not href:
+        return None
+    kind_and_guid = "/".join(res_id.rsplit("/", 2)[-2:])
+    if href.endswith("/" + kind_and_guid):
+        return href[:-len(kind_and_guid)]
+
+
+class ReferenceStub:
+    """
+    The identity of an aggregate: resId, type, subType and self href, in a fraction of the memory of the
+    ResourceReference dict it comes from. type and subType are interned, and the self href is rebuilt from the
+    resId and the shared api prefix when it follows the usual <prefix><kind>/<guid> form.
+    """
+    __slots__ = ("res_id", "type", "sub_type", "_prefix", "_href")
+
+    def __init__(self, res_id: str, type_: str = None, sub_type: str = None, self_href: str = None):
+        self.res_id = res_id
+        self.type = sys.intern(type_) if type_ else None
+        self.sub_type = sys.intern(sub_type) if sub_type else None
+        prefix = _href_prefix(res_id, self_href)
+        self._prefix = sys.intern(prefix) if prefix is not None else None
+        self._href = self_href if prefix is None else None
+
+    @property
+    def self_href(self) -> Optional[str]:
+        if self._prefix is not None:
+            return self._prefix + "/".join(self.res_id.rsplit("/", 2)[-2:])
+        return self._href
+
+    @staticmethod
+    def of(reference: Union[ResourceReference, dict]) -> 'ReferenceStub':
+        node = reference.resource_reference if isinstance(reference, ResourceReference) else reference
+        return ReferenceStub(node["resId"], node.get("type"), node.get("subType"), _self_href_of(node))
+
+    def to_dict(self) -> dict:
+        node = {"resId": self.res_id}
+        if self.type:
+            node["type"] = self.type
+        if self.sub_type:
+            node["subType"] = self.sub_type
+        href = self.self_href
+        if href:
+            node["links"] = [{"rel": "self", "href": href}]
+        return node
+
+    def to_reference(self) -> ResourceReference:
+        return ResourceReference(self.to_dict())
+
+    def __eq__(self, other):
+        return isinstance(other, ReferenceStub) and self.res_id == other.res_id
+
+    def __hash__(self):
+        return hash(self.res_id)
+
+    def __repr__(self):
+        return f"ReferenceStub({self.res_id!r}, {self.type!r}, {self.sub_type!r}, {self.self_href!r})"
+
+
+class _Strings:
+    """
+    Interning table mapping repeated strings to small ints
+    """
+
+    def __init__(self):
+        self.values: List[Optional[str]] = [None]
+        self._index = {None: 0}
+
+    def index(self, value: Optional[str]) -> int:
+        found = self._index.get(value)
+        if found is None:
+            found = self._index[value] = len(self.values)
+            self.values.append(value)
+        return found
+
+
+class ReferenceTable:
+    """
+    Column storage for millions of reference stubs. A resId of the usual <base>/<uuid> form is kept as a base
+    number and the 16 bytes of the uuid, type, subType and href prefix as numbers into shared string tables;
+    anything else is kept as strings on the side. An entry of the usual form takes about 25 bytes.
+
+        table = ReferenceTable()
+        for reference in meo.media_objects().children:
+            table.append(reference)
+        media_object = await client.open_resource(table[0].to_reference())
+
+    With indexed set, index_of and `in` find entries by resId, at the cost of a dict entry per reference.
+    """
+
+    def __init__(self, indexed: bool = False):
+        self._strings = _Strings()
+        self._bases = array("I")
+        self._guids = bytearray()
+        self._types = array("I")
+        self._sub_types = array("I")
+        self._prefixes = array("I")
+        self._irregular = {}
+        self._by_res_id = {} if indexed else None
+
+    def __len__(self):
+        return len(self._bases)
+
+    def append(self, reference: Union[ResourceReference, dict, ReferenceStub]) -> int:
+        stub = reference if isinstance(reference, ReferenceStub) else ReferenceStub.of(reference)
+        index = len(self._bases)
+        split = _split_res_id(stub.res_id)
+        strings = self._strings
+        if split is not None and (stub._prefix is not None or stub._href is None):
+            self._bases.append(strings.index(split[0]))
+            self._guids += split[1].bytes
+        else:
+            self._bases.append(0)
+            self._guids += bytes(16)
+            self._irregular[index] = (stub.res_id, stub._href)
+        self._types.append(strings.index(stub.type))
+        self._sub_types.append(strings.index(stub.sub_type))
+        self._prefixes.append(strings.index(stub._prefix))
+        if self._by_res_id is not None:
+            self._by_res_id[stub.res_id] = index
+        return index
+
+    def extend(self, references):
+        for reference in references:
+            self.append(reference)
+
+    def res_id(self, index: int) -> str:
+        irregular = self._irregular.get(index)
+        if irregular is not None:
+            return irregular[0]
+        guid = uuid.UUID(bytes=bytes(self._guids[index * 16:index * 16 + 16]))
+        return f"{self._strings.values[self._bases[index]]}/{guid}"
+
+    def __getitem__(self, index: int) -> ReferenceStub:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        stub = ReferenceStub.__new__(ReferenceStub)
+        stub.res_id = self.res_id(index)
+        values = self._strings.values
+        stub.type = values[self._types[index]]
+        stub.sub_type = values[self._sub_types[index]]
+        stub._prefix = values[self._prefixes[index]]
+        irregular = self._irregular.get(index)
+        stub._href = irregular[1] if irregular is not None else None
+        return stub
+
+    def __iter__(self) -> Iterator[ReferenceStub]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def index_of(self, res_id: str) -> Optional[int]:
+        if self._by_res_id is None:
+            raise ValueError("ReferenceTable is not indexed")
+        return self._by_res_id.get(res_id)
+
+    def __contains__(self, res_id) -> bool:
+        return self.index_of(res_id) is not None
+
+    def to_references(self) -> List[ResourceReference]:
+        return [x.to_reference() for x in self]
@@ -0,0 +1,131 @@
+import asyncio
+import time
+from typing import Union, Iterable, AsyncIterable, Callable, Optional
+
+from mdbclient.bulk import BulkStats, run_bounded, known_length
+from mdbclient.checkpoint import Checkpoint
+from mdbclient.mdb_ids import try_parse_res_id, typemappings, MasterEOResId, MediaObjectResId, \
+    MediaResourceResId, PublicationMediaObjectResId, EssenceResId, VersionGroupResId, PublicationEventResId, ResId
+from mdbclient.mdbclient import MdbClient
+
+_REINDEX_METHODS = {
+    MasterEOResId: MdbClient.reindex_meo,
+    MediaObjectResId: MdbClient.reindex_mo,
+    MediaResourceResId: MdbClient.reindex_media_resource,
+    PublicationMediaObjectResId: MdbClient.reindex_pmo,
+    EssenceResId: MdbClient.reindex_essence,
+    VersionGroupResId: MdbClient.reindex_version_group_group,
+    PublicationEventResId: MdbClient.reindex_publication_event,
+}
+
+_AGGREGATE_TYPES = {v: k for k, v in typemappings.items()}
+
+
+class AdaptiveRateLimiter:
+    """
+    Paces calls to at most rate per second. observe() adjusts the rate from response times: when the moving
+    average exceeds latency_target the rate is cut by decrease_factor, otherwise it grows by increase_step
+    per call back towards max_rate. Failed calls (timeouts, 5xx from an overloaded server) count as responses
+    taking failure_penalty times latency_target, or longer if they did.
+    """
+
+    def __init__(self, max_rate: float, latency_target: float, min_rate: float = 0.5, increase_step: float = None,
+                 decrease_factor: float = 0.7, smoothing: float = 0.2, failure_penalty: float = 2.0):
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.rate = max_rate
+        self.latency_target = latency_target
+        self.increase_step = increase_step if increase_step else max(max_rate / 50, 0.01)
+        self.decrease_factor = decrease_factor
+        self.smoothing = smoothing
+        self.failure_penalty = failure_penalty
+        self.average_latency: Optional[float] = None
+        self._next_slot = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + 1.0 / self.rate
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def observe(self, latency: float):
+        if self.average_latency is None:
+            self.average_latency = latency
+        else:
+            self.average_latency += self.smoothing * (latency - self.average_latency)
+        if self.average_latency > self.latency_target:
+            self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+        else:
+            self.rate = min(self.max_rate, self.rate + self.increase_step)
+
+    def observe_failure(self, latency: float):
+        self.observe(max(latency, self.latency_target * self.failure_penalty))
+
+
+class ReindexOrchestrator:
+    """
+    Reindexes many aggregates given as resIds. The endpoint is chosen from the resId type; types without a
+    dedicated reindex endpoint (and all types when full is set) use full_reindex_single.
+
+    Requests are paced by an AdaptiveRateLimiter starting at target_rate, which backs off when the indexer
+    slows down. Completed resIds are recorded in the checkpoint and skipped on the next run.
+    """
+
+    def __init__(self, client: MdbClient, checkpoint: Checkpoint = None, target_rate: float = 10.0,
+                 latency_target: float = 2.0, concurrency: int = 8, full: bool = False,
+                 progress: Callable[[BulkStats], None] = None, progress_interval: int = 100):
+        self.client = client
+        self.checkpoint = checkpoint
+        self.limiter = AdaptiveRateLimiter(target_rate, latency_target)
+        self.concurrency = concurrency
+        self.full = full
+        self.progress = progress
+        self.progress_interval = progress_interval
+        self.failures = {}
+
+    def _reindex_call(self, res_id: ResId):
+        method = None if self.full else _REINDEX_METHODS.get(type(res_id))
+        if method:
+            return method(self.client, res_id.id())
+        aggregate_type = _AGGREGATE_TYPES.get(type(res_id))
+        if not aggregate_type:
+            raise ValueError(f"Do not know how to reindex {res_id}")
+        return self.client.full_reindex_single(aggregate_type, res_id.id())
+
+    async def _reindex_one(self, stats: BulkStats, res_id_string: str):
+        if self.checkpoint is not None and self.checkpoint.is_done(res_id_string):
+            stats.skipped += 1
+            return
+        try:
+            res_id = try_parse_res_id(res_id_string)
+            if not res_id:
+                raise ValueError(f"Unknown type {res_id_string}")
+            await self.limiter.acquire()
+            started = time.monotonic()
+            try:
+                await self._reindex_call(res_id)
+            except Exception:
+                self.limiter.observe_failure(time.monotonic() - started)
+                raise
+            self.limiter.observe(time.monotonic() - started)
+            stats.done += 1
+            if self.checkpoint is not None:
+                self.checkpoint.mark_done(res_id_string)
+        except Exception as e:
+            stats.failed += 1
+            self.failures[res_id_string] = e
+        if self.progress and stats.processed() % self.progress_interval == 0:
+            self.progress(stats)
+
+    async def run(self, res_ids: Union[Iterable[str], AsyncIterable[str]], total: int = None) -> BulkStats:
+        stats = BulkStats(total if total is not None else known_length(res_ids))
+        try:
+            await run_bounded(res_ids, self.concurrency, lambda x: self._reindex_one(stats, x))
+        finally:
+            stats.finish()
+            if self.checkpoint is not None:
+                self.checkpoint.close()
+        return stats
@@ -0,0 +1,141 @@
+import json
+from typing import Dict, List, Optional
+
+from mdbclient.bulk import BulkStats, run_bounded
+from mdbclient.checkpoint import KeyValueLog
+from mdbclient.mdb_ids import lenient_parse_res_id
+from mdbclient.mdbclient import MdbClient
+
+LEVEL_SERIE = "serie"
+LEVEL_SEASON = "season"
+LEVEL_EPISODE = "episode"
+
+# Catalogue fields that structure the catalogue and are not sent to mdb
+_STRUCTURE_FIELDS = {"id", "seasons", "episodes"}
+
+
+def load_catalogue(path: str) -> List[dict]:
+    """
+    Reads a catalogue file: a json list of series, or an object with a "series" list. Series have seasons and
+    seasons have episodes; every entry has a source "id", the rest of its fields are the payload sent to mdb.
+
+        [{"id": "fozz", "title": "Fozz", "masterSystem": "PRF",
+          "seasons": [{"id": "fozz-1", "title": "Sesong 1", "episodes": [{"id": "fozz-1-1", "title": "Fozz 1"}]}]}]
+    """
+    with open(path, encoding="utf-8") as f:
+        catalogue = json.load(f)
+    return catalogue["series"] if isinstance(catalogue, dict) else catalogue
+
+
+def _payload(entry: dict) -> dict:
+    return {k: v for k, v in entry.items() if k not in _STRUCTURE_FIELDS}
+
+
+def mapping_key(level: str, source_id) -> str:
+    return f"{level}/{source_id}"
+
+
+class SerieImport:
+    """
+    Imports a catalogue of series, seasons and episodes level by level: all series first, then all seasons,
+    then all episodes, each level with at most concurrency creates in flight.
+
+        importer = SerieImport(client, "catalogue.mapping")
+        await importer.run(load_catalogue("catalogue.json"))
+        serie_res_id = importer.mapping.get(mapping_key(LEVEL_SERIE, "fozz"))
+
+    The resId every source id ends up as is recorded in a KeyValueLog at mapping_path, as soon as it is known.
+    Entries already in the mapping are skipped, so a run that is repeated or resumed after a crash only creates
+    what is missing. Series are also looked up with find_serie before they are created, once per
+    (title, masterSystem) however many catalogue entries share it, so existing series are reused.
+
+    Seasons and episodes have no natural key to look them up on, which leaves a window between a create and
+    its mapping entry where a crash leads to a duplicate on the next run. Entries whose parent could not be
+    imported are counted as failed; errors holds the error per mapping key.
+    """
+
+    def __init__(self, client: MdbClient, mapping_path: str, concurrency: int = 8, headers: dict = None):
+        self.client = client
+        self.mapping = KeyValueLog(mapping_path)
+        self.concurrency = concurrency
+        self.headers = headers
+        self.stats: Dict[str, BulkStats] = {}
+        self.errors: Dict[str, Exception] = {}
+
+    async def run(self, series: List[dict]) -> Dict[str, BulkStats]:
+        try:
+            await self.__import_series(series)
+            seasons = [(serie, season) for serie in series for season in serie.get("seasons") or []]
+            await self.__import_level(LEVEL_SEASON, LEVEL_SERIE, seasons, self.__create_season)
+            episodes = [(season, episode) for _, season in seasons for episode in season.get("episodes") or []]
+            await self.__import_level(LEVEL_EPISODE, LEVEL_SEASON, episodes, self.__create_episode)
+        finally:
+            self.mapping.close()
+        return self.stats
+
+    async def __import_series(self, series: List[dict]):
+        stats = self.stats[LEVEL_SERIE] = BulkStats(len(series))
+        by_key = {}
+        for serie in series:
+            if mapping_key(LEVEL_SERIE, serie["id"]) in self.mapping:
+                stats.skipped += 1
+            else:
+                by_key.setdefault((serie.get("title"), serie.get("masterSystem")), []).append(serie)
+
+        async def one(same_key: List[dict]):
+            keys = [mapping_key(LEVEL_SERIE, x["id"]) for x in same_key]
+            try:
+                found = await self.client.find_serie(same_key[0].get("title"), same_key[0].get("masterSystem"),
+                                                     self.headers)
+                if found is None:
+                    created = await self.client.create_serie_2(_payload(same_key[0]), self.headers)
+                    stats.done += 1
+                    stats.skipped += len(same_key) - 1
+                    res_id = created["resId"]
+                else:
+                    stats.skipped += len(same_key)
+                    res_id = found["resId"]
+            except Exception as e:
+                stats.failed += len(same_key)
+                self.errors.update({key: e for key in keys})
+                return
+            for key in keys:
+                self.mapping.put(key, res_id)
+
+        await run_bounded(by_key.values(), self.concurrency, one)
+        stats.finish()
+
+    async def __import_level(self, level: str, parent_level: str, entries: list, create):
+        stats = self.stats[level] = BulkStats(len(entries))
+
+        async def one(parent_and_entry):
+            parent, entry = parent_and_entry
+            key = mapping_key(level, entry["id"])
+            if key in self.mapping:
+                stats.skipped += 1
+                return
+            parent_res_id = self.mapping.get(mapping_key(parent_level, parent["id"]))
+            try:
+                if parent_res_id is None:
+                    raise ValueError(f"{parent_level} {parent['id']} of {level} {entry['id']} was not imported")
+                created = await create(parent_res_id, _payload(entry))
+            except Exception as e:
+                stats.failed += 1
+                self.errors[key] = e
+                return
+            self.mapping.put(key, created["resId"])
+            stats.done += 1
+
+        await run_bounded(entries, self.concurrency, one)
+        stats.finish()
+
+    async def __create_season(self, serie_res_id: str, payload: dict) -> dict:
+        return await self.client.create_season(dict(payload, serie={"resId": serie_res_id}), self.headers)
+
+    async def __create_episode(self, season_res_id: str, payload: dict) -> dict:
+        season_id = lenient_parse_res_id(season_res_id).id()
+        return await self.client.create_episode(season_id, dict(payload, season={"resId": season_res_id}),
+                                                self.headers)
+
+    def error_of(self, level: str, source_id) -> Optional[Exception]:
+        return self.errors.get(mapping_key(level, source_id))
@@ -0,0 +1,245 @@
+import asyncio
+import multiprocessing
+import os
+import pickle
+import queue
+import time
+from typing import Union, Callable, Iterable, Iterator, Awaitable, Any, Dict, Optional
+
+import aiohttp
+
+from mdbclient.bulk import BulkStats, known_length
+from mdbclient.mdbclient import MdbClient, MdbEnv
+
+_RESULT = "result"
+_METRICS = "metrics"
+
+
+class ClientConfig:
+    """
+    What a worker process needs to build its own session and MdbClient
+    """
+
+    def __init__(self, api_base: Union[MdbEnv, str], user_id: str, correlation_id: str, source_system: str = None,
+                 batch_id: str = "default-batch-id", force_host: bool = None, force_scheme: bool = None,
+                 connection_limit: int = 100):
+        self.api_base = api_base
+        self.user_id = user_id
+        self.correlation_id = correlation_id
+        self.source_system = source_system
+        self.batch_id = batch_id
+        self.force_host = force_host
+        self.force_scheme = force_scheme
+        self.connection_limit = connection_limit
+
+    def session(self) -> aiohttp.ClientSession:
+        return aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.connection_limit))
+
+    def client(self, session: aiohttp.ClientSession) -> MdbClient:
+        return MdbClient(session, self.api_base, self.user_id, self.correlation_id, self.source_system,
+                         self.batch_id, self.force_host, self.force_scheme)
+
+
+class ShardResult:
+    def __init__(self, index: int, item, result=None, error: Exception = None, worker: int = None):
+        self.index = index
+        self.item = item
+        self.result = result
+        self.error = error
+        self.worker = worker
+
+    def is_successful(self) -> bool:
+        return self.error is None
+
+    def __str__(self):
+        return f"{self.index} {self.item}: {self.error if self.error else self.result}"
+
+
+class WorkerMetrics:
+    def __init__(self, worker: int):
+        self.worker = worker
+        self.pid = os.getpid()
+        self.items = 0
+        self.errors = 0
+        self.busy = 0.0
+        self.cpu = 0.0
+        self.elapsed = 0.0
+
+    def __str__(self):
+        return f"worker {self.worker} (pid {self.pid}): {self.items} items, {self.errors} errors, " \
+               f"busy {self.busy:.1f}s, cpu {self.cpu:.1f}s in {self.elapsed:.1f}s"
+
+
+def _picklable(e: Exception) -> Exception:
+    try:
+        pickle.dumps(e)
+        return e
+    except Exception:
+        return RuntimeError(repr(e))
+
+
+def _send(outputs, message: tuple):
+    # Pickled here rather than in the queue's feeder thread, where a failure would lose the message silently
+    try:
+        outputs.put(pickle.dumps(message))
+    except Exception as e:
+        if message[0] != _RESULT:
+            raise
+        outputs.put(pickle.dumps((_RESULT, message[1], None, _picklable(e), message[4])))
+
+
+async def _work(worker: int, config: ClientConfig, func, concurrency: int, inputs, outputs):
+    loop = asyncio.get_running_loop()
+    metrics = WorkerMetrics(worker)
+    started = time.monotonic()
+    cpu_started = time.process_time()
+    jobs = asyncio.Queue(concurrency)
+    async with config.session() as session:
+        client = config.client(session)
+
+        async def consume():
+            while (job := await jobs.get()) is not None:
+                index, item = job
+                call_started = time.monotonic()
+                try:
+                    result, error = await func(client, item), None
+                except Exception as e:
+                    result, error = None, _picklable(e)
+                    metrics.errors += 1
+                metrics.items += 1
+                metrics.busy += time.monotonic() - call_started
+                _send(outputs, (_RESULT, index, result, error, worker))
+
+        consumers = [asyncio.ensure_future(consume()) for _ in range(concurrency)]
+        while (job := await loop.run_in_executor(None, inputs.get)) is not None:
+            await jobs.put(job)
+        for _ in consumers:
+            await jobs.put(None)
+        await asyncio.gather(*consumers)
+    metrics.cpu = time.process_time() - cpu_started
+    metrics.elapsed = time.monotonic() - started
+    _send(outputs, (_METRICS, worker, metrics))
+
+
+def _worker_main(worker: int, config: ClientConfig, func, concurrency: int, inputs, outputs):
+    try:
+        asyncio.run(_work(worker, config, func, concurrency, inputs, outputs))
+    except KeyboardInterrupt:
+        pass
+
+
+class ShardRunner:
+    """
+    Spreads CPU heavy work over several processes. Every worker process runs its own event loop, session and
+    MdbClient built from config, and calls func(client, item) for at most concurrency items at a time.
+    func must be a module level coroutine function, and items and results must be picklable.
+
+    map() feeds the items to the workers as they have room and yields a ShardResult per item, in input order
+    when ordered is set and as they complete otherwise. A failing item gives a ShardResult with the error and
+    does not stop the run. Metrics per worker are in self.metrics after the run.
+
+        async def reconcile(client, res_id):
+            ...
+
+        runner = ShardRunner(ClientConfig(MdbEnv.STAGE, "my-user", "my-correlation"), reconcile, processes=8)
+        for result in runner.map(res_ids):
+            ...
+    """
+
+    def __init__(self, config: ClientConfig, func: Callable[[MdbClient, Any], Awaitable[Any]],
+                 processes: int = None, concurrency: int = 8, ordered: bool = False,
+                 progress: Callable[[BulkStats], None] = None, progress_interval: int = 1000,
+                 max_pending: int = None, start_method: str = None):
+        self.config = config
+        self.func = func
+        self.processes = processes if processes else os.cpu_count()
+        self.concurrency = concurrency
+        self.ordered = ordered
+        self.progress = progress
+        self.progress_interval = progress_interval
+        self.max_pending = max_pending if max_pending else self.processes * concurrency * 2
+        self.context = multiprocessing.get_context(start_method)
+        self.metrics: Dict[int, WorkerMetrics] = {}
+        self.stats = None
+
+    def run(self, items: Iterable, total: int = None) -> BulkStats:
+        """
+        Runs all items for their side effects and returns the stats
+        """
+        for _ in self.map(items, total):
+            pass
+        return self.stats
+
+    def map(self, items: Iterable, total: int = None) -> Iterator[ShardResult]:
+        self.stats = stats = BulkStats(total if total is not None else known_length(items))
+        self.metrics = {}
+        inputs = self.context.Queue()
+        outputs = self.context.Queue()
+        workers = [self.context.Process(target=_worker_main, name=f"mdbclient-shard-{x}", daemon=True,
+                                        args=(x, self.config, self.func, self.concurrency, inputs, outputs))
+                   for x in range(self.processes)]
+        for worker in workers:
+            worker.start()
+        source = enumerate(items)
+        pending = {}
+        completed = {}
+        next_index = 0
+        exhausted = False
+        try:
+            while not exhausted or pending:
+                # results held back for ordering count too, or one slow item would let the rest pile up
+                while not exhausted and len(pending) + len(completed) < self.max_pending:
+                    job = next(source, None)
+                    if job is None:
+                        exhausted = True
+                        for _ in workers:
+                            inputs.put(None)
+                    else:
+                        pending[job[0]] = job[1]
+                        inputs.put(job)
+                message = self.__receive(outputs, workers)
+                if message is None:
+                    raise RuntimeError(f"Workers finished with {len(pending)} items outstanding")
+                _, index, result, error, worker = message
+                shard_result = ShardResult(index, pending.pop(index), result, error, worker)
+                if error is None:
+                    stats.done += 1
+                else:
+                    stats.failed += 1
+                if self.progress and stats.processed() % self.progress_interval == 0:
+                    self.progress(stats)
+                if not self.ordered:
+                    yield shard_result
+                    continue
+                completed[index] = shard_result
+                while next_index in completed:
+                    yield completed.pop(next_index)
+                    next_index += 1
+            self.__receive(outputs, workers)
+            for worker in workers:
+                worker.join()
+        finally:
+            stats.finish()
+            for worker in workers:
+                if worker.is_alive():
+                    worker.terminate()
+                    worker.join()
+            inputs.close()
+            outputs.close()
+
+    def __receive(self, outputs, workers) -> Optional[tuple]:
+        """
+        The next result message, keeping worker metrics on the way. None once every worker has finished
+        """
+        while len(self.metrics) < len(workers):
+            try:
+                message = pickle.loads(outputs.get(timeout=1.0))
+            except queue.Empty:
+                crashed = [x for x in workers if x.exitcode not in (None, 0)]
+                if crashed:
+                    raise RuntimeError(f"Worker {crashed[0].name} exited with {crashed[0].exitcode}")
+                continue
+            if message[0] == _METRICS:
+                self.metrics[message[1]] = message[2]
+                continue
+            return message
@@ -0,0 +1,141 @@
+import asyncio
+import os
+
+import aiohttp
+import pytest
+
+from mdbclient.aggregate_cache import PersistentAggregateCache
+from mdbclient.mdb_standin import MdbStandin
+from mdbclient.mdbclient import MdbClient, IndexpointTimeline
+
+
+def cached_client(session, standin, path, **kwargs) -> MdbClient:
+    client = MdbClient(session, standin.api_base, "test", "test_correlation")
+    client.aggregate_cache = PersistentAggregateCache(path, **kwargs)
+    return client
+
+
+@pytest.mark.asyncio
+async def test_cache_survives_restart(tmp_path):
+    path = str(tmp_path / "aggregates.sqlite")
+    async with MdbStandin() as standin, aiohttp.ClientSession() as session:
+        first = cached_client(session, standin, path)
+        meo = await first.create_master_eo({"title": "fozz"})
+        await first.open(meo)
+        first.aggregate_cache.close()
+        gets, resolves = standin.request_count("GET", "get"), standin.request_count("GET", "resolve")
+
+        second = cached_client(session, standin, path)
+        assert (await second.resolve(meo["resId"]))["title"] == "fozz"
+        assert (await second.open(meo))["title"] == "fozz"
+
+        assert standin.request_count("GET", "get") == gets
+        assert standin.request_count("GET", "resolve") == resolves
+        assert second.aggregate_cache.hits == 2
+
+
+@pytest.mark.asyncio
+async def test_stale_entries_are_revalidated(tmp_path):
+    async with MdbStandin() as standin, aiohttp.ClientSession() as session:
+        client = cached_client(session, standin, str(tmp_path / "aggregates.sqlite"), ttl=0)
+        meo = await client.create_master_eo({"title": "fozz"})
+        await client.open(meo)
+        await client.open(meo)
+        assert client.aggregate_cache.revalidated == 1
+
+        standin.lookup(meo["resId"])["title"] = "changed elsewhere"
+        assert (await client.open(meo))["title"] == "changed elsewhere"
+        assert client.aggregate_cache.misses == 2
+
+
+@pytest.mark.asyncio
+async def test_writes_invalidate(tmp_path):
+    async with MdbStandin() as standin, aiohttp.ClientSession() as session:
+        client = cached_client(session, standin, str(tmp_path / "aggregates.sqlite"))
+        meo = await client.create_master_eo({"title": "fozz"})
+        await client.open(meo)
+        await client.update(meo, {"title": "bizz"})
+        assert (await client.open(meo))["title"] == "bizz"
+
+        await client.create_media_object(meo, {"name": "fozz-mo"})
+        assert len((await client.open(meo)).media_objects().children) == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_open_does_not_cache_state_from_before_a_write(tmp_path):
+    async with MdbStandin(latency=0.01) as standin, aiohttp.ClientSession() as session:
+        client = cached_client(session, standin, str(tmp_path / "aggregates.sqlite"))
+        meo = await client.create_master_eo({"title": "fozz"})
+        timeline = await client.create_timeline(meo, {"type": IndexpointTimeline.TYPE})
+        for x in range(5):
+            client.aggregate_cache.invalidate(res_id=meo["resId"])
+            await asyncio.gather(client.open(meo), client.update(meo, {"title": f"new {x}"}))
+            assert (await client.open(meo))["title"] == f"new {x}"
+
+            client.aggregate_cache.invalidate(res_id=timeline["resId"])
+            replacement = {"type": IndexpointTimeline.TYPE, "title": f"replaced {x}"}
+            await asyncio.gather(client.open(timeline), client.replace_timeline(meo, timeline, replacement))
+            assert (await client.open(timeline)).get("title") == f"replaced {x}"
+
+
+@pytest.mark.asyncio
+async def test_read_finishing_after_a_write_is_not_cached(tmp_path):
+    async with MdbStandin() as standin, aiohttp.ClientSession() as session:
+        client = cached_client(session, standin, str(tmp_path / "aggregates.sqlite"))
+        meo = await client.create_master_eo({"title": "fozz"})
+        written = asyncio.Event()
+        http_get = client.rest_api_util.http_get
+
+        async def get_then_wait_for_write(*args, **kwargs):
+            response = await http_get(*args, **kwargs)
+            await written.wait()
+            return response
+
+        client.rest_api_util.http_get = get_then_wait_for_write
+        read = asyncio.ensure_future(client.open(meo))
+        await asyncio.sleep(0.05)
+        client.rest_api_util.http_get = http_get
+        await client.update(meo, {"title": "bizz"})
+        written.set()
+        assert (await read)["title"] == "fozz"
+        assert (await client.open(meo))["title"] == "bizz"
+
+
+def test_put_refuses_data_fetched_before_an_invalidation(tmp_path):
+    cache = PersistentAggregateCache(str(tmp_path / "aggregates.sqlite"), max_invalidations=2)
+    body = {"resId": "id-1", "links": [{"rel": "self", "href": "http://mdb/1"}]}
+    generation = cache.generation()
+    cache.invalidate(res_id="id-1")
+    cache.put(body, generation=generation)
+    assert cache.by_res_id("id-1") is None
+
+    cache.put(body, generation=cache.generation())
+    generation = cache.generation()
+    cache.invalidate(res_id="id-2")
+    cache.put(dict(body, title="unrelated invalidation"), generation=generation)
+    assert cache.by_res_id("id-1").json()["title"] == "unrelated invalidation"
+
+    cache.invalidate(res_id="id-3")
+    cache.invalidate(res_id="id-4")
+    cache.put(dict(body, title="forgotten"), generation=generation)
+    assert cache.by_res_id("id-1").json()["title"] == "unrelated invalidation"
+
+
+def test_eviction_keeps_newest_entries(tmp_path):
+    cache = PersistentAggregateCache(str(tmp_path / "aggregates.sqlite"), max_bytes=2000, evict_interval=1)
+    for x in range(20):
+        cache.put({"resId": f"id-{x}", "filler": "x" * 200, "links": [{"rel": "self", "href": f"http://mdb/{x}"}]})
+
+    assert cache.size() <= 2000
+    assert cache.by_res_id("id-19") is not None
+    assert cache.by_res_id("id-0") is None
+
+
+def test_readers_in_other_connections_see_writes(tmp_path):
+    path = str(tmp_path / "aggregates.sqlite")
+    writer = PersistentAggregateCache(path)
+    reader = PersistentAggregateCache(path)
+    writer.put({"resId": "id-1", "links": [{"rel": "self", "href": "http://mdb/1"}]})
+
+    assert reader.by_link("http://mdb/1").json()["resId"] == "id-1"
+    assert os.path.exists(path + "-wal")
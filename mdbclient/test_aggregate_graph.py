@@ -0,0 +1,79 @@
+import pytest
+
+from mdbclient.aggregate_graph import AggregateGraph
+from mdbclient.model import MasterEO, MediaObject, PublicationMediaObject, Essence
+
+TYPES = "http://id.nrk.no/2016/mdb/types/"
+
+
+def res_id(kind, x):
+    return f"http://id.nrk.no/2016/mdb/{kind}/{x}"
+
+
+def ref(kind, x):
+    return {"resId": res_id(kind, x), "links": [{"rel": "self", "href": f"http://mdb/api/{kind}/{x}"}]}
+
+
+meo = MasterEO({"resId": res_id("masterEO", 1), "type": TYPES + "MasterEditorialObject", "title": "fozz",
+                "mediaObjects": [ref("mediaObject", 1)]})
+mo = MediaObject({"resId": res_id("mediaObject", 1), "type": TYPES + "MediaObject", "masterEO": ref("masterEO", 1),
+                  "publishedVersions": [ref("publicationMediaObject", 1), ref("publicationMediaObject", 2)]})
+pmo = PublicationMediaObject({"resId": res_id("publicationMediaObject", 1), "type": TYPES + "PublicationMediaObject",
+                              "publishedVersionOf": ref("mediaObject", 1), "playouts": [ref("essence", 1)]})
+essence = Essence({"resId": res_id("essence", 1), "type": TYPES + "Essence",
+                   "playoutOf": ref("publicationMediaObject", 1)})
+
+
+def test_answers_relations_in_both_directions():
+    graph = AggregateGraph()
+    graph.add_all([meo, mo, pmo, essence])
+    assert graph.owner(essence.resid, "MasterEditorialObject") == meo.resid
+    assert graph.owner(essence.resid, "MediaObject") == mo.resid
+    assert graph.targets(mo.resid, "publishedVersions") == [res_id("publicationMediaObject", x) for x in (1, 2)]
+    assert graph.sources(mo.resid, "publishedVersionOf") == [pmo.resid]
+    assert graph.sources(mo.resid) == [meo.resid, pmo.resid]
+    assert isinstance(graph.get(mo.resid), MediaObject)
+
+
+def test_edges_are_known_from_either_end():
+    graph = AggregateGraph()
+    graph.add(meo)
+    graph.add(essence)
+    assert graph.owner(mo.resid, "MasterEditorialObject") == meo.resid
+    assert graph.kind_of(pmo.resid) == "PublicationMediaObject"
+    assert graph.owner(essence.resid, "MasterEditorialObject") is None
+
+
+def test_replacing_an_aggregate_replaces_its_edges():
+    graph = AggregateGraph()
+    graph.add(mo)
+    graph.add(MediaObject(dict(mo, publishedVersions=[ref("publicationMediaObject", 3)])))
+    assert graph.targets(mo.resid, "publishedVersions") == [res_id("publicationMediaObject", 3)]
+    assert graph.sources(res_id("publicationMediaObject", 1)) == []
+
+
+def test_copies_on_the_way_in_and_out():
+    graph = AggregateGraph()
+    added = MasterEO(dict(meo, mediaObjects=[ref("mediaObject", 1)]))
+    graph.add(added)
+    added["mediaObjects"].append(ref("mediaObject", 2))
+    graph.get(meo.resid)["title"] = "changed"
+    assert graph.get(meo.resid)["title"] == "fozz"
+    assert len(graph.get(meo.resid)["mediaObjects"]) == 1
+
+
+def test_evicts_least_recently_used_with_their_edges():
+    graph = AggregateGraph(max_objects=2)
+    graph.add_all([meo, mo])
+    graph.get(meo.resid)
+    graph.add(pmo)
+    assert mo.resid not in graph and meo.resid in graph
+    assert graph.targets(mo.resid) == []
+    assert graph.sources(meo.resid) == []
+    assert graph.sources(mo.resid) == [meo.resid, pmo.resid]
+    assert graph.evictions == 1
+
+
+def test_rejects_objects_without_res_id():
+    with pytest.raises(ValueError):
+        AggregateGraph().add({"title": "no resId"})
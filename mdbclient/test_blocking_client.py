@@ -0,0 +1,36 @@
+import asyncio
+import concurrent.futures
+
+import pytest
+
+from mdbclient.blocking_client import BlockingMdbClient
+from mdbclient.mdb_standin import MdbStandin
+
+
+@pytest.mark.asyncio
+async def test_blocking_calls_from_many_threads():
+    async with MdbStandin() as standin:
+        loop = asyncio.get_running_loop()
+        mdb = await loop.run_in_executor(None, BlockingMdbClient, standin.api_base, "test", "test_correlation")
+        try:
+            meo = await loop.run_in_executor(None, mdb.create_master_eo, {"title": "fozz"})
+            with concurrent.futures.ThreadPoolExecutor(8) as pool:
+                resolved = await asyncio.gather(*[loop.run_in_executor(pool, mdb.resolve, meo["resId"])
+                                                  for _ in range(16)])
+            assert {x["title"] for x in resolved} == {"fozz"}
+            assert standin.request_count("GET", "resolve") == 16
+        finally:
+            await loop.run_in_executor(None, mdb.close)
+
+
+@pytest.mark.asyncio
+async def test_timeout_cancels_call():
+    async with MdbStandin(latency=0.5) as standin:
+        loop = asyncio.get_running_loop()
+        mdb = await loop.run_in_executor(None, BlockingMdbClient, standin.api_base, "test", "test_correlation")
+        try:
+            with pytest.raises(TimeoutError):
+                await loop.run_in_executor(None, lambda: mdb.call("create_master_eo", {"title": "fozz"},
+                                                                  timeout=0.05))
+        finally:
+            await loop.run_in_executor(None, mdb.close)
@@ -0,0 +1,81 @@
+import gzip
+import json
+import os
+
+import aiohttp
+import pytest
+
+from mdbclient.bulk_export import BulkExporter, NdjsonGzipSink, PerAggregateSink, EXPORT_PUBLICATION_EVENT
+from mdbclient.checkpoint import Checkpoint
+from mdbclient.mdb_standin import MdbStandin
+from mdbclient.mdbclient import MdbClient
+
+
+def read_lines(path):
+    with gzip.open(path, "rt") as f:
+        return [json.loads(x) for x in f]
+
+
+async def create_meos(client, count):
+    return [await client.create_master_eo({"title": f"meo\n{x}"}) for x in range(count)]
+
+
+@pytest.mark.asyncio
+async def test_exports_to_ndjson_and_resumes(tmp_path):
+    async with MdbStandin() as standin, aiohttp.ClientSession() as session:
+        client = MdbClient(session, standin.api_base, "test", "test_correlation")
+        meos = await create_meos(client, 5)
+        ids = [x["resId"] for x in meos]
+        checkpoint_path = str(tmp_path / "export.done")
+
+        first = await BulkExporter(client, NdjsonGzipSink(str(tmp_path / "export")), Checkpoint(checkpoint_path),
+                                   concurrency=3, chunk_size=16).run(ids[:3])
+        assert first.done == 3
+        missing = ids[4][:-4] + "0000"
+        second = await BulkExporter(client, NdjsonGzipSink(str(tmp_path / "export")), Checkpoint(checkpoint_path),
+                                    concurrency=3).run(ids + [missing])
+        assert (second.done, second.skipped, second.missing) == (2, 3, 1)
+
+        exported = read_lines(str(tmp_path / "export.0000.ndjson.gz")) + \
+                   read_lines(str(tmp_path / "export.0001.ndjson.gz"))
+        assert sorted(x["resId"] for x in exported) == sorted(ids)
+        assert sorted(x["title"] for x in exported) == [f"meo\n{x}" for x in range(5)]
+
+
+@pytest.mark.asyncio
+async def test_exports_per_aggregate(tmp_path):
+    async with MdbStandin() as standin, aiohttp.ClientSession() as session:
+        client = MdbClient(session, standin.api_base, "test", "test_correlation")
+        meo = (await create_meos(client, 1))[0]
+        pe = await client.create_publication_event(meo, {"title": "pe"})
+        guid = pe["resId"].rsplit("/", 1)[1]
+        stats = await BulkExporter(client, PerAggregateSink(str(tmp_path)), kind=EXPORT_PUBLICATION_EVENT).run(
+            [guid])
+        assert stats.done == 1
+        assert stats.bytes > 0
+        with gzip.open(os.path.join(str(tmp_path), f"{guid}.json.gz"), "rt") as f:
+            assert json.load(f)["title"] == "pe"
+
+
+@pytest.mark.asyncio
+async def test_malformed_res_id_fails_only_itself(tmp_path):
+    async with MdbStandin() as standin, aiohttp.ClientSession() as session:
+        client = MdbClient(session, standin.api_base, "test", "test_correlation")
+        meos = await create_meos(client, 2)
+        malformed = "http://id.nrk.no/2016/mdb/masterEO/not/a/guid"
+        exporter = BulkExporter(client, NdjsonGzipSink(str(tmp_path / "export")), concurrency=2)
+        stats = await exporter.run([malformed] + [x["resId"] for x in meos])
+        assert (stats.done, stats.failed) == (2, 1)
+        assert isinstance(exporter.failures[malformed], ValueError)
+
+
+def test_checkpoint_ignores_torn_line(tmp_path):
+    path = str(tmp_path / "done")
+    with open(path, "w") as f:
+        f.write("a\nb\ntor")
+    checkpoint = Checkpoint(path)
+    assert len(checkpoint) == 2
+    checkpoint.mark_done("c")
+    checkpoint.close()
+    assert Checkpoint(path).is_done("c")
+    assert not Checkpoint(path).is_done("tor")
@@ -0,0 +1,61 @@
+import time
+
+import aiohttp
+import pytest
+
+from mdbclient.cassette import RecordingSession, ReplaySession, UnmatchedRequest, TIMING_ORIGINAL, request_key
+from mdbclient.mdb_standin import MdbStandin
+from mdbclient.mdbclient import MdbClient, Http404
+
+
+async def record(path, latency=0.0):
+    async with MdbStandin(latency=latency) as standin, aiohttp.ClientSession() as session:
+        async with RecordingSession(session, path) as recorder:
+            client = MdbClient(recorder, standin.api_base, "test", "test_correlation")
+            meo = await client.create_master_eo({"title": "fozz"})
+            resolved = await client.resolve(meo["resId"])
+            await client.resolve("http://id.nrk.no/2016/mdb/masterEO/missing", fail_on_missing=False)
+            return standin.api_base, meo, resolved
+
+
+def test_request_key_normalises_params():
+    assert request_key("get", "http://a:1/api/resolve?b=2", {"a": "1"}) == \
+           request_key("GET", "http://b:2/api/resolve", {"b": "2", "a": "1"})
+    assert request_key("POST", "http://a/x", body='{"a": 1}') != request_key("POST", "http://a/x", body='{"a": 2}')
+
+
+@pytest.mark.asyncio
+async def test_replays_recorded_exchanges(tmp_path):
+    path = str(tmp_path / "cassette.jsonl.gz")
+    api_base, meo, resolved = await record(path)
+
+    replay = ReplaySession(path)
+    client = MdbClient(replay, api_base, "test", "test_correlation")
+    replayed_meo = await client.create_master_eo({"title": "fozz"})
+    assert replayed_meo["resId"] == meo["resId"]
+    assert (await client.resolve(meo["resId"]))["title"] == resolved["title"]
+    assert await client.resolve("http://id.nrk.no/2016/mdb/masterEO/missing", fail_on_missing=False) is None
+    with pytest.raises(Http404):
+        await client.resolve("http://id.nrk.no/2016/mdb/masterEO/missing")
+    assert replay.report() == {"matched": 4, "repeated": 1, "unmatched": [], "unused": 0}
+
+
+@pytest.mark.asyncio
+async def test_reports_unmatched(tmp_path):
+    path = str(tmp_path / "cassette.jsonl.gz")
+    api_base, meo, resolved = await record(path)
+    replay = ReplaySession(path)
+    client = MdbClient(replay, api_base, "test", "test_correlation")
+    with pytest.raises(UnmatchedRequest):
+        await client.create_master_eo({"title": "not recorded"})
+    assert len(replay.report()["unmatched"]) == 1
+
+
+@pytest.mark.asyncio
+async def test_replay_with_original_timing(tmp_path):
+    path = str(tmp_path / "cassette.jsonl.gz")
+    api_base, meo, resolved = await record(path, latency=0.05)
+    client = MdbClient(ReplaySession(path, timing=TIMING_ORIGINAL), api_base, "test", "test_correlation")
+    started = time.monotonic()
+    await client.resolve(meo["resId"])
+    assert time.monotonic() - started >= 0.05
@@ -0,0 +1,114 @@
+import asyncio
+
+import pytest
+
+from mdbclient.change_consumer import MdbChangeConsumer, InMemoryChangeSource, ChangeMessage
+from mdbclient.mdbclient import MasterEO
+
+meo1 = "http://id.nrk.no/2016/mdb/masterEO/796d659f-a805-4c96-ad65-9fa805ac96cb"
+meo2 = "http://id.nrk.no/2016/mdb/masterEO/896d659f-a805-4c96-ad65-9fa805ac96cb"
+
+
+class ResolvingClient:
+    def __init__(self):
+        self.resolved = []
+
+    async def resolve(self, res_id, fail_on_missing=True, headers=None):
+        self.resolved.append(res_id)
+        return MasterEO({"resId": res_id, "type": "http://id.nrk.no/2016/mdb/types/MasterEditorialObject"})
+
+
+async def wait_until_drained(source):
+    while not source.is_drained():
+        await asyncio.sleep(0.01)
+
+
+def test_res_id_from_aggregate_identifier():
+    message = ChangeMessage({"type": "MasterEOAggregate", "aggregateIdentifier": "796d659f-a805-4c96-ad65-9fa805ac96cb"},
+                            1)
+    assert message.res_id == meo1
+
+
+@pytest.mark.asyncio
+async def test_deduplicates_within_batch():
+    client = ResolvingClient()
+    source = InMemoryChangeSource()
+    handled = []
+
+    async def handler(resolved, messages):
+        handled.append((resolved["resId"], len(messages)))
+
+    for x in range(5):
+        source.publish({"resId": meo1})
+    source.publish({"resId": meo2})
+    async with MdbChangeConsumer(client, source, handler, batch_size=10, batch_timeout=0.05):
+        await wait_until_drained(source)
+    assert sorted(client.resolved) == [meo1, meo2]
+    assert sorted(handled) == [(meo1, 5), (meo2, 1)]
+    assert sorted(source.acked) == [1, 2, 3, 4, 5, 6]
+
+
+@pytest.mark.asyncio
+async def test_failing_handler_nacks():
+    source = InMemoryChangeSource()
+
+    async def handler(resolved, messages):
+        raise Exception("boom")
+
+    source.publish({"resId": meo1})
+    source.publish({"resId": meo1})
+    consumer = MdbChangeConsumer(ResolvingClient(), source, handler, batch_size=2, batch_timeout=0.05)
+    async with consumer:
+        await wait_until_drained(source)
+    assert source.nacked == [1, 2]
+    assert consumer.stats.failed == 1
+
+
+@pytest.mark.asyncio
+async def test_respects_prefetch():
+    source = InMemoryChangeSource()
+    batch_sizes = []
+
+    async def handler(resolved, messages):
+        batch_sizes.append(len(messages))
+
+    for x in range(6):
+        source.publish({"resId": meo1})
+    async with MdbChangeConsumer(ResolvingClient(), source, handler, batch_size=10, batch_timeout=0.05,
+                                 prefetch_count=3):
+        await wait_until_drained(source)
+    assert batch_sizes == [3, 3]
+
+
+class DroppingChannelSource(InMemoryChangeSource):
+    def __init__(self, failing_acks):
+        super().__init__()
+        self.failing_acks = failing_acks
+
+    async def ack(self, delivery_tag):
+        if delivery_tag in self.failing_acks:
+            await self._release()
+            raise ConnectionError("channel closed")
+        await super().ack(delivery_tag)
+
+
+@pytest.mark.asyncio
+async def test_failing_batch_does_not_stop_consuming():
+    source = DroppingChannelSource(failing_acks={1})
+    handled = []
+
+    async def handler(resolved, messages):
+        handled.append(resolved["resId"])
+
+    consumer = MdbChangeConsumer(ResolvingClient(), source, handler, batch_size=1, batch_timeout=0.01)
+    async with consumer:
+        source.publish({"resId": meo1})
+        await wait_until_drained(source)
+        source.publish({"resId": meo2})
+        await wait_until_drained(source)
+        while len(handled) < 2:
+            await asyncio.sleep(0.01)
+    assert handled == [meo1, meo2]
+    assert source.acked == [2]
+    assert consumer.stats.batch_failures == 1
+    assert isinstance(consumer.last_error, ConnectionError)
@@ -0,0 +1,86 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from mdbclient.change_pipeline import AsyncChangePipeline, RingBufferSink, NdjsonFileSink, CoroutineSink, \
+    DROP_NEWEST
+from mdbclient.mdbclient import Change
+
+
+@pytest.mark.asyncio
+async def test_fans_out_to_all_sinks():
+    ring = RingBufferSink()
+    received = []
+
+    async def collect(changes):
+        received.extend(changes)
+
+    async with AsyncChangePipeline([ring, CoroutineSink(collect)], flush_interval=0.01) as pipeline:
+        pipeline.on_create("a", "masterEO", {"title": "fozz"})
+        pipeline.on_change("a", None, {"title": "fizz"})
+        pipeline.on_add("a", "subjects", {"title": "sub"})
+        pipeline.on_delete("a")
+    assert [x.type for x in ring.changes] == ["CREATE", "CHANGE", "ADD", "DELETE"]
+    assert len(received) == 4
+    assert pipeline.stats.delivered == 4
+
+
+@pytest.mark.asyncio
+async def test_ring_buffer_is_bounded():
+    ring = RingBufferSink(capacity=3)
+    async with AsyncChangePipeline([ring], flush_interval=0.01) as pipeline:
+        for x in range(10):
+            pipeline.on_change(str(x), None, {})
+    assert [x.resId for x in ring.changes] == ["7", "8", "9"]
+
+
+@pytest.mark.asyncio
+async def test_drops_when_queue_is_full():
+    ring = RingBufferSink()
+    pipeline = AsyncChangePipeline([ring], max_queue=2)
+    for x in range(5):
+        pipeline.on_change(str(x), None, {})
+    assert pipeline.stats.dropped == 3
+    await pipeline.flush()
+    assert [x.resId for x in ring.changes] == ["3", "4"]
+
+    pipeline = AsyncChangePipeline([ring], max_queue=2, overflow=DROP_NEWEST)
+    ring.pop_changes()
+    for x in range(5):
+        pipeline.on_change(str(x), None, {})
+    await pipeline.flush()
+    assert [x.resId for x in ring.changes] == ["0", "1"]
+
+
+@pytest.mark.asyncio
+async def test_put_waits_for_room():
+    release = asyncio.Event()
+
+    async def slow(changes):
+        await release.wait()
+
+    async with AsyncChangePipeline([CoroutineSink(slow)], max_queue=2, batch_size=2, flush_interval=0) as pipeline:
+        for x in range(4):
+            await pipeline.put(Change(str(x), "CHANGE", None, {}))
+        blocked = asyncio.ensure_future(pipeline.put(Change("5", "CHANGE", None, {})))
+        await asyncio.sleep(0.05)
+        assert not blocked.done()
+        release.set()
+        await blocked
+    assert pipeline.stats.dropped == 0
+    assert pipeline.stats.delivered == 5
+
+
+@pytest.mark.asyncio
+async def test_ndjson_sink_rotates(tmp_path):
+    path = str(tmp_path / "changes.ndjson")
+    sink = NdjsonFileSink(path, max_bytes=10, backup_count=2)
+    for x in range(4):
+        await sink.write([Change(str(x), "CHANGE", None, {"n": x})])
+    assert os.path.exists(path + ".1")
+    assert os.path.exists(path + ".2")
+    assert not os.path.exists(path + ".3")
+    with open(path) as f:
+        assert json.loads(f.readline())["resId"] == "3"
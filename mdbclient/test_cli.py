@@ -0,0 +1,56 @@
+import asyncio
+import json
+
+import pytest
+
+from mdbclient.cli import main
+from mdbclient.mdb_standin import MdbStandin
+
+
+async def run_cli(*argv) -> int:
+    return await asyncio.get_running_loop().run_in_executor(None, main, list(argv))
+
+
+def read_ndjson(path) -> list:
+    with open(path) as f:
+        return [json.loads(x) for x in f]
+
+
+@pytest.mark.asyncio
+async def test_resolve_writes_ndjson(tmp_path):
+    async with MdbStandin() as standin:
+        meos = [standin.add("masterEO", {"title": f"fozz-{x}"}) for x in range(5)]
+        missing = "http://id.nrk.no/2016/mdb/masterEO/796d659f-a805-4c96-ad65-9fa805ac96cb"
+        ids = tmp_path / "ids.txt"
+        ids.write_text("\n".join([x["resId"] for x in meos] + ["", "# comment", missing]) + "\n")
+        output = tmp_path / "out.ndjson"
+
+        exit_code = await run_cli("--api-base", standin.base_url, "--output", str(output), "--quiet",
+                                  "resolve", str(ids))
+
+        records = read_ndjson(output)
+        assert exit_code == 0
+        assert sorted(x["title"] for x in records if "title" in x) == [f"fozz-{x}" for x in range(5)]
+        assert [x for x in records if x.get("missing")] == [{"input": missing, "missing": True}]
+
+
+@pytest.mark.asyncio
+async def test_references_and_diff(tmp_path):
+    async with MdbStandin() as standin:
+        ref_type = "http://id.nrk.no/2016/mdb/reference/PSAPI"
+        fozz = standin.add("masterEO", {"title": "fozz", "references": [{"type": ref_type, "reference": "A"}]})
+        bizz = standin.add("masterEO", {"title": "bizz"})
+        values = tmp_path / "values.txt"
+        values.write_text("A\nB\n")
+        pairs = tmp_path / "pairs.txt"
+        pairs.write_text(f"{fozz['resId']} {bizz['resId']}\n")
+
+        await run_cli("--api-base", standin.base_url, "--output", str(tmp_path / "refs.ndjson"), "--quiet",
+                      "references", "--type", ref_type, str(values))
+        exit_code = await run_cli("--api-base", standin.base_url, "--output", str(tmp_path / "diff.ndjson"),
+                                  "--quiet", "diff", str(pairs))
+
+        refs = sorted(read_ndjson(tmp_path / "refs.ndjson"), key=lambda x: x["input"])
+        assert refs == [{"input": "A", "resIds": [fozz["resId"]]}, {"input": "B", "resIds": []}]
+        assert exit_code == 0
+        assert read_ndjson(tmp_path / "diff.ndjson")[0]["modified"]["title"] == "bizz"
@@ -0,0 +1,104 @@
+import asyncio
+import itertools
+
+import aiohttp
+import pytest
+
+from mdbclient.crawler import Crawler, _Frontier
+from mdbclient.mdb_standin import MdbStandin, KIND_SERIE, KIND_SEASON, KIND_EPISODE, KIND_MASTER_EO, \
+    KIND_MEDIA_OBJECT
+from mdbclient.mdbclient import MdbClient
+
+
+def catalogue(standin: MdbStandin, seasons=2, episodes=3) -> dict:
+    """
+    A serie with seasons of episodes, each with a master EO that has a media object
+    """
+    serie = standin.add(KIND_SERIE, {"title": "fozz"})
+    for s in range(seasons):
+        season = standin.add(KIND_SEASON, {"title": f"season {s}", "serie": {"resId": serie["resId"]}})
+        for e in range(episodes):
+            episode = standin.add(KIND_EPISODE, {"title": f"episode {s}.{e}", "season": {"resId": season["resId"]}})
+            meo = standin.add(KIND_MASTER_EO, {"title": f"episode {s}.{e}"})
+            standin.add(KIND_MEDIA_OBJECT, {"name": f"mo {s}.{e}", "masterEO": {"resId": meo["resId"]}})
+            episode["masterEO"] = standin.reference_to(meo)
+    return serie
+
+
+@pytest.mark.asyncio
+async def test_crawls_breadth_first_and_once():
+    async with MdbStandin(latency=0.002) as standin, aiohttp.ClientSession() as session:
+        client = MdbClient(session, standin.api_base, "test", "test_correlation")
+        serie = catalogue(standin)
+        crawler = Crawler(client, concurrency=4)
+        base, guid = serie["resId"].rsplit("/", 1)
+        nodes = [x async for x in crawler.crawl([serie["resId"], f"{base}/{guid.upper()}"])]
+
+        assert all(x.is_successful() for x in nodes)
+        # serie, 2 seasons, 6 episodes, 6 master EOs, 6 media objects; the upper case seed is the same serie
+        assert len(nodes) == len({x.res_id for x in nodes}) == 21
+        assert standin.request_count("GET", "resolve") == 1
+        assert crawler.stats.done == 21
+
+
+@pytest.mark.asyncio
+async def test_crawl_stops_at_max_depth_and_reports_missing():
+    async with MdbStandin() as standin, aiohttp.ClientSession() as session:
+        client = MdbClient(session, standin.api_base, "test", "test_correlation")
+        serie = catalogue(standin)
+        missing = "http://id.nrk.no/2016/mdb/serie/796d659f-a805-4c96-ad65-9fa805ac96cb"
+        nodes = [x async for x in Crawler(client, concurrency=1, max_depth=2).crawl([serie["resId"], missing])]
+
+        assert len(nodes) == 10
+        assert [x.depth for x in nodes] == [0, 0, 1, 1, 2, 2, 2, 2, 2, 2]
+        assert [x.aggregate for x in nodes if x.res_id == missing] == [None]
+
+
+@pytest.mark.asyncio
+async def test_resumes_where_it_stopped(tmp_path):
+    latencies = itertools.cycle([0.001, 0.05])
+    async with MdbStandin(latency=lambda: next(latencies)) as standin, aiohttp.ClientSession() as session:
+        client = MdbClient(session, standin.api_base, "test", "test_correlation")
+        serie = catalogue(standin)
+        fetches = []
+        open_ = client.open
+
+        async def recording_open(*args, **kwargs):
+            fetches.append(asyncio.current_task())
+            return await open_(*args, **kwargs)
+
+        client.open = recording_open
+        state = str(tmp_path / "crawl")
+        first = []
+        crawl = Crawler(client, concurrency=2, state_dir=state).crawl([serie["resId"]])
+        async for node in crawl:
+            first.append(node.res_id)
+            if len(first) == 3:
+                break
+        await crawl.aclose()
+        # the fetches in flight when the crawl was left are cancelled and awaited
+        assert all(x.done() for x in fetches)
+
+        resumed = Crawler(client, concurrency=2, state_dir=state)
+        rest = [x.res_id async for x in resumed.crawl([serie["resId"]])]
+
+        # the node being handled when the first crawl stopped is yielded again
+        assert set(first) | set(rest) == {x for x in standin.objects if "versionGroup" not in x}
+        assert len(set(first) & set(rest)) <= 1
+        assert resumed.stats.skipped == 2
+
+
+def test_frontier_spills_in_order(tmp_path):
+    frontier = _Frontier(str(tmp_path / "frontier"), max_in_memory=3)
+    entries = [(x, f"r{x}", f"h{x}" if x % 2 else None) for x in range(10)]
+    taken = []
+    for entry in entries[:7]:
+        frontier.push(entry)
+    taken += [frontier.pop() for _ in range(4)]
+    for entry in entries[7:]:
+        frontier.push(entry)
+    while frontier:
+        taken.append(frontier.pop())
+    assert taken == entries
+    assert frontier.spilled_total > 0
+    assert not (tmp_path / "frontier").exists()
@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+from mdbclient.json_stream import JsonArrayDecoder
+
+
+def decode_in_chunks(data: bytes, size: int) -> list:
+    decoder = JsonArrayDecoder()
+    result = []
+    for x in range(0, len(data), size):
+        result.extend(decoder.feed(data[x:x + size]))
+    return result + decoder.close()
+
+
+def test_decodes_elements_split_across_chunks():
+    elements = [{"title": "blåbær", "n": x, "nested": [1, {"a": "]"}]} for x in range(50)] + [12345, "x", None, True]
+    data = json.dumps(elements).encode("utf-8")
+
+    for size in (1, 3, 7, 64, len(data)):
+        assert decode_in_chunks(data, size) == elements
+
+
+def test_elements_are_returned_as_soon_as_complete():
+    decoder = JsonArrayDecoder()
+
+    assert decoder.feed(b'[{"a": 1}, {"b"') == [{"a": 1}]
+    assert decoder.feed(b': 2}, 12') == [{"b": 2}]
+    assert decoder.feed(b'3]') == [123]
+    assert decoder.close() == []
+
+
+def test_empty_and_truncated_arrays():
+    assert decode_in_chunks(b" [ ] ", 1) == []
+    with pytest.raises(ValueError):
+        decode_in_chunks(b'[{"a": 1}, {"b": ', 4)
+
+
+def test_numbers_split_inside_their_fraction_or_exponent():
+    elements = [1.5, -2.25e10, 3E-7, 4, 0.5]
+    data = json.dumps(elements).encode("utf-8")
+    for size in range(1, 8):
+        assert decode_in_chunks(data, size) == elements
+
+    decoder = JsonArrayDecoder()
+    assert decoder.feed(b"[1.") == []
+    assert decoder.feed(b"5]") == [1.5]
+
+
+def test_trailing_comma_is_rejected():
+    with pytest.raises(ValueError):
+        decode_in_chunks(b"[1,]", 2)
+    with pytest.raises(ValueError):
+        decode_in_chunks(b"[,]", 8)
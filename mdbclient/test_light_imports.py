@@ -0,0 +1,24 @@
+import os
+import subprocess
+import sys
+
+import mdbclient
+
+
+def loaded_modules_after(statement: str) -> set:
+    probe = f"import sys\n{statement}\nprint(' '.join(sys.modules))"
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return set(subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, check=True,
+                              cwd=root).stdout.split())
+
+
+def test_data_layer_imports_without_http_stack():
+    loaded = loaded_modules_after("import mdbclient, mdbclient.model, mdbclient.mdb_ids, mdbclient.relations, "
+                                  "mdbclient.tools.diff_calculator, mdbclient.tools.fingerprint, "
+                                  "mdbclient.reference_stubs, mdbclient.aggregate_graph")
+    assert not loaded & {"aiohttp", "backoff", "mdbclient.mdbclient"}
+
+
+def test_client_classes_load_lazily_from_package():
+    assert mdbclient.MdbClient.__module__ == "mdbclient.mdbclient"
+    assert mdbclient.MasterEO is mdbclient.mdbclient.MasterEO
@@ -2,7 +2,7 @@ from uuid import UUID
 
 from mdbclient.mdb_ids import parse_res_id, MasterEOResId, PublicationEventResId, VersionGroupResId, MediaObjectResId, \
     PublicationMediaObjectResId, EssenceResId, MediaResourceResId, BagResId, MasterEOResourceResId, SerieResId, \
-    SeasonResId, ResId, from_aggregate_type
+    SeasonResId, ResId, from_aggregate_type, type_uri_of
 
 master_eo_guid = "796d659f-a805-4c96-ad65-9fa805ac96cb"
 master_eo_sut = f"http://id.nrk.no/2016/mdb/masterEO/{master_eo_guid}"
@@ -244,3 +244,16 @@ def test_bag_from_res_id_incorrect():
 
 def test_bag_from_res_id_correct():
     assert BagResId.matches("http://id.nrk.no/2016/mdb/bag/01f005de-3ca7-4c6b-b005-de3ca72c6b12")
+
+
+def test_type_uri_of():
+    assert type_uri_of(master_eo_sut) == "http://id.nrk.no/2016/mdb/types/MasterEditorialObject"
+    assert type_uri_of(pe_sut) == "http://id.nrk.no/2016/mdb/types/PublicationEvent"
+    assert type_uri_of("http://id.nrk.no/2017/mdb/timeline/796d659f-a805-4c96-ad65-9fa805ac96cb") is None
+    assert type_uri_of("http://example.com/x") is None
+
+
+def test_res_ids_are_equal_on_value():
+    assert parse_res_id(master_eo_sut) == MasterEOResId.of_id(master_eo_guid.upper())
+    assert parse_res_id(master_eo_sut) != PublicationEventResId.of_id(master_eo_guid)
+    assert len({parse_res_id(master_eo_sut), parse_res_id(master_eo_sut), parse_res_id(pe_sut)}) == 2
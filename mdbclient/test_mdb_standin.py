@@ -0,0 +1,113 @@
+import aiohttp
+import pytest
+
+from mdbclient.mdb_standin import MdbStandin
+from mdbclient.mdbclient import MdbClient, RecordingChangeListener, MasterEO, IndexpointTimeline
+
+
+@pytest.mark.asyncio
+async def test_create_update_meos():
+    async with MdbStandin() as standin, aiohttp.ClientSession() as session:
+        client = MdbClient(session, standin.api_base, "test", "test_correlation")
+        client.change_listener = RecordingChangeListener()
+        result = await client.create_master_eo({"title": "fozz"})
+        assert result['title'] == 'fozz'
+        updated = await client.update(result, {"title": "fizz"})
+        assert updated['title'] == 'fizz'
+        assert len(client.change_listener.changes) == 2
+
+
+@pytest.mark.asyncio
+async def test_delete_meos():
+    async with MdbStandin() as standin, aiohttp.ClientSession() as session:
+        client = MdbClient(session, standin.api_base, "test", "test_correlation")
+        result = await client.create_master_eo({"title": "fozz"})
+        await client.delete(result)
+        updated = await client.open(result)
+        assert updated['deleted'] is True
+
+
+@pytest.mark.asyncio
+async def test_create_essence():
+    async with MdbStandin() as standin, aiohttp.ClientSession() as session:
+        client = MdbClient(session, standin.api_base, "test", "test_correlation")
+        meo = await client.create_master_eo({"title": "fozz"})
+        mo = await client.create_media_object(meo, {"name": "fozz-mo"})
+        mr = await client.create_media_resource(mo, {})
+        pe = await client.create_publication_event(meo, {"subType": "http://authority.nrk.no/datadictionary/broadcast",
+                                                         "title": "en kald vårdag"})
+        pmo = await client.create_publication_media_object(pe, mo, {})
+        essence = await client.create_essence(pmo, mr, {})
+        reloaded = await client.open(meo)
+        pub = reloaded.publications()
+        assert (await client.open(pub.of_subtype("http://authority.nrk.no/datadictionary/broadcast").first()))[
+                   "title"] == "en kald vårdag"
+        assert essence['type'] == 'http://id.nrk.no/2016/mdb/types/Essence'
+        assert (await client.open(essence.composed_of()))["resId"] == mr["resId"]
+        assert len((await client.open(mo)).published_versions()) == 1
+        assert (await client.find_media_object("fozz-mo"))["resId"] == mo["resId"]
+
+
+@pytest.mark.asyncio
+async def test_timelines():
+    async with MdbStandin() as standin, aiohttp.ClientSession() as session:
+        client = MdbClient(session, standin.api_base, "test", "test_correlation")
+        meo = await client.create_master_eo({"title": "fozz"})
+        tl = await client.create_timeline(meo, {"type": IndexpointTimeline.TYPE})
+        resp = await client.add_timeline_item(tl, {"title": 'first indexpoint', "name": 'FIRST_INDEX'})
+        assert resp["type"] == 'http://id.nrk.no/2017/mdb/timelineitem/IndexpointTimelineItem'
+        replacement = {"type": IndexpointTimeline.TYPE, "items": [{"title": 'second', "name": 'SECOND'}]}
+        replaced = await client.replace_timeline(meo, tl, replacement)
+        assert isinstance(replaced, IndexpointTimeline)
+        assert [x["title"] for x in replaced["items"]] == ["second"]
+
+
+@pytest.mark.asyncio
+async def test_resolve_reference_and_mmeo():
+    async with MdbStandin() as standin, aiohttp.ClientSession() as session:
+        client = MdbClient(session, standin.api_base, "test", "test_correlation")
+        meo = await client.create_master_eo(
+            {"title": "fozz", "references": [{"type": "x-test:reference-type", "reference": "123"}]})
+        assert isinstance(await client.resolve(meo["resId"]), MasterEO)
+        assert await client.resolve("http://id.nrk.no/2016/mdb/masterEO/nope", fail_on_missing=False) is None
+        found = await client.reference("x-test:reference-type", "123")
+        assert [x["resId"] for x in found] == [meo["resId"]]
+        subj = await client.add_subject(meo, {"title": 'sub2'})
+        assert subj["title"] == 'sub2'
+        assert (await client.open(meo))["subjects"][0]["title"] == "sub2"
+
+
+@pytest.mark.asyncio
+async def test_series_and_admin_endpoints():
+    async with MdbStandin() as standin, aiohttp.ClientSession() as session:
+        client = MdbClient(session, standin.api_base, "test", "test_correlation")
+        serie = await client.create_serie("Bizz", "sift")
+        assert (await client.find_serie("Bizz", "sift"))["resId"] == serie["resId"]
+        assert await client.find_serie("Bizz", "other") is None
+        meo = await client.create_master_eo({"title": "fozz"})
+        guid = meo["resId"].rsplit("/", 1)[1]
+        assert await client.reindex_meo(guid) == "OK"
+        assert await client.broadcast_change("dest", meo["resId"]) is None
+        assert standin.broadcasts[0]["type"] == meo["type"]
+        assert '"fozz"' in await client.export_master_eo(guid)
+        assert len(await client.like_query("%foz%")) == 1
+
+
+@pytest.mark.asyncio
+async def test_lock_errors_are_retried():
+    async with MdbStandin() as standin, aiohttp.ClientSession() as session:
+        client = MdbClient(session, standin.api_base, "test", "test_correlation")
+        standin.inject_lock_errors(2)
+        meo = await client.create_master_eo({"title": "fozz"})
+        assert meo["title"] == "fozz"
+        assert standin.request_count("POST", "create") == 3
+
+
+@pytest.mark.asyncio
+async def test_non_lock_errors_are_raised():
+    async with MdbStandin() as standin, aiohttp.ClientSession() as session:
+        client = MdbClient(session, standin.api_base, "test", "test_correlation")
+        meo = await client.create_master_eo({"title": "fozz"})
+        meo["links"] = [{"rel": "self", "href": standin.api_base + "/masterEO/nope"}]
+        with pytest.raises(Exception):
+            await client.open(meo)
@@ -0,0 +1,114 @@
+import aiohttp
+import pytest
+
+from mdbclient.lookup_cache import LookupCache
+from mdbclient.mdb_standin import MdbStandin
+from mdbclient.mdbclient import MdbClient, MasterEO
+
+
+@pytest.mark.asyncio
+async def test_broadcast_changes_classifies_locally():
+    async with MdbStandin() as standin, aiohttp.ClientSession() as session:
+        client = MdbClient(session, standin.api_base, "test", "test_correlation")
+        meo = await client.create_master_eo({"title": "fozz"})
+        tl = await client.create_timeline(meo, {"type": "http://id.nrk.no/2017/mdb/timelinetype/IndexPoints"})
+        missing = "http://id.nrk.no/2017/mdb/timeline/796d659f-a805-4c96-ad65-9fa805ac96cb"
+        resolves_before = standin.request_count("GET", "resolve")
+
+        results = await client.broadcast_changes("dest", [meo["resId"], tl["resId"], missing])
+
+        assert [x.res_id for x in results] == [meo["resId"], tl["resId"], missing]
+        assert [x.is_successful() for x in results] == [True, True, False]
+        assert [x.resolved for x in results] == [False, True, True]
+        assert results[1].type == "http://id.nrk.no/2017/mdb/timelinetype/IndexPoints"
+        assert standin.request_count("GET", "resolve") - resolves_before == 2
+        assert [x["type"] for x in standin.broadcasts] == [meo["type"], tl["type"]]
+
+
+@pytest.mark.asyncio
+async def test_lookup_cache_serves_repeated_lookups_and_invalidates_on_create():
+    async with MdbStandin() as standin, aiohttp.ClientSession() as session:
+        client = MdbClient(session, standin.api_base, "test", "test_correlation")
+        client.lookup_cache = LookupCache()
+        ref = {"type": "http://id.nrk.no/2016/mdb/reference/PSAPI", "reference": "FOZZ1234"}
+
+        assert await client.reference(ref["type"], ref["reference"]) == []
+        assert await client.find_media_object("fozz-mo") is None
+        assert await client.find_serie("Fozz", "PI") is None
+        assert await client.reference(ref["type"], ref["reference"]) == []
+        assert standin.request_count("GET", "references") == 1
+        assert standin.request_count("GET", "mediaObject.by-name") == 1
+
+        meo = await client.create_master_eo({"title": "fozz", "references": [ref]})
+        await client.create_media_object(meo, {"name": "fozz-mo"})
+        await client.create_serie("Fozz", "PI")
+        opens_before = standin.request_count("GET", "get")
+
+        found = await client.reference_single(ref["type"], ref["reference"])
+        assert found["resId"] == meo["resId"]
+        assert (await client.find_media_object("fozz-mo"))["name"] == "fozz-mo"
+        assert (await client.find_serie("Fozz", "PI"))["title"] == "Fozz"
+        await client.reference(ref["type"], ref["reference"])
+        await client.find_media_object("fozz-mo")
+        assert standin.request_count("GET", "references") == 2
+        assert standin.request_count("GET", "mediaObject.by-name") == 2
+        assert standin.request_count("GET", "serie.by_title") == 2
+        assert standin.request_count("GET", "get") == opens_before
+
+
+@pytest.mark.asyncio
+async def test_lookup_cache_hands_out_copies_and_forgets_updated_and_deleted_objects():
+    async with MdbStandin() as standin, aiohttp.ClientSession() as session:
+        client = MdbClient(session, standin.api_base, "test", "test_correlation")
+        client.lookup_cache = LookupCache()
+        ref = {"type": "http://id.nrk.no/2016/mdb/reference/PSAPI", "reference": "FOZZ1234"}
+        meo = await client.create_master_eo({"title": "fozz", "references": [ref]})
+        mo = await client.create_media_object(meo, {"name": "fozz-mo"})
+
+        found = await client.reference(ref["type"], ref["reference"])
+        found[0].setdefault("subjects", []).append({"title": "local edit"})
+        again = await client.reference(ref["type"], ref["reference"])
+        assert {"title": "local edit"} not in again[0].get("subjects", [])
+        assert standin.request_count("GET", "references") == 1
+
+        assert (await client.find_media_object("fozz-mo"))["resId"] == mo["resId"]
+        await client.update(mo, {"name": "bizz-mo"})
+        assert await client.find_media_object("fozz-mo") is None
+        assert (await client.find_media_object("bizz-mo"))["resId"] == mo["resId"]
+
+        await client.delete(meo)
+        assert [x.get("deleted") for x in await client.reference(ref["type"], ref["reference"])] == [True]
+        assert standin.request_count("GET", "references") == 2
+
+
+@pytest.mark.asyncio
+async def test_references_many_dedups_values():
+    async with MdbStandin() as standin, aiohttp.ClientSession() as session:
+        client = MdbClient(session, standin.api_base, "test", "test_correlation")
+        ref_type = "http://id.nrk.no/2016/mdb/reference/PSAPI"
+        meo = await client.create_master_eo({"title": "fozz", "references": [{"type": ref_type, "reference": "A"}]})
+
+        found = await client.references_many(ref_type, ["A", "B", "A", "A"])
+
+        assert [x["resId"] for x in found["A"]] == [meo["resId"]]
+        assert found["B"] == []
+        assert standin.request_count("GET", "references") == 2
+
+
+@pytest.mark.asyncio
+async def test_iter_reference_and_like_query_stream_typed_objects():
+    async with MdbStandin() as standin, aiohttp.ClientSession() as session:
+        client = MdbClient(session, standin.api_base, "test", "test_correlation")
+        ref = {"type": "http://id.nrk.no/2016/mdb/reference/PSAPI", "reference": "FOZZ"}
+        meos = [standin.add("masterEO", {"title": f"fozz-{x}", "references": [ref]}) for x in range(7)]
+
+        streamed = [x async for x in client.iter_reference(ref["type"], ref["reference"])]
+        paged = [x async for x in client.iter_reference(ref["type"], ref["reference"], page_size=3)]
+        liked = [x async for x in client.iter_like_query("%fozz%", page_size=7)]
+
+        assert [x["resId"] for x in streamed] == [x["resId"] for x in meos]
+        assert isinstance(streamed[0], MasterEO)
+        assert [x["resId"] for x in paged] == [x["resId"] for x in meos]
+        assert standin.request_count("GET", "references") == 1 + 3
+        assert len(liked) == 7
+        assert standin.request_count("GET", "likeQuery") == 2
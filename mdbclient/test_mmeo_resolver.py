@@ -0,0 +1,69 @@
+import aiohttp
+import pytest
+
+from mdbclient.mdb_standin import MdbStandin
+from mdbclient.mdbclient import MdbClient
+from mdbclient.mmeo_resolver import MetadataMeoResolver
+
+
+async def create_versions(client: MdbClient, title, count):
+    mmeo = await client.create_master_eo({"title": title})
+    versions = [await client.create_master_eo({"title": f"{title}-{x}", "versionGroup": mmeo["versionGroup"]})
+                for x in range(count)]
+    return mmeo, versions
+
+
+@pytest.mark.asyncio
+async def test_resolve_mmeo_of_metadata_meo_is_itself():
+    async with MdbStandin() as standin, aiohttp.ClientSession() as session:
+        client = MdbClient(session, standin.api_base, "test", "test_correlation")
+        mmeo, versions = await create_versions(client, "fozz", 1)
+
+        assert (await client.resolve_mmeo(mmeo["resId"]))["resId"] == mmeo["resId"]
+        assert (await client.resolve_mmeo(versions[0]["resId"]))["resId"] == mmeo["resId"]
+
+
+@pytest.mark.asyncio
+async def test_resolver_caches_per_version_group():
+    async with MdbStandin() as standin, aiohttp.ClientSession() as session:
+        client = MdbClient(session, standin.api_base, "test", "test_correlation")
+        mmeo, versions = await create_versions(client, "fozz", 3)
+        resolver = MetadataMeoResolver(client)
+        opens_before = standin.request_count("GET", "get")
+
+        for version in versions:
+            assert (await resolver.resolve_mmeo(version["resId"]))["resId"] == mmeo["resId"]
+
+        assert standin.request_count("GET", "get") - opens_before == 2
+
+
+@pytest.mark.asyncio
+async def test_resolve_mmeo_many_groups_by_version_group():
+    async with MdbStandin() as standin, aiohttp.ClientSession() as session:
+        client = MdbClient(session, standin.api_base, "test", "test_correlation")
+        fozz, fozz_versions = await create_versions(client, "fozz", 3)
+        bizz, bizz_versions = await create_versions(client, "bizz", 2)
+        res_ids = [x["resId"] for x in fozz_versions + bizz_versions] + [bizz["resId"]]
+        opens_before = standin.request_count("GET", "get")
+
+        mmeos = await MetadataMeoResolver(client).resolve_mmeo_many(res_ids)
+
+        assert [mmeos[x]["resId"] for x in res_ids] == [fozz["resId"]] * 3 + [bizz["resId"]] * 3
+        assert standin.request_count("GET", "resolve") == len(res_ids)
+        assert standin.request_count("GET", "get") - opens_before == 2
+
+
+@pytest.mark.asyncio
+async def test_callers_do_not_share_cached_metadata_meos():
+    async with MdbStandin() as standin, aiohttp.ClientSession() as session:
+        client = MdbClient(session, standin.api_base, "test", "test_correlation")
+        mmeo, versions = await create_versions(client, "fozz", 2)
+        resolver = MetadataMeoResolver(client)
+
+        first = await resolver.resolve_mmeo(versions[0]["resId"])
+        first.setdefault("subjects", []).append({"title": "local edit"})
+        assert {"title": "local edit"} not in (await resolver.resolve_mmeo(versions[1]["resId"])).get("subjects", [])
+
+        own = await resolver.resolve_mmeo(mmeo["resId"])
+        own.setdefault("subjects", []).append({"title": "local edit"})
+        assert {"title": "local edit"} not in (await resolver.resolve_mmeo(versions[0]["resId"])).get("subjects", [])
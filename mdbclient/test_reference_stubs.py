@@ -0,0 +1,56 @@
+import tracemalloc
+import uuid
+
+import pytest
+
+from mdbclient.model import ResourceReference
+from mdbclient.reference_stubs import ReferenceStub, ReferenceTable
+
+MO_TYPE = "http://id.nrk.no/2016/mdb/types/MediaObject"
+
+
+def reference(x: int, api="http://mdb.example.com/api/") -> dict:
+    guid = uuid.UUID(int=x)
+    return {"resId": f"http://id.nrk.no/2016/mdb/mediaObject/{guid}", "type": MO_TYPE, "subType": "video",
+            "links": [{"rel": "self", "href": f"{api}mediaObject/{guid}"}]}
+
+
+def test_stub_round_trip_derives_href():
+    node = reference(1)
+    stub = ReferenceStub.of(ResourceReference(node))
+    assert stub._href is None
+    assert stub.self_href == node["links"][0]["href"]
+    assert stub.to_reference().resource_reference == node
+    assert stub == ReferenceStub.of(node)
+    assert len({stub, ReferenceStub.of(node)}) == 1
+
+
+def test_irregular_references_keep_their_strings():
+    odd = [{"resId": "http://id.nrk.no/2016/mdb/serie/not-a-uuid", "links": [{"rel": "self", "href": "http://x/y"}]},
+           {"resId": reference(2)["resId"], "links": [{"rel": "self", "href": "http://elsewhere/other"}]},
+           {"resId": reference(3)["resId"].upper()},
+           {"resId": reference(4)["resId"]}]
+    table = ReferenceTable(indexed=True)
+    table.extend(odd + [reference(5)])
+    assert [x.to_dict() for x in table] == odd + [reference(5)]
+    assert table.index_of(reference(5)["resId"]) == 4
+    assert odd[0]["resId"] in table
+    assert table[-1].self_href == reference(5)["links"][0]["href"]
+    with pytest.raises(IndexError):
+        table[5]
+
+
+def test_table_uses_a_fraction_of_the_memory():
+    count = 20000
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    dicts = [ResourceReference(reference(x)) for x in range(count)]
+    dict_bytes = tracemalloc.get_traced_memory()[0] - before
+    before = tracemalloc.get_traced_memory()[0]
+    table = ReferenceTable()
+    table.extend(dicts)
+    table_bytes = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    assert table_bytes * 10 < dict_bytes
+    assert table[count - 1].to_dict() == reference(count - 1)
@@ -0,0 +1,98 @@
+import asyncio
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from mdbclient.checkpoint import Checkpoint
+from mdbclient.mdb_standin import MdbStandin
+from mdbclient.mdbclient import MdbClient
+from mdbclient.reindex import ReindexOrchestrator, AdaptiveRateLimiter
+
+
+def test_rate_limiter_backs_off_and_recovers():
+    limiter = AdaptiveRateLimiter(10.0, latency_target=1.0, increase_step=1.0, smoothing=1.0)
+    limiter.observe(2.0)
+    assert limiter.rate == 7.0
+    limiter.observe(0.1)
+    assert limiter.rate == 8.0
+    for x in range(10):
+        limiter.observe(0.1)
+    assert limiter.rate == 10.0
+
+
+def test_rate_limiter_counts_failures_as_slow():
+    limiter = AdaptiveRateLimiter(10.0, latency_target=1.0, smoothing=1.0)
+    limiter.observe_failure(0.01)
+    assert limiter.average_latency == 2.0
+    assert limiter.rate == 7.0
+
+
+@pytest.mark.asyncio
+async def test_failing_reindex_slows_down():
+    async with MdbStandin() as standin, aiohttp.ClientSession() as session:
+        client = MdbClient(session, standin.api_base, "test", "test_correlation")
+        meo = await client.create_master_eo({"title": "fozz"})
+
+        async def overloaded(type_, guid, headers=None):
+            raise asyncio.TimeoutError()
+
+        client.full_reindex_single = overloaded
+        orchestrator = ReindexOrchestrator(client, full=True, target_rate=1000)
+        stats = await orchestrator.run([meo["resId"]] * 3)
+        assert stats.failed == 3
+        assert orchestrator.limiter.rate < 1000
+
+
+@pytest.mark.asyncio
+async def test_reindex_error_status_is_a_failure(tmp_path):
+    async def unavailable(request):
+        return web.Response(status=503, text="overloaded")
+
+    app = web.Application()
+    app.router.add_get("/api/admin/mdbIndex/{index_kind}/{guid}", unavailable)
+    async with TestServer(app) as server, aiohttp.ClientSession() as session:
+        client = MdbClient(session, str(server.make_url("/api")), "test", "test_correlation")
+        res_id = "http://id.nrk.no/2016/mdb/masterEO/796d659f-a805-4c96-ad65-9fa805ac96cb"
+        checkpoint_path = str(tmp_path / "reindex.done")
+        orchestrator = ReindexOrchestrator(client, Checkpoint(checkpoint_path), target_rate=1000)
+        stats = await orchestrator.run([res_id])
+
+        assert (stats.done, stats.failed) == (0, 1)
+        assert "503" in str(orchestrator.failures[res_id])
+        assert orchestrator.limiter.rate < 1000
+        assert res_id not in Checkpoint(checkpoint_path)
+
+
+@pytest.mark.asyncio
+async def test_reindexes_by_type_and_resumes(tmp_path):
+    async with MdbStandin() as standin, aiohttp.ClientSession() as session:
+        client = MdbClient(session, standin.api_base, "test", "test_correlation")
+        meo = await client.create_master_eo({"title": "fozz"})
+        mo = await client.create_media_object(meo, {})
+        tl = await client.create_timeline(meo, {"type": "http://id.nrk.no/2017/mdb/timelinetype/IndexPoints"})
+        res_ids = [meo["resId"], mo["resId"], tl["resId"], "http://example.com/unknown"]
+        checkpoint_path = str(tmp_path / "reindex.done")
+
+        orchestrator = ReindexOrchestrator(client, Checkpoint(checkpoint_path), target_rate=1000)
+        stats = await orchestrator.run(res_ids)
+        assert (stats.done, stats.failed) == (3, 1)
+        assert "http://example.com/unknown" in orchestrator.failures
+        guid = lambda x: x["resId"].rsplit("/", 1)[1]
+        assert sorted(standin.reindexed) == sorted([("masterEOs", guid(meo)), ("mediaObjects", guid(mo)),
+                                                   ("TimelineAggregate", guid(tl))])
+
+        again = await ReindexOrchestrator(client, Checkpoint(checkpoint_path), target_rate=1000).run(res_ids)
+        assert (again.done, again.skipped, again.failed) == (0, 3, 1)
+        assert len(standin.reindexed) == 3
+
+
+@pytest.mark.asyncio
+async def test_full_reindex():
+    async with MdbStandin() as standin, aiohttp.ClientSession() as session:
+        client = MdbClient(session, standin.api_base, "test", "test_correlation")
+        meo = await client.create_master_eo({"title": "fozz"})
+        stats = await ReindexOrchestrator(client, full=True, target_rate=1000).run([meo["resId"]])
+        assert stats.done == 1
+        assert standin.reindexed[0][0] == "MasterEOAggregate"
@@ -0,0 +1,88 @@
+import json
+
+import aiohttp
+import pytest
+
+from mdbclient.checkpoint import KeyValueLog
+from mdbclient.mdb_standin import MdbStandin, KIND_SERIE
+from mdbclient.mdbclient import MdbClient
+from mdbclient.serie_import import SerieImport, load_catalogue, mapping_key, LEVEL_SERIE, LEVEL_SEASON, \
+    LEVEL_EPISODE
+
+
+def catalogue():
+    def serie(id_, title, seasons=2, episodes=2):
+        return {"id": id_, "title": title, "masterSystem": "PRF",
+                "seasons": [{"id": f"{id_}-{s}", "title": f"Sesong {s}",
+                             "episodes": [{"id": f"{id_}-{s}-{e}", "title": f"{title} {s}.{e}"}
+                                          for e in range(episodes)]}
+                            for s in range(seasons)]}
+
+    # fozz-again is the same serie as fozz, listed with one more season
+    return [serie("fozz", "Fozz"), serie("bizz", "Bizz"), serie("fozz-again", "Fozz", seasons=1)]
+
+
+@pytest.mark.asyncio
+async def test_imports_each_level_and_maps_source_ids(tmp_path):
+    async with MdbStandin() as standin, aiohttp.ClientSession() as session:
+        client = MdbClient(session, standin.api_base, "test", "test_correlation")
+        existing = standin.add(KIND_SERIE, {"title": "Bizz", "masterSystem": "PRF"})
+        path = tmp_path / "catalogue.json"
+        path.write_text(json.dumps({"series": catalogue()}))
+
+        importer = SerieImport(client, str(tmp_path / "mapping"), concurrency=3)
+        stats = await importer.run(load_catalogue(str(path)))
+
+        assert (stats[LEVEL_SERIE].done, stats[LEVEL_SERIE].skipped) == (1, 2)
+        assert standin.request_count("GET", "serie.by_title") == 2
+        assert (stats[LEVEL_SEASON].done, stats[LEVEL_EPISODE].done) == (5, 10)
+        mapping = KeyValueLog(str(tmp_path / "mapping"))
+        assert mapping.get(mapping_key(LEVEL_SERIE, "bizz")) == existing["resId"]
+        fozz = mapping.get(mapping_key(LEVEL_SERIE, "fozz"))
+        assert mapping.get(mapping_key(LEVEL_SERIE, "fozz-again")) == fozz
+        assert len(standin.lookup(fozz)["seasons"]) == 3
+        episode = standin.lookup(mapping.get(mapping_key(LEVEL_EPISODE, "fozz-1-0")))
+        assert episode["title"] == "Fozz 1.0"
+        assert episode["season"]["resId"] == mapping.get(mapping_key(LEVEL_SEASON, "fozz-1"))
+
+
+@pytest.mark.asyncio
+async def test_rerun_creates_only_what_is_missing(tmp_path):
+    async with MdbStandin() as standin, aiohttp.ClientSession() as session:
+        client = MdbClient(session, standin.api_base, "test", "test_correlation")
+        mapping_path = str(tmp_path / "mapping")
+        await SerieImport(client, mapping_path).run(catalogue()[:1])
+        objects = len(standin.objects)
+
+        stats = await SerieImport(client, mapping_path).run(catalogue())
+
+        assert (stats[LEVEL_SERIE].skipped, stats[LEVEL_SERIE].done) == (2, 1)
+        assert (stats[LEVEL_SEASON].skipped, stats[LEVEL_SEASON].done) == (2, 3)
+        assert (stats[LEVEL_EPISODE].skipped, stats[LEVEL_EPISODE].done) == (4, 6)
+        assert len(standin.objects) == objects + 1 + 3 + 6
+        rerun = await SerieImport(client, mapping_path).run(catalogue())
+        assert sum(x.done for x in rerun.values()) == 0
+
+
+@pytest.mark.asyncio
+async def test_children_of_failed_entries_fail(tmp_path):
+    class FailingClient:
+        async def find_serie(self, title, master_system, headers=None):
+            raise RuntimeError("mdb is down")
+
+    importer = SerieImport(FailingClient(), str(tmp_path / "mapping"))
+    stats = await importer.run(catalogue()[:1])
+
+    assert stats[LEVEL_SERIE].failed == 1
+    assert (stats[LEVEL_SEASON].failed, stats[LEVEL_EPISODE].failed) == (2, 4)
+    assert isinstance(importer.error_of(LEVEL_SEASON, "fozz-0"), ValueError)
+    assert len(KeyValueLog(str(tmp_path / "mapping"))) == 0
+
+
+def test_mapping_values_keep_tabs_and_reject_newlines(tmp_path):
+    mapping = KeyValueLog(str(tmp_path / "mapping"))
+    mapping.put("serie/fozz", "a\tb")
+    with pytest.raises(ValueError):
+        mapping.put("serie/bizz", "a\nb")
+    mapping.close()
+    assert dict(KeyValueLog(str(tmp_path / "mapping")).items()) == {"serie/fozz": "a\tb"}
@@ -0,0 +1,76 @@
+import asyncio
+import os
+
+import pytest
+
+from mdbclient.mdb_standin import MdbStandin
+from mdbclient.shard_runner import ShardRunner, ClientConfig
+
+
+async def title_of(client, res_id):
+    meo = await client.resolve(res_id)
+    return os.getpid(), meo["title"]
+
+
+async def fail_on_odd(client, item):
+    if item % 2:
+        raise ValueError(f"odd {item}")
+    return item
+
+
+async def slow_first(client, item):
+    if item == 0:
+        await asyncio.sleep(0.5)
+    return item
+
+
+def map_all(runner, items):
+    return list(runner.map(items))
+
+
+@pytest.mark.asyncio
+async def test_results_come_back_in_order_from_several_processes():
+    async with MdbStandin() as standin:
+        ids = []
+        for x in range(20):
+            meo = standin.add("masterEO", {"title": f"fozz-{x}"})
+            ids.append(meo["resId"])
+        runner = ShardRunner(ClientConfig(standin.api_base, "test", "test_correlation"), title_of, processes=2,
+                             concurrency=4, ordered=True)
+
+        results = await asyncio.get_running_loop().run_in_executor(None, map_all, runner, ids)
+
+        assert [x.result[1] for x in results] == [f"fozz-{x}" for x in range(20)]
+        assert [x.item for x in results] == ids
+        assert sum(x.items for x in runner.metrics.values()) == 20
+        assert len(runner.metrics) == 2
+        assert runner.stats.done == 20
+
+
+def test_errors_are_reported_per_item():
+    progress = []
+    runner = ShardRunner(ClientConfig("http://localhost:1", "test", "test_correlation"), fail_on_odd,
+                         processes=2, progress=lambda x: progress.append(x.processed()), progress_interval=5)
+
+    results = sorted(runner.map(range(10)), key=lambda x: x.index)
+
+    assert [x.result for x in results if x.is_successful()] == [0, 2, 4, 6, 8]
+    assert [str(x.error) for x in results if not x.is_successful()] == [f"odd {x}" for x in (1, 3, 5, 7, 9)]
+    assert progress == [5, 10]
+    assert runner.stats.failed == 5
+
+
+def test_ordered_results_held_back_count_towards_max_pending():
+    read = []
+
+    def items():
+        for x in range(50):
+            read.append(x)
+            yield x
+
+    runner = ShardRunner(ClientConfig("http://localhost:1", "test", "test_correlation"), slow_first, processes=1,
+                         concurrency=2, ordered=True, max_pending=4)
+    results = runner.map(items())
+    assert next(results).item == 0
+    assert len(read) <= 5
+    assert [x.item for x in results] == list(range(1, 50))
@@ -0,0 +1,71 @@
+import asyncio
+
+import aiohttp
+import pytest
+
+from mdbclient.mdb_standin import MdbStandin
+from mdbclient.mdbclient import MdbClient
+from mdbclient.write_serializer import AggregateWriteSerializer
+
+
+@pytest.mark.asyncio
+async def test_same_key_runs_one_at_a_time_other_keys_in_parallel():
+    serializer = AggregateWriteSerializer()
+    running = {"a": 0, "b": 0}
+    peak = {"a": 0, "b": 0, "all": 0}
+
+    async def write(key):
+        async with serializer.serialize(key):
+            running[key] += 1
+            peak[key] = max(peak[key], running[key])
+            peak["all"] = max(peak["all"], sum(running.values()))
+            await asyncio.sleep(0.01)
+            running[key] -= 1
+
+    await asyncio.gather(*[write(x) for x in "abababab"])
+
+    assert peak == {"a": 1, "b": 1, "all": 2}
+    assert serializer.stats.writes == 8
+    assert serializer.stats.queued == 6
+    assert serializer.stats.max_depth == 4
+    assert serializer.queue_depths() == {}
+
+
+@pytest.mark.asyncio
+async def test_client_queues_writes_per_aggregate():
+    async with MdbStandin(latency=0.005) as standin, aiohttp.ClientSession() as session:
+        client = MdbClient(session, standin.api_base, "test", "test_correlation")
+        client.write_serializer = AggregateWriteSerializer()
+        meo = await client.create_master_eo({"title": "fozz"})
+        other = await client.create_master_eo({"title": "bizz"})
+
+        await asyncio.gather(*[client.add_subject(meo, {"title": f"subject-{x}"}) for x in range(5)],
+                             client.update(meo, {"title": "fozz2"}),
+                             client.add_subject(other, {"title": "other"}))
+
+        assert len(standin.lookup(meo["resId"])["subjects"]) == 5
+        assert client.write_serializer.stats.max_depth == 6
+        assert client.write_serializer.stats.lock_failures == 0
+
+
+class RecordingSerializer(AggregateWriteSerializer):
+    def __init__(self):
+        super().__init__()
+        self.keys = []
+
+    def serialize(self, key: str):
+        self.keys.append(key)
+        return super().serialize(key)
+
+
+@pytest.mark.asyncio
+async def test_creates_queue_on_the_owner_not_on_nested_references():
+    async with MdbStandin() as standin, aiohttp.ClientSession() as session:
+        client = MdbClient(session, standin.api_base, "test", "test_correlation")
+        meos = [await client.create_master_eo({"title": f"meo-{x}"}) for x in range(2)]
+        client.write_serializer = RecordingSerializer()
+        geo = {"resId": "http://id.nrk.no/2015/clip/IPRights/geoavailability/VERDEN"}
+
+        await asyncio.gather(*[client.create_publication_event(x, {"geoAvailability": geo}) for x in meos])
+
+        assert client.write_serializer.keys == [x["resId"] for x in meos]
@@ -1,9 +1,12 @@
+import collections
 import copy
 import json
 import math
-from typing import Mapping
+import multiprocessing
+import os
+from typing import Mapping, Iterable, Iterator, Callable, Dict, Tuple
 
-from mdbclient.mdbclient import _self_link
+from mdbclient.model import _self_link
 from mdbclient.tools.diff_functions import illustration_changes, categories_changes
 
 
@@ -77,13 +80,18 @@ def print_it(item):
 
 
 class Diff:
-    def __init__(self, existing, modified):
+    def __init__(self, existing, modified, copy_on_write=False):
 
         """
         Items that have been added in modified
+
+        With copy_on_write the diff refers to the elements of existing and modified instead of deep copying them,
+        and copies an element only before changing it. existing and modified must then be left unchanged while
+        the diff is in use.
         """
         self.modified = modified
         self.existing = existing
+        self.copy_on_write = copy_on_write
         self.Added = DiffResult()
         """
         Removed elements contain the key and their original value.
@@ -141,7 +149,7 @@ class Diff:
                         if new_target and list_value:
                             self.__recursive_apply(list_value, new_target)
             else:
-                target[key] = value
+                target[key] = copy.deepcopy(value) if self.copy_on_write else value
 
     def remove_autogenerated_resids_in_add_and_modify(self):
         self.remove_autogenerated_resids_in_add()
@@ -197,6 +205,8 @@ class Diff:
 
     def apply_adds(self, target):
         for key, value in self.Added.items():
+            if self.copy_on_write:
+                value = copy.deepcopy(value)
             if self.is_direct_value(value):
                 target[key] = value
             elif isinstance(value, list):
@@ -210,11 +220,13 @@ class Diff:
             else:
                 raise Exception(f"Do not know to handle add field {key} of type {type(value)}")
 
-    @staticmethod
-    def __treat_collection(c0llection):
-        for item in c0llection:
+    def __treat_collection(self, c0llection):
+        for index, item in enumerate(c0llection):
             if item:
-                if "rest-client" in item.get("resId", ""):
+                autogenerated = "rest-client" in item.get("resId", "")
+                if self.copy_on_write and (autogenerated or "links" in item):
+                    item = c0llection[index] = copy.copy(item)
+                if autogenerated:
                     del item["resId"]
                 if "links" in item:
                     del item["links"]
@@ -255,19 +267,19 @@ class Diff:
         for element in elements:
             if name not in self.Added:
                 self.Added[name] = []
-            self.Added[name].append(copy.deepcopy(element))
+            self.Added[name].append(element if self.copy_on_write else copy.deepcopy(element))
 
     def add_to_removed(self, name, elements):
         for element in elements:
             if name not in self.Removed:
                 self.Removed[name] = []
-            self.Removed[name].append(copy.deepcopy(element))
+            self.Removed[name].append(element if self.copy_on_write else copy.deepcopy(element))
 
     def add_to_modified(self, name, elements):
         for element in elements:
             if name not in self.Modified:
                 self.Modified[name] = []
-            self.Modified[name].append(copy.deepcopy(element))
+            self.Modified[name].append(element if self.copy_on_write else copy.deepcopy(element))
 
     def has_removals_only(self):
         return (not self.Modified and not self.Added) and self.Removed
@@ -414,10 +426,11 @@ class Differ:
     these attributes themselves.
     """
 
-    def __init__(self, existing, modified):
+    def __init__(self, existing, modified, copy_on_write=False):
         self.existing = existing
         self.modified = modified
-        self.diff = Diff(existing, modified)
+        self.copy_on_write = copy_on_write
+        self.diff = Diff(existing, modified, copy_on_write)
         self.category_identity_comparator = self.__category_reference_equals
         self.category_value_comparator = self.__category_value_equals
         self.contributors_identity_comparator = self.__contributor_value_based_identity
@@ -655,8 +668,11 @@ class Differ:
             value_equality_predicate -- compares the value fields of the object.
                                         Should generally not compare fields compared in ref_equality_predicate
             """
-            existing_collection = list(self.existing.get(field, []))
-            modified_collection = list(self.modified.get(field, []))
+            existing_collection = self.existing.get(field, [])
+            modified_collection = self.modified.get(field, [])
+            if not self.copy_on_write:
+                existing_collection = list(existing_collection)
+                modified_collection = list(modified_collection)
 
             added_items = [c for c in modified_collection if
                            not find(existing_collection, ref_equality_predicate, c)]
@@ -700,3 +716,129 @@ Steder (spatials)
 Kategori (categories)
 Medvirkende (Anonym filtreres bort) (contributors)
 '''
+
+
+class DifferConfig:
+    """
+    Behaviour for the Differs made by diff_many. comparators maps Differ attribute names to replacement
+    functions, e.g. {"contributors_identity_comparator": my_matcher}; they must be module level functions so
+    they can be sent to the worker processes. ignorables are attribute names left out of the diff.
+    """
+
+    def __init__(self, comparators: Dict[str, Callable] = None, ignorables: Iterable[str] = (),
+                 copy_on_write: bool = True, remove_autogenerated_resids: bool = False):
+        self.comparators = dict(comparators or {})
+        self.ignorables = set(ignorables)
+        self.copy_on_write = copy_on_write
+        self.remove_autogenerated_resids = remove_autogenerated_resids
+        for name in self.comparators:
+            if not name.endswith("_comparator"):
+                raise ValueError(f"{name} is not a Differ comparator")
+
+    def differ(self, existing, modified) -> Differ:
+        differ = Differ(existing, modified, self.copy_on_write)
+        for name, comparator in self.comparators.items():
+            setattr(differ, name, comparator)
+        differ.ignorables = self.ignorables
+        return differ
+
+    def calculate(self, existing, modified) -> Diff:
+        diff = self.differ(existing, modified).calculate()
+        if self.remove_autogenerated_resids:
+            diff.remove_autogenerated_resids_in_add_and_modify()
+        return diff
+
+
+class CompactDiff:
+    """
+    The changes of one pair from diff_many, without the compared objects. index is the position of the pair in
+    the input, error is set instead of the changes when the diff failed.
+    """
+
+    def __init__(self, index: int, added: dict = None, removed: dict = None, modified: dict = None,
+                 error: str = None):
+        self.index = index
+        self.added = added or {}
+        self.removed = removed or {}
+        self.modified = modified or {}
+        self.error = error
+
+    @classmethod
+    def of(cls, index: int, diff: Diff):
+        return cls(index, dict(diff.Added), dict(diff.Removed), dict(diff.Modified))
+
+    def has_diff(self) -> bool:
+        return bool(self.added or self.removed or self.modified)
+
+    def __str__(self):
+        if self.error:
+            return f"{self.index}: {self.error}"
+        return f"{self.index}: added={self.added} removed={self.removed} modified={self.modified}"
+
+
+_worker_config = None
+
+
+def _init_diff_worker(config: DifferConfig):
+    global _worker_config
+    _worker_config = config
+
+
+def _compact_diff(config: DifferConfig, job) -> CompactDiff:
+    index, (existing, modified) = job
+    try:
+        return CompactDiff.of(index, config.calculate(existing, modified))
+    except Exception as e:
+        return CompactDiff(index, error=repr(e))
+
+
+def _diff_chunk(jobs: list) -> list:
+    return [_compact_diff(_worker_config, x) for x in jobs]
+
+
+def _chunks(jobs, size: int) -> Iterator[list]:
+    chunk = []
+    for job in jobs:
+        chunk.append(job)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def diff_many(pairs: Iterable[Tuple[dict, dict]], config: DifferConfig = None, processes: int = None,
+              chunksize: int = 64, non_empty_only: bool = False, start_method: str = None) -> Iterator[CompactDiff]:
+    """
+    Diffs (existing, modified) pairs on a pool of processes, chunksize pairs per task, and yields a CompactDiff
+    per pair in input order. Pairs are read as the workers have room, at most a few chunks per process ahead,
+    so the input can be a generator over far more pairs than fit in memory. With non_empty_only, pairs without
+    changes (and without error) are skipped. processes=1 diffs in this process, where the results share
+    elements with the pairs.
+
+        for result in diff_many(pairs, DifferConfig(ignorables=["description"]), non_empty_only=True):
+            ...
+    """
+    config = config if config else DifferConfig()
+    jobs = enumerate(pairs)
+    if processes == 1:
+        results = (_compact_diff(config, job) for job in jobs)
+    else:
+        results = _diff_on_pool(jobs, config, processes, chunksize, start_method)
+    for result in results:
+        if result.has_diff() or result.error or not non_empty_only:
+            yield result
+
+
+def _diff_on_pool(jobs, config: DifferConfig, processes: int, chunksize: int, start_method: str):
+    processes = processes if processes else os.cpu_count()
+    context = multiprocessing.get_context(start_method)
+    with context.Pool(processes, initializer=_init_diff_worker, initargs=(config,)) as pool:
+        max_pending = processes * 3
+        pending = collections.deque()
+        for chunk in _chunks(jobs, chunksize):
+            pending.append(pool.apply_async(_diff_chunk, (chunk,)))
+            while len(pending) >= max_pending:
+                yield from pending.popleft().get()
+        while pending:
+            yield from pending.popleft().get()
@@ -2,11 +2,11 @@ def remove_duplicates(pe):
     if "contributors" in pe:
         pe["contributors"] = squash_byvalue_equal_contributors(pe["contributors"])
     if "spatials" in pe:
-        pe["spatials"] = squash_byvalue_equal_contributors(pe["spatials"])
+        pe["spatials"] = squash_byvalue_equal_spatials(pe["spatials"])
 
 
 def squash_byvalue_equal_contributors(contributors):
-    return squash_by_key(contributors, __key)
+    return squash_by_key(contributors, _contributors_key)
 
 
 def squash_byvalue_equal_spatials(spatials):
@@ -24,7 +24,7 @@ def squash_by_key(collection, key_func):
     return revised
 
 
-def __key(item):
+def _contributors_key(item):
     contact = item.get("contact", {})
     role = item.get("role", {})
     role_resid = role.get("resId","")
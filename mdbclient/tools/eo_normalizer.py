@@ -0,0 +1,116 @@
+from typing import Callable, Dict, Optional
+
+from mdbclient.model import sort_stably
+from mdbclient.tools.eo_fixup import _contributors_key, _spatials_key
+
+
+def _subjects_key(item):
+    res_id = item.get("resId")
+    return "" if _is_generated(res_id) else res_id or "", item.get("title", "")
+
+
+def _categories_key(item):
+    res_id = item.get("resId")
+    return ("" if _is_generated(res_id) else res_id) or item.get("title", "")
+
+
+def _references_key(item):
+    return item.get("type", ""), item.get("reference", "")
+
+
+DEDUP_KEYS = {
+    "contributors": _contributors_key,
+    "spatials": _spatials_key,
+    "subjects": _subjects_key,
+    "categories": _categories_key,
+    "references": _references_key,
+}
+
+
+def _is_generated(res_id) -> bool:
+    return isinstance(res_id, str) and ("rest-client" in res_id or "rest_client" in res_id)
+
+
+def _stripped(value):
+    """
+    value without links and client generated resIds at any depth, copying only the parts that change
+    """
+    if isinstance(value, dict):
+        stripped = None
+        for k, v in value.items():
+            if k == "links" or (k == "resId" and _is_generated(v)):
+                new = _REMOVED
+            else:
+                new = _stripped(v)
+                if new is v:
+                    continue
+            if stripped is None:
+                stripped = dict(value)
+            if new is _REMOVED:
+                del stripped[k]
+            else:
+                stripped[k] = new
+        return value if stripped is None else stripped
+    if isinstance(value, list):
+        items = [_stripped(x) for x in value]
+        return value if all(x is y for x, y in zip(items, value)) else items
+    return value
+
+
+_REMOVED = object()
+
+
+class EoNormalizer:
+    """
+    Normalizes the collections of an editorial object before it is diffed, in a single pass over each of them
+    instead of remove_duplicates, Diff.remove_autogenerated_resids, Diff.pack and stabilize_order one after the
+    other. For every collection in keys it
+
+    - drops None elements and, with pack, the collection if nothing is left
+    - drops elements whose key equals that of an earlier element
+    - with strip, removes links and client generated resIds from the elements (the EO's own links are kept)
+    - with sort, orders the elements like stabilize_order
+
+    keys overrides the dedup key functions of DEDUP_KEYS per collection; a None key keeps duplicates. Key
+    functions must disregard links and client generated resIds. Stripping works on copies, so the elements of
+    the input are never modified, but the EO itself is updated in place and returned.
+
+        normalizer = EoNormalizer()
+        changes = Differ(normalizer.normalize(existing), normalizer.normalize(modified)).calculate()
+    """
+
+    def __init__(self, keys: Dict[str, Optional[Callable]] = None, strip: bool = True, sort: bool = True,
+                 pack: bool = True):
+        self.keys = {**DEDUP_KEYS, **(keys or {})}
+        self.strip = strip
+        self.sort = sort
+        self.pack = pack
+
+    def normalize(self, eo: dict) -> dict:
+        for name, key_func in self.keys.items():
+            collection = eo.get(name)
+            if collection is None:
+                continue
+            normalized = self.normalize_collection(name, collection, key_func)
+            if normalized or not self.pack:
+                eo[name] = normalized
+            else:
+                del eo[name]
+        return eo
+
+    def normalize_collection(self, name: str, collection: list, key_func: Callable = None) -> list:
+        seen = set()
+        normalized = []
+        for item in collection:
+            if item is None:
+                continue
+            # the key functions disregard links and generated resIds, so only the kept elements are stripped
+            if key_func is not None:
+                key = key_func(item)
+                if key in seen:
+                    continue
+                seen.add(key)
+            normalized.append(_stripped(item) if self.strip else item)
+        if self.sort:
+            sort_stably(name, normalized)
+        return normalized
@@ -0,0 +1,62 @@
+import hashlib
+import json
+
+from mdbclient.checkpoint import KeyValueLog
+from mdbclient.model import stabilize_order
+
+VOLATILE_FIELDS = {"links", "created", "lastUpdated"}
+
+
+def _is_generated_res_id(key, value) -> bool:
+    return key == "resId" and isinstance(value, str) and ("rest-client" in value or "rest_client" in value)
+
+
+def _canonical(value):
+    if isinstance(value, dict):
+        return {k: _canonical(v) for k, v in value.items()
+                if k not in VOLATILE_FIELDS and not _is_generated_res_id(k, v)}
+    if isinstance(value, list):
+        return [_canonical(x) for x in value]
+    return value
+
+
+def canonicalize(eo: dict) -> dict:
+    """
+    A copy of eo without the fields that change without the content changing (links, created, lastUpdated and
+    client generated resIds, at any depth), with its unordered collections in a stable order. The resId of eo
+    itself is left out too, since a desired state does not have one; resIds it refers to are kept.
+    """
+    canonical = _canonical(eo)
+    canonical.pop("resId", None)
+    return stabilize_order(canonical)
+
+
+def fingerprint(eo: dict) -> str:
+    """
+    A hash of the canonical content of eo. Equal for an EO as sent and as read back from MDB, so a pipeline can
+    compare the fingerprint of a desired state with the one it last synced instead of fetching and diffing.
+    """
+    text = json.dumps(canonicalize(eo), sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class FingerprintStore(KeyValueLog):
+    """
+    The last synced fingerprint per key (typically a resId or a source system id), in a KeyValueLog.
+
+        store = FingerprintStore("fingerprints.tsv")
+        if not store.matches(key, desired):
+            ... fetch, diff and write ...
+            store.record(key, desired)
+    """
+
+    def matches(self, key: str, eo: dict) -> bool:
+        """
+        True when eo has the fingerprint last recorded for key
+        """
+        return self.get(key) == fingerprint(eo)
+
+    def record(self, key: str, eo: dict) -> str:
+        value = fingerprint(eo)
+        self.put(key, value)
+        return value
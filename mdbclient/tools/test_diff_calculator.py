@@ -2,7 +2,7 @@ from copy import deepcopy, copy
 
 import pytest
 
-from mdbclient.tools.diff_calculator import Differ, Diff
+from mdbclient.tools.diff_calculator import Differ, Diff, DifferConfig, diff_many
 
 
 def test_diff_edited_value():
@@ -444,6 +444,112 @@ def test_geo_availability_modified():
     assert len(changes.Modified) == 1
 
 
+def _rich_pair():
+    def contributor(name, role, character="abc", res_id=None):
+        c = {'contact': {'title': name, 'characterName': character, 'comment': 'aContactComment',
+                         'capacity': 'Contactcapacity'}, 'role': {'resId': f'http://authority.nrk.no/role/{role}'},
+             'links': [{'rel': 'self', 'href': 'http://mdb/x'}]}
+        if res_id:
+            c['resId'] = res_id
+        return c
+
+    rest_client = "http://id.nrk.no/2016/mdb/contributor/rest-client/object/"
+    existing = {'title': 'foo', 'description': 'old',
+                'contributors': [contributor('a', 'V34'), contributor('b', 'N58'), contributor('c', 'V34', 'x')],
+                'subjects': [{'resId': 'http://s1', 'title': 'sub1'}, {'title': 'sub2'}],
+                'geoAvailability': geo_verden['geoAvailability']}
+    modified = {'title': 'foo', 'description': 'new',
+                'contributors': [contributor('a', 'V34'), contributor('d', 'N58', res_id=rest_client + '1'),
+                                 contributor('c', 'V34', 'y', res_id=rest_client + '2'),
+                                 contributor('e', 'V34', res_id=rest_client + '3')],
+                'subjects': [{'resId': 'http://s1', 'title': 'sub1'},
+                             {'resId': 'http://id.nrk.no/2016/mdb/subject/rest-client/s3', 'title': 'sub3',
+                              'links': []}],
+                'geoAvailability': geo_nrk['geoAvailability']}
+    return existing, modified
+
+
+def _diff_of(existing, modified, copy_on_write):
+    changes = Differ(existing, modified, copy_on_write).calculate()
+    changes.remove_autogenerated_resids_in_add_and_modify()
+    changes.eliminate_changed_n58()
+    return changes
+
+
+def test_copy_on_write_gives_same_diff():
+    existing, modified = _rich_pair()
+    copied = _diff_of(existing, modified, False)
+    shared = _diff_of(*_rich_pair(), True)
+    assert dict(shared.Added) == dict(copied.Added)
+    assert dict(shared.Removed) == dict(copied.Removed)
+    assert dict(shared.Modified) == dict(copied.Modified)
+    assert shared.Added['contributors']
+
+
+def test_copy_on_write_leaves_input_unchanged():
+    existing, modified = _rich_pair()
+    existing_before, modified_before = deepcopy(existing), deepcopy(modified)
+    changes = _diff_of(existing, modified, True)
+    changes.remove_references_of_type("any")
+    target = deepcopy(existing)
+    changes.apply_adds(target)
+    changes.recursive_apply_modifications(target)
+    assert existing == existing_before
+    assert modified == modified_before
+    target['description'] = 'changed'
+    assert modified['description'] == 'new'
+
+
+def _same_contact_title(c1, c2):
+    return c1.get('contact', {}).get('title') == c2.get('contact', {}).get('title')
+
+
+def _pairs():
+    existing, modified = _rich_pair()
+    return [(existing, modified), ({'title': 'same'}, {'title': 'same'}), ({'title': 'a'}, {'title': 'b'}),
+            (None, {'title': 'b'})]
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_diff_many_matches_differ(processes):
+    results = list(diff_many(_pairs(), processes=processes, chunksize=1))
+    assert [x.index for x in results] == [0, 1, 2, 3]
+    for result, (existing, modified) in zip(results[:3], _pairs()):
+        expected = Differ(existing, modified).calculate()
+        assert result.error is None
+        assert (result.added, result.removed, result.modified) == \
+               (dict(expected.Added), dict(expected.Removed), dict(expected.Modified))
+    assert not results[1].has_diff()
+    assert "AttributeError" in results[3].error
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_diff_many_keeps_input_order(processes):
+    pairs = [({'title': 'a'}, {'title': str(x)}) for x in range(200)]
+    results = list(diff_many(pairs, processes=processes, chunksize=7))
+    assert [x.modified['title'] for x in results] == [str(x) for x in range(200)]
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_diff_many_non_empty_only(processes):
+    results = list(diff_many(_pairs(), processes=processes, non_empty_only=True))
+    assert [x.index for x in results] == [0, 2, 3]
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_diff_many_uses_config_in_workers(processes):
+    config = DifferConfig({"contributors_identity_comparator": _same_contact_title}, ignorables=["title"])
+    results = list(diff_many(_pairs()[:3], config, processes=processes, non_empty_only=True))
+    assert [x.index for x in results] == [0]
+    # matched on name alone the changed contributor 'c' is modified rather than added and removed
+    assert [x['contact']['title'] for x in results[0].modified['contributors'] if x] == ['c']
+
+
+def test_differ_config_rejects_unknown_attribute():
+    with pytest.raises(ValueError):
+        DifferConfig({"contributors": _same_contact_title})
+
+
 # test_illustration_modified()
 '''
 test_diff_edited_value()
@@ -28,9 +28,9 @@ def test_collapse_to_single():
     assert len(pe["contributors"]) == 1
 
 def test_collapse_spatials():
-    pe = {"spatials": [s1, s2]}
+    pe = {"spatials": [s1, s2, dict(s1)]}
     remove_duplicates(pe)
-    assert len(pe["spatials"]) == 1
+    assert pe["spatials"] == [s1, s2]
 
 def test_diff_edited_value():
     pe = {"contributors": [c1, c1, c2]}
@@ -0,0 +1,49 @@
+from copy import deepcopy
+
+from mdbclient.tools.eo_normalizer import EoNormalizer
+from mdbclient.tools.test_eo_fixup import c1, c2, s1, s2
+
+generated = "http://id.nrk.no/2016/mdb/subject/rest-client/object/1"
+pe = {
+    "title": "fozz",
+    "links": [{"rel": "self", "href": "http://mdb/publicationEvent/1"}],
+    "contributors": [c2, c1, c1, None],
+    "spatials": [s2, s1, dict(s1)],
+    "subjects": [{"title": "b", "resId": generated, "links": []}, {"title": "a"}, {"title": "b"}],
+    "categories": [None],
+    "references": [{"type": "t", "reference": "2"}, {"type": "t", "reference": "1"}, {"type": "t", "reference": "1"}],
+}
+
+
+def test_normalize_dedups_strips_and_sorts_every_collection():
+    original = deepcopy(pe)
+    normalized = EoNormalizer().normalize(deepcopy(pe))
+
+    assert [x["contact"]["title"] for x in normalized["contributors"]] == ["ole nilsen", "ole olsen"]
+    assert "resId" not in normalized["contributors"][0]["contact"]
+    assert [x["name"] for x in normalized["spatials"]] == ["Porsgrunn", "Skien"]
+    assert normalized["subjects"] == [{"title": "a"}, {"title": "b"}]
+    assert [x["reference"] for x in normalized["references"]] == ["1", "2"]
+    assert "categories" not in normalized
+    assert normalized["links"] == pe["links"]
+    assert pe == original
+
+
+def test_normalize_is_configurable_and_idempotent():
+    normalizer = EoNormalizer(keys={"references": None, "subjects": None}, sort=False, pack=False)
+    normalized = normalizer.normalize(deepcopy(pe))
+    assert len(normalized["references"]) == 3
+    assert [x["title"] for x in normalized["subjects"]] == ["b", "a", "b"]
+    assert [x["contact"]["title"] for x in normalized["contributors"]] == ["ole nilsen", "ole olsen"]
+    assert normalized["categories"] == []
+
+    once = EoNormalizer().normalize(deepcopy(pe))
+    assert EoNormalizer().normalize(deepcopy(once)) == once
+
+
+def test_new_categories_are_told_apart_by_title():
+    categories = [{"resId": "http://id.nrk.no/2016/mdb/category/rest-client/object/1", "title": "Sport"},
+                  {"resId": "http://id.nrk.no/2016/mdb/category/rest-client/object/2", "title": "Nyheter"},
+                  {"resId": "http://id.nrk.no/2016/mdb/category/rest-client/object/3", "title": "Sport"}]
+    normalized = EoNormalizer().normalize({"categories": categories})
+    assert normalized["categories"] == [{"title": "Nyheter"}, {"title": "Sport"}]
@@ -0,0 +1,72 @@
+from copy import deepcopy
+
+from mdbclient.model import Timeline, MasterEO
+from mdbclient.tools.fingerprint import canonicalize, fingerprint, FingerprintStore
+
+desired = {
+    "title": "fozz",
+    "subjects": [{"title": "b"}, {"title": "a"}],
+    "contributors": [{"contact": {"title": "ole"}, "role": {"resId": "http://authority.nrk.no/role/V34"}},
+                     {"contact": {"title": "anne"}, "role": {"resId": "http://authority.nrk.no/role/V34"},
+                      "resId": "http://id.nrk.no/2016/mdb/contributor/rest-client/object/1"}],
+    "references": [{"type": "http://id.nrk.no/2016/mdb/reference/PSAPI", "reference": "FOZZ2"},
+                   {"type": "http://id.nrk.no/2016/mdb/reference/PSAPI", "reference": "FOZZ1"}],
+}
+
+
+def stored_version():
+    stored = deepcopy(desired)
+    stored["resId"] = "http://id.nrk.no/2016/mdb/masterEO/796d659f-a805-4c96-ad65-9fa805ac96cb"
+    stored["created"] = "2021-01-01T00:00:00Z"
+    stored["lastUpdated"] = "2021-02-01T00:00:00Z"
+    stored["links"] = [{"rel": "self", "href": "http://mdb/masterEO/1"}]
+    stored["contributors"].reverse()
+    stored["contributors"][0]["resId"] = "http://id.nrk.no/2016/mdb/contributor/rest-client/object/2"
+    stored["contributors"][0]["links"] = []
+    stored["subjects"].reverse()
+    return stored
+
+
+def test_fingerprint_ignores_volatile_fields_and_order():
+    assert fingerprint(stored_version()) == fingerprint(desired)
+    assert fingerprint(dict(desired, title="bizz")) != fingerprint(desired)
+    assert "resId" not in canonicalize(desired)["contributors"][0]
+    assert desired["contributors"][1]["resId"].endswith("/1")
+
+
+def test_fingerprint_keeps_real_res_ids():
+    with_category = dict(desired, categories=[{"resId": "http://authority.nrk.no/category/1"}])
+    other_category = dict(desired, categories=[{"resId": "http://authority.nrk.no/category/2"}])
+    assert fingerprint(with_category) != fingerprint(other_category)
+
+
+def test_stabilize_order_on_any_eo_type():
+    meo = MasterEO(deepcopy(desired))
+    meo.stabilize_order()
+    assert [x["title"] for x in meo["subjects"]] == ["a", "b"]
+    assert [x["reference"] for x in meo["references"]] == ["FOZZ1", "FOZZ2"]
+
+    timeline = Timeline({"subjects": [{"title": "b"}, {"name": "no title"}], "spatials": [{"name": "x"}, {}]})
+    timeline.stabilize_order()
+    assert timeline["subjects"][0] == {"name": "no title"}
+    assert timeline["spatials"][0] == {}
+
+
+def test_store_keeps_last_fingerprint_and_survives_torn_lines(tmp_path):
+    path = str(tmp_path / "fingerprints.tsv")
+    store = FingerprintStore(path)
+    assert not store.matches("fozz", desired)
+    store.record("fozz", dict(desired, title="old"))
+    store.record("fozz", desired)
+    store.record("bizz", {"title": "bizz"})
+    store.close()
+    with open(path, "a") as f:
+        f.write("torn")
+
+    reopened = FingerprintStore(path)
+    assert reopened.matches("fozz", stored_version())
+    assert len(reopened) == 2
+    reopened.compact()
+    with open(path) as f:
+        assert len(f.readlines()) == 2
+    assert FingerprintStore(path).get("bizz") == fingerprint({"title": "bizz"})
@@ -0,0 +1,67 @@
+import asyncio
+import contextlib
+import time
+
+
+class _KeyQueue:
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.depth = 0
+
+
+class WriteStats:
+    def __init__(self):
+        self.writes = 0
+        self.queued = 0
+        self.max_depth = 0
+        self.wait_seconds = 0.0
+        self.lock_failures = 0
+
+    def __str__(self):
+        return f"writes={self.writes} queued={self.queued} max_depth={self.max_depth} " \
+               f"wait={self.wait_seconds:.1f}s lock_failures={self.lock_failures}"
+
+
+class AggregateWriteSerializer:
+    """
+    Runs writes to the same aggregate one at a time, while writes to different aggregates run in parallel.
+    Set it as client.write_serializer and the client queues every write on the owner's resId (or self link),
+    so concurrent coroutines stop tripping over the server side aggregate lock.
+
+    stats counts writes, how many had to queue, the deepest queue, time spent queueing and the lock failures
+    the server still answered with (each one is a backoff retry).
+    """
+
+    def __init__(self):
+        self._queues = {}
+        self.stats = WriteStats()
+
+    def depth(self, key: str) -> int:
+        """
+        Writes to key that are running or queued
+        """
+        queue = self._queues.get(key)
+        return queue.depth if queue else 0
+
+    def queue_depths(self) -> dict:
+        return {key: queue.depth for key, queue in self._queues.items()}
+
+    @contextlib.asynccontextmanager
+    async def serialize(self, key: str):
+        queue = self._queues.get(key)
+        if queue is None:
+            queue = self._queues[key] = _KeyQueue()
+        queue.depth += 1
+        self.stats.writes += 1
+        self.stats.max_depth = max(self.stats.max_depth, queue.depth)
+        if queue.depth > 1:
+            self.stats.queued += 1
+        started = time.monotonic()
+        try:
+            async with queue.lock:
+                self.stats.wait_seconds += time.monotonic() - started
+                yield
+        finally:
+            queue.depth -= 1
+            if queue.depth == 0:
+                del self._queues[key]
@@ -8,10 +8,13 @@ setup(name='mdbclient',
       description='Client library for MDB',
       version='1.7',
       url='https://github.com/nrkno/mdbclient-python3-api',
-      packages=find_packages(),
+      packages=find_packages(exclude=["benchmarks", "benchmarks.*"]),
       install_requires=[
           'aiohttp>=3.5.4',
           'aioamqp>=0.12.0'],
+      entry_points={
+          'console_scripts': ['mdbclient=mdbclient.cli:main']
+      },
       classifiers=[
           'Programming Language :: Python :: 3.9'
       ]